@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Background work for the memory hooks
+
+Some hook work (cache refreshes, writes nobody waits on) should not hold up
+the prompt. run_in_background() takes it off the critical path:
+
+- Inside the hook daemon: runs on a daemon thread in the warm process.
+- In a one-shot hook process: spawns a detached `python3 background_task.py`
+  with the task on stdin, so the hook can exit immediately.
+
+Only functions listed in TASKS can be run this way.
+
+NOTE: Uses only Python standard library (no external dependencies)
+"""
+
+import importlib
+import json
+import os
+import subprocess
+import sys
+import threading
+
+# (module, function) pairs that may be run in the background
+TASKS = {
+    ("memory_inject", "get_memory_context"),
+    ("memory_tracker", "flush_pending"),
+    ("memory_spool", "replay"),
+    ("local_index", "seed_from_context"),
+    ("memory_sync", "sync"),
+    ("context_warmup", "prefetch"),
+    ("curation_windows", "run"),
+}
+
+# Set by memory_daemon.py so tasks run on threads instead of subprocesses
+_use_threads = False
+
+
+def use_threads(enabled: bool = True):
+    """Run background tasks on threads of the current (long-lived) process."""
+    global _use_threads
+    _use_threads = enabled
+
+
+def threads_enabled() -> bool:
+    """Whether this is a long-lived process running tasks on threads."""
+    return _use_threads
+
+
+def _run_task(module: str, function: str, args: list):
+    if (module, function) not in TASKS:
+        raise ValueError(f"Not a background task: {module}.{function}")
+    getattr(importlib.import_module(module), function)(*args)
+
+
+def _run_quietly(module: str, function: str, args: list):
+    try:
+        _run_task(module, function, args)
+    except Exception:
+        pass
+
+
+def run_in_background(module: str, function: str, *args) -> bool:
+    """
+    Run module.function(*args) without waiting for it.
+    Arguments must be JSON-serializable. Returns False if it could not start.
+    """
+    if (module, function) not in TASKS:
+        return False
+
+    if _use_threads:
+        threading.Thread(target=_run_quietly, args=(module, function, list(args)), daemon=True).start()
+        return True
+
+    try:
+        process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        process.stdin.write(json.dumps({"module": module, "function": function, "args": list(args)}).encode('utf-8'))
+        process.stdin.close()
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+def main():
+    """Entry point of the detached worker process."""
+    try:
+        task = json.load(sys.stdin)
+        _run_task(task["module"], task["function"], task.get("args", []))
+    except Exception:
+        pass
+
+
+if __name__ == "__main__":
+    main()
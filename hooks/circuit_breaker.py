@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Circuit breaker shared by every hook talking to the memory server
+
+When the memory server is down or hung, each request would otherwise pay
+the full connect/read timeout again, in every hook of every session. The
+breaker state lives in one small file per server so all hook processes
+and the daemon share it:
+
+    ~/.claude/memory-hooks/circuit_breaker/<host>_<port>.json
+
+- closed:    no state file. Requests go through.
+- open:      MEMORY_CIRCUIT_FAILURES failures within
+             MEMORY_CIRCUIT_WINDOW_SECONDS. Requests are refused without
+             touching the network for MEMORY_CIRCUIT_COOLDOWN_SECONDS.
+- half-open: cool-down over. The one caller that wins the O_EXCL probe
+             lock is let through; its success deletes the state file
+             (closed), its failure re-opens the circuit.
+
+Failure bookkeeping is a read-modify-write of the state file, so two
+hooks failing at the same instant may count as one failure. That only
+delays tripping by a request; it never lets traffic through an open
+circuit.
+
+NOTE: Uses only Python standard library (no external dependencies)
+"""
+
+import os
+import time
+
+from hook_state import state_path, read_json, write_json_atomic
+
+# Configuration
+BREAKER_ENABLED = os.getenv("MEMORY_CIRCUIT_BREAKER", "1") != "0"
+FAILURE_THRESHOLD = int(os.getenv("MEMORY_CIRCUIT_FAILURES", "3"))
+WINDOW_SECONDS = float(os.getenv("MEMORY_CIRCUIT_WINDOW_SECONDS", "30"))
+COOLDOWN_SECONDS = float(os.getenv("MEMORY_CIRCUIT_COOLDOWN_SECONDS", "30"))
+PROBE_STALE_SECONDS = 130  # Longer than the slowest request (curate-transcript)
+
+BREAKER_DIR = state_path("circuit_breaker")
+
+# Errors that say the server is unreachable or not answering
+FAILURE_ERRORS = ("connect", "timeout", "protocol")
+
+
+def _state_file(key: tuple):
+    return BREAKER_DIR / f"{key[0]}_{key[1]}.json"
+
+
+def _probe_lock(key: tuple):
+    return BREAKER_DIR / f"{key[0]}_{key[1]}.probe"
+
+
+def _claim_probe(key: tuple) -> bool:
+    """Let exactly one caller through a half-open circuit."""
+    lock_path = _probe_lock(key)
+    try:
+        fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        os.close(fd)
+        return True
+    except FileExistsError:
+        try:
+            if time.time() - os.stat(lock_path).st_mtime < PROBE_STALE_SECONDS:
+                return False
+            os.utime(lock_path)  # Previous probe died - take it over
+            return True
+        except OSError:
+            return False
+    except OSError:
+        return False
+
+
+def _release_probe(key: tuple):
+    try:
+        os.unlink(_probe_lock(key))
+    except OSError:
+        pass
+
+
+def allow(key: tuple) -> bool:
+    """
+    Whether a request to the server at key (host, port) may be sent now.
+    A True answer from a half-open circuit makes the caller the probe.
+    """
+    if not BREAKER_ENABLED:
+        return True
+    state = read_json(_state_file(key))
+    if not state or not state.get("opened_at"):
+        return True
+    if time.time() - state["opened_at"] < COOLDOWN_SECONDS:
+        return False
+    return _claim_probe(key)
+
+
+def retry_in(key: tuple) -> float:
+    """Seconds until an open circuit lets a probe through (0 if closed)."""
+    state = read_json(_state_file(key))
+    if not state or not state.get("opened_at"):
+        return 0.0
+    return max(0.0, state["opened_at"] + COOLDOWN_SECONDS - time.time())
+
+
+def is_failure(timing: dict) -> bool:
+    """Whether a request timing (see memory_client) means the server is unhealthy."""
+    error = timing.get("error")
+    if error in FAILURE_ERRORS or timing.get("status", 0) >= 500:
+        return True
+    # Our own budget ran out while the server sat on a sent request
+    return error == "deadline" and timing.get("sent", False)
+
+
+def record(key: tuple, timing: dict):
+    """Update the breaker with the outcome of a request that allow() let through."""
+    if not BREAKER_ENABLED:
+        return
+    if is_failure(timing):
+        record_failure(key)
+    elif timing.get("status"):
+        record_success(key)
+    else:
+        # Never reached the server (e.g. budget spent before sending)
+        _release_probe(key)
+
+
+def record_success(key: tuple):
+    """The server answered - close the circuit."""
+    try:
+        os.unlink(_state_file(key))
+    except OSError:
+        pass
+    _release_probe(key)
+
+
+def record_failure(key: tuple):
+    """Count a failure, opening the circuit once the threshold is reached."""
+    now = time.time()
+    state = read_json(_state_file(key)) or {}
+    failures = [t for t in state.get("failures", []) if now - t < WINDOW_SECONDS]
+    failures.append(now)
+
+    opened_at = state.get("opened_at")
+    if opened_at or len(failures) >= FAILURE_THRESHOLD:
+        # Trip, or re-open after a failed probe
+        opened_at = now
+
+    write_json_atomic(_state_file(key), {
+        "failures": failures[-FAILURE_THRESHOLD:],
+        "opened_at": opened_at,
+    })
+    _release_probe(key)
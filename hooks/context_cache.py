@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Local cache for /memory/context responses
+
+Keyed by (project_id, normalized prompt, max_memories) so retried prompts
+and "continue" loops are answered from disk instead of waiting on the
+memory server. One small JSON file per entry:
+
+    ~/.claude/memory-hooks/context_cache/<sha1 of key>.json
+
+- Fresh entries (younger than MEMORY_CONTEXT_CACHE_TTL) are served as-is.
+- Stale entries (up to MEMORY_CONTEXT_CACHE_MAX_AGE) are served immediately
+  and the caller refreshes them in the background (stale-while-revalidate).
+- The file mtime tracks last use; once there are more than
+  MEMORY_CONTEXT_CACHE_ENTRIES files the least recently used are evicted.
+
+NOTE: Uses only Python standard library (no external dependencies)
+"""
+
+import hashlib
+import os
+import re
+import time
+
+from hook_state import state_path, read_json, write_json_atomic
+
+# Configuration
+CACHE_ENABLED = os.getenv("MEMORY_CONTEXT_CACHE", "1") != "0"
+FRESH_SECONDS = float(os.getenv("MEMORY_CONTEXT_CACHE_TTL", "300"))
+MAX_AGE_SECONDS = float(os.getenv("MEMORY_CONTEXT_CACHE_MAX_AGE", "86400"))
+MAX_ENTRIES = int(os.getenv("MEMORY_CONTEXT_CACHE_ENTRIES", "512"))
+REFRESH_LOCK_SECONDS = 30  # A refresh that takes longer is assumed dead
+
+CACHE_DIR = state_path("context_cache")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse case, whitespace and trailing punctuation so near-repeats share a key."""
+    return _WHITESPACE.sub(" ", prompt).strip().rstrip(".!?").strip().lower()
+
+
+def cache_key(project_id: str, prompt: str, max_memories: int) -> str:
+    """Return the cache key (hex digest) for a context request."""
+    prompt_hash = hashlib.sha1(normalize_prompt(prompt).encode('utf-8')).hexdigest()
+    raw = f"{project_id}\0{prompt_hash}\0{max_memories}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def get(project_id: str, prompt: str, max_memories: int):
+    """
+    Look up a cached context response.
+
+    Returns None on a miss, otherwise a dict:
+        {"context_text": str, "age": seconds, "stale": bool}
+    """
+    if not CACHE_ENABLED:
+        return None
+
+    path = CACHE_DIR / f"{cache_key(project_id, prompt, max_memories)}.json"
+    entry = read_json(path)
+    if not entry or not entry.get("context_text"):
+        return None  # An empty answer must not hide the local index fallback
+
+    age = time.time() - entry.get("stored_at", 0)
+    if age > MAX_AGE_SECONDS:
+        return None
+
+    try:
+        os.utime(path)  # Mark as recently used for LRU eviction
+    except OSError:
+        pass
+
+    return {
+        "context_text": entry.get("context_text", ""),
+        "age": age,
+        "stale": age > FRESH_SECONDS,
+    }
+
+
+def put(project_id: str, prompt: str, max_memories: int, context_text: str):
+    """
+    Store a context response and evict least recently used entries.
+    Only retrieved memories belong here - not the session primer, which is
+    specific to the session that asked, and not empty answers.
+    """
+    if not CACHE_ENABLED or not context_text:
+        return
+
+    key = cache_key(project_id, prompt, max_memories)
+    write_json_atomic(CACHE_DIR / f"{key}.json", {
+        "stored_at": time.time(),
+        "project_id": project_id,
+        "max_memories": max_memories,
+        "context_text": context_text,
+    })
+    _release_refresh(key)
+    evict()
+
+
+def evict(max_entries: int = None):
+    """Delete the least recently used entries beyond max_entries."""
+    max_entries = MAX_ENTRIES if max_entries is None else max_entries
+    try:
+        entries = [e for e in os.scandir(CACHE_DIR) if e.name.endswith(".json")]
+    except OSError:
+        return
+    if len(entries) <= max_entries:
+        return
+
+    entries.sort(key=lambda e: e.stat().st_mtime)
+    for entry in entries[:len(entries) - max_entries]:
+        try:
+            os.unlink(entry.path)
+        except OSError:
+            pass
+
+
+def claim_refresh(project_id: str, prompt: str, max_memories: int) -> bool:
+    """
+    Claim the right to refresh a stale entry, so concurrent hooks don't all
+    refresh it. Returns False if another refresh is already in flight.
+    """
+    lock_path = CACHE_DIR / f"{cache_key(project_id, prompt, max_memories)}.refreshing"
+    try:
+        fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        os.close(fd)
+        return True
+    except FileExistsError:
+        try:
+            if time.time() - os.stat(lock_path).st_mtime < REFRESH_LOCK_SECONDS:
+                return False
+            os.utime(lock_path)  # Previous refresh died - take it over
+            return True
+        except OSError:
+            return False
+    except OSError:
+        return False
+
+
+def _release_refresh(key: str):
+    try:
+        os.unlink(CACHE_DIR / f"{key}.refreshing")
+    except OSError:
+        pass
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Speculative context warmup for the first prompt of a session
+
+The first prompt is the slowest one: SessionStart has only fetched the
+primer, so memory_inject.py makes a cold /memory/context request. At
+SessionStart we guess what the session will be about - the "Next Session
+Priorities" and "In Progress" items of SESSION_HANDOFF.md plus the most
+recently changed memories in the local mirror - and prefetch context for
+that guess in the background:
+
+    ~/.claude/memory-hooks/warmup/<session_id>.json
+
+The first prompt takes the entry. If its words are mostly covered by the
+guess and the prefetched memories (MEMORY_WARMUP_MIN_OVERLAP), or it is
+just "continue"-style, the prefetched context is served without a server
+round trip. Every first prompt is counted as a hit, a miss, late (the
+prefetch had not finished) or expired in warmup_stats.json:
+
+    python3 ~/.claude/hooks/context_warmup.py stats
+
+NOTE: Uses only Python standard library (no external dependencies)
+"""
+
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+from hook_state import state_path, read_json, write_json_atomic
+
+# Configuration
+MEMORY_API_URL = os.getenv("MEMORY_API_URL", "http://localhost:8765")
+WARMUP_ENABLED = os.getenv("MEMORY_WARMUP", "1") != "0"
+MIN_OVERLAP = float(os.getenv("MEMORY_WARMUP_MIN_OVERLAP", "0.5"))
+MAX_AGE_SECONDS = 3600      # An older guess is not served
+PREFETCH_TIMEOUT = 10
+PRIMER_RETRIES = 3          # The session may not be registered on the server yet
+PRIMER_RETRY_DELAY = 0.5
+RECENT_MEMORIES = 3
+MAX_QUERY_CHARS = 1000
+
+WARMUP_DIR = state_path("warmup")
+STATS_FILE = state_path("warmup_stats.json")
+
+HANDOFF_SECTIONS = ("Next Session Priorities", "In Progress")
+# A prompt that asks to carry on where the last session stopped, and says
+# nothing else, is a hit: it must contain one of these cues...
+CONTINUATION_CUES = re.compile(
+    r"\b(?:continu\w*|resum\w*|proceed\w*|next|priorit\w*|pick(?:ed)? (?:it )?up|left off|"
+    r"carry on|go ahead|keep going|where we (?:were|stopped))\b", re.IGNORECASE
+)
+# ...and apart from them only words like these
+CONTINUATION_WORDS = frozenset(
+    "continue continuing resume next pick up left off where go ahead proceed carry on keep "
+    "going start work working let lets us back last session priorities priority please ok okay".split()
+)
+
+_SAFE_ID = re.compile(r"[^A-Za-z0-9_.-]")
+_ITEM = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+(.*\S)")
+
+
+def _entry_path(session_id: str):
+    return WARMUP_DIR / f"{_SAFE_ID.sub('_', session_id)}.json"
+
+
+def handoff_priorities(project_root: str) -> list:
+    """Non-empty list items of the priority sections of SESSION_HANDOFF.md."""
+    if not project_root:
+        return []
+    try:
+        with open(Path(project_root) / "SESSION_HANDOFF.md", 'r', encoding='utf-8') as f:
+            content = f.read()
+    except OSError:
+        return []
+
+    items = []
+    in_section = False
+    for line in content.split("\n"):
+        if line.startswith("#"):
+            in_section = line.lstrip("#").strip() in HANDOFF_SECTIONS
+            continue
+        match = _ITEM.match(line) if in_section else None
+        if match and match.group(1).strip("*_ ").lower() not in ("none", "none identified"):
+            items.append(match.group(1))
+    return items
+
+
+def recent_memories(project_id: str, count: int = RECENT_MEMORIES) -> list:
+    """Texts of the most recently changed memories in the local mirror."""
+    import local_index
+    if local_index.INDEX_MODE == "off":
+        return []
+    index = local_index.load(project_id)
+    newest = sorted(index.docs, key=lambda d: index.updated_at.get(d, 0), reverse=True)
+    return [index.docs[doc_id] for doc_id in newest[:count]]
+
+
+def build_query(project_id: str, project_root: str) -> str:
+    """The guessed first prompt, or "" when there is nothing to guess from."""
+    parts = handoff_priorities(project_root) + recent_memories(project_id)
+    return " ".join(parts)[:MAX_QUERY_CHARS]
+
+
+def start(session_id: str, project_id: str, project_root: str) -> bool:
+    """
+    Mark the session as warming up and prefetch in the background.
+    Called by SessionStart; returns False when warmup is off.
+    """
+    if not WARMUP_ENABLED or not session_id or session_id == "unknown":
+        return False
+    from background_task import run_in_background
+    write_json_atomic(_entry_path(session_id), {"status": "pending", "started_at": time.time()})
+    return run_in_background("context_warmup", "prefetch", session_id, project_id, project_root)
+
+
+def prefetch(session_id: str, project_id: str, project_root: str):
+    """Fetch context for the guessed first prompt into the session's entry."""
+    import token_budget
+    from memory_client import http_post
+    from memory_inject import context_request, is_memory_list
+
+    path = _entry_path(session_id)
+    sweep()
+    query = build_query(project_id, project_root)
+    if not query:
+        _discard(path)
+        return
+
+    max_memories = token_budget.memories_for_budget(project_id)
+    context_text = ""
+    for attempt in range(PRIMER_RETRIES):
+        if attempt:
+            time.sleep(PRIMER_RETRY_DELAY)
+        result = http_post(
+            f"{MEMORY_API_URL}/memory/context",
+            context_request(session_id, project_id, query, max_memories),
+            PREFETCH_TIMEOUT
+        )
+        context_text = result.get("context_text", "")
+        if not context_text or is_memory_list(result):
+            break
+        context_text = ""  # Still the primer - the session counter hasn't landed
+
+    entry = read_json(path)
+    if not entry or entry.get("status") != "pending":
+        return  # The first prompt came and went
+    if not context_text:
+        _discard(path)
+        return
+    import local_index
+    write_json_atomic(path, {
+        "status": "ready",
+        "stored_at": time.time(),
+        "project_id": project_id,
+        "terms": sorted(set(local_index.tokenize(query)) | set(local_index.tokenize(context_text))),
+        "context_text": context_text,
+    })
+
+
+def take(session_id: str, project_id: str, prompt: str):
+    """
+    Prefetched context for the first prompt of a session, or None.
+    The entry is used up by the first prompt whether it matches or not.
+    """
+    if not WARMUP_ENABLED:
+        return None
+    path = _entry_path(session_id)
+    entry = read_json(path)
+    if entry is None:
+        return None
+    _discard(path)
+
+    if entry.get("status") != "ready":
+        outcome = "late"
+    elif entry.get("project_id") != project_id or time.time() - entry.get("stored_at", 0) > MAX_AGE_SECONDS:
+        outcome = "expired"
+    elif matches(prompt, entry.get("terms", [])):
+        outcome = "hits"
+    else:
+        outcome = "misses"
+    _count(outcome)
+    return entry["context_text"] if outcome == "hits" else None
+
+
+def matches(prompt: str, terms: list) -> bool:
+    """Whether the prompt is about what was prefetched."""
+    import local_index
+    words = set(local_index.tokenize(prompt)) - CONTINUATION_WORDS
+    if not words:
+        # "continue", "let's pick up where we left off" - but not "why?",
+        # "ok do it" or a prompt in a script the tokenizer doesn't see
+        return bool(CONTINUATION_CUES.search(prompt))
+    covered = len(words & set(terms))
+    return covered / len(words) >= MIN_OVERLAP
+
+
+def _discard(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def _count(outcome: str):
+    stats = read_json(STATS_FILE, {})
+    stats[outcome] = stats.get(outcome, 0) + 1
+    write_json_atomic(STATS_FILE, stats)
+
+
+def sweep(max_age: float = 86400):
+    """Delete entries of sessions that never sent a prompt."""
+    cutoff = time.time() - max_age
+    try:
+        entries = list(os.scandir(WARMUP_DIR))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.name.endswith(".json") and entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+        except OSError:
+            pass
+
+
+def main():
+    if sys.argv[1:] != ["stats"]:
+        print("Usage: context_warmup.py stats", file=sys.stderr)
+        sys.exit(1)
+    stats = read_json(STATS_FILE, {})
+    total = sum(stats.get(key, 0) for key in ("hits", "misses", "late", "expired"))
+    for key in ("hits", "misses", "late", "expired"):
+        print(f"{key:<8} {stats.get(key, 0)}")
+    if total:
+        print(f"hit rate {stats.get('hits', 0) / total:.0%} of {total} first prompts")
+
+
+if __name__ == "__main__":
+    main()
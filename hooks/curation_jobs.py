@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Asynchronous transcript curation jobs
+
+Curation can take minutes, and PreCompact used to wait for it. In job mode
+memory_curate_transcript.py submits the transcript with "async": true and
+the server answers at once with a job ID:
+
+    POST /memory/curate-transcript  {..., "async": true}  ->  202 {"job_id", "status"}
+    POST /memory/curation-job       {"job_id"}  ->  {"status": queued|running|done|failed,
+                                                     "memories_curated", "session_summary", "error"}
+
+Each submitted job is recorded in ~/.claude/memory-hooks/curation_jobs/.
+The next time the curation hook runs for the project it reports how the
+previous jobs went; a job is forgotten once its outcome has been reported
+(or after JOB_MAX_AGE). Servers that don't know job mode simply curate
+synchronously, as before. Whether a server answered with a job is
+remembered (curation_job_mode.json), so the hook only uses the short
+submit timeout with servers known to queue jobs and waits as long as it
+used to for the others.
+
+Windowed curation (curation_windows.py) runs as a local job instead: a
+background task on this machine keeps the job file up to date, and
+polling just reads it back.
+
+Usage:
+    python3 ~/.claude/hooks/curation_jobs.py status            # Recorded jobs
+    python3 ~/.claude/hooks/curation_jobs.py status <job_id>   # One job
+
+NOTE: Uses only Python standard library (no external dependencies)
+"""
+
+import os
+import re
+import sys
+import time
+
+from hook_budget import Deadline
+from hook_state import state_path, read_json, write_json_atomic
+
+# Configuration
+MEMORY_API_URL = os.getenv("MEMORY_API_URL", "http://localhost:8765")
+STATUS_TIMEOUT = 2
+JOB_MAX_AGE = 7 * 86400
+LOCAL_JOB_MAX_SECONDS = 3600  # A local job unfinished by then died with its process
+FINISHED = ("done", "failed", "lost")
+
+JOBS_DIR = state_path("curation_jobs")
+JOB_MODE_FILE = state_path("curation_job_mode.json")
+
+_SAFE_ID = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def _job_file(job_id: str):
+    return JOBS_DIR / f"{_SAFE_ID.sub('_', job_id)}.json"
+
+
+def job_mode(base_url: str = MEMORY_API_URL):
+    """Whether base_url queues curation jobs: True, False or None (not seen yet)."""
+    return read_json(JOB_MODE_FILE, {}).get(base_url, {}).get("supported")
+
+
+def remember_job_mode(base_url: str, supported: bool):
+    modes = read_json(JOB_MODE_FILE, {})
+    if modes.get(base_url, {}).get("supported") == supported:
+        return
+    modes[base_url] = {"supported": supported, "checked_at": time.time()}
+    write_json_atomic(JOB_MODE_FILE, modes)
+
+
+def record(job_id: str, project_id: str, session_id: str, trigger: str, transcript: dict = None,
+           local: bool = False):
+    """
+    Remember a submitted job so its outcome can be reported later.
+    transcript is the curated range {"path", "start", "end"}; local marks
+    a job run on this machine rather than by the server.
+    """
+    write_json_atomic(_job_file(job_id), {
+        "job_id": job_id,
+        "project_id": project_id,
+        "session_id": session_id,
+        "trigger": trigger,
+        "transcript": transcript,
+        "local": local,
+        "status": "queued",
+        "submitted_at": time.time(),
+    })
+
+
+def update(job_id: str, **fields):
+    """Change a recorded job's fields (local jobs report their progress this way)."""
+    job = read_json(_job_file(job_id))
+    if job:
+        job.update(fields, checked_at=time.time())
+        write_json_atomic(_job_file(job_id), job)
+
+
+def jobs(project_id: str = None) -> list:
+    """Recorded jobs, oldest first (optionally only one project's)."""
+    found = []
+    try:
+        entries = list(os.scandir(JOBS_DIR))
+    except OSError:
+        return []
+    for entry in entries:
+        if not entry.name.endswith(".json"):
+            continue
+        job = read_json(entry.path)
+        if job and (project_id is None or job.get("project_id") == project_id):
+            found.append(job)
+    return sorted(found, key=lambda job: job.get("submitted_at", 0))
+
+
+def poll(job: dict, deadline: Deadline = None, store: bool = True) -> dict:
+    """Refresh a job's status from the server (and store it)."""
+    if job.get("local"):
+        job = read_json(_job_file(job["job_id"])) or dict(job, status="lost")
+        if job.get("status") not in FINISHED and time.time() - job.get("submitted_at", 0) > LOCAL_JOB_MAX_SECONDS:
+            job["status"] = "lost"
+        return job
+    from memory_client import request_json
+    result, timing = request_json(
+        f"{MEMORY_API_URL}/memory/curation-job",
+        {"job_id": job["job_id"]},
+        STATUS_TIMEOUT,
+        deadline=deadline
+    )
+    if timing["status"] == 404:
+        job["status"] = "lost"  # Server restarted or forgot it
+    elif timing["error"] is None:
+        job.update({key: value for key, value in result.items() if key != "job_id"})
+    else:
+        return job  # Unreachable - try again next time
+    job["checked_at"] = time.time()
+    if store:
+        write_json_atomic(_job_file(job["job_id"]), job)
+    return job
+
+
+def describe(job: dict) -> str:
+    """One line about a job's state."""
+    status = job.get("status")
+    job_id = job.get("job_id")
+    if status == "done":
+        count = job.get("memories_curated", 0)
+        if count:
+            return f"✨ Previous curation ({job_id}): curated {count} memories"
+        return f"📭 Previous curation ({job_id}): no memories to curate"
+    if status == "failed":
+        return f"⚠️ Previous curation ({job_id}) failed: {job.get('error') or 'unknown error'}"
+    if status == "lost":
+        return f"⚠️ Previous curation ({job_id}) is unknown to the server (lost)"
+    age = time.time() - job.get("submitted_at", time.time())
+    return f"⏳ Previous curation ({job_id}) still {status or 'queued'} after {age:.0f}s"
+
+
+def report_previous(project_id: str, deadline: Deadline = None) -> list:
+    """
+    Lines describing the project's earlier jobs. Finished jobs are
+    forgotten once reported; a job with new memories triggers a sync of
+    the local mirror.
+    """
+    lines = []
+    for job in jobs(project_id):
+        if deadline is not None and deadline.expired():
+            break
+        job = poll(job, deadline)
+        lines.append(describe(job))
+        if job.get("status") in FINISHED or time.time() - job.get("submitted_at", 0) > JOB_MAX_AGE:
+            forget(job["job_id"])
+            transcript = job.get("transcript")
+            if transcript and job.get("status") in ("failed", "lost"):
+                # Curate that part of the transcript again next time
+                import transcript_watermark
+                transcript_watermark.rewind(transcript["path"], transcript["start"], transcript["end"])
+            if job.get("memories_curated"):
+                from background_task import run_in_background
+                run_in_background("memory_sync", "sync", project_id)
+    return lines
+
+
+def forget(job_id: str):
+    try:
+        os.unlink(_job_file(job_id))
+    except OSError:
+        pass
+
+
+def main():
+    if len(sys.argv) not in (2, 3) or sys.argv[1] != "status":
+        print(__doc__.split("Usage:")[1].split("NOTE:")[0].rstrip())
+        sys.exit(1)
+
+    if len(sys.argv) == 3:
+        recorded = read_json(_job_file(sys.argv[2]))
+        selected = [recorded or {"job_id": sys.argv[2]}]
+    else:
+        recorded = True
+        selected = jobs()
+    if not selected:
+        print("No curation jobs recorded")
+        return
+    for job in selected:
+        job = poll(job, store=bool(recorded))
+        print(f"{job['job_id']:<24} {job.get('project_id', '?'):<20} {job.get('status', '?'):<8} "
+              f"{job.get('memories_curated', '')}")
+        if job.get("session_summary"):
+            print(f"    {job['session_summary'][:100]}")
+        if job.get("error"):
+            print(f"    {job['error']}")
+
+
+if __name__ == "__main__":
+    main()
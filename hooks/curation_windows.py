@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Windowed curation of very long transcripts
+
+A single curation request makes the server read the whole range in one
+pass, so a long session takes minutes to curate. Above
+MEMORY_CURATION_WINDOW_KB the range is instead split into windows on line
+(message) boundaries. Each window also repeats the last
+MEMORY_CURATION_OVERLAP_LINES lines of the one before it, so a decision is
+not cut off from the conversation that led up to it. The windows are
+curated concurrently, at most MEMORY_CURATION_WORKERS at a time, without
+the server storing anything yet:
+
+    POST /memory/curate-transcript  {..., "start_offset", "end_offset", "commit": false}
+        -> {"memories": [{"content"}, ...], "session_summary"}
+    POST /memory/store              {"project_id", "session_id", "curation_id", "memories"}
+        -> {"success": true, "memories_stored": n}
+
+merge() combines the windows' memories in window order and drops the
+duplicates the overlaps produce (same text up to whitespace and case), so
+the stored set does not depend on the order the windows finish in. It is
+stored with one request; "curation_id" lets the server ignore a retry.
+
+Nothing is sent concurrently until the server has shown it understands
+"commit": false: against a server not known to, the first window goes
+alone. If its answer has no "memories" list the server curated (and
+stored) it as usual, so the rest of the range follows as one ordinary
+request, and the server is remembered as unsupported for
+CAPABILITY_TTL (in ~/.claude/memory-hooks/curation_windows.json) - the
+hook then sends such ranges in one request without splitting them. In job
+mode the windows are curated by a background task recorded as a local
+curation job (see curation_jobs.py), so PreCompact still doesn't wait.
+
+Usage:
+    python3 ~/.claude/hooks/curation_windows.py <transcript.jsonl>   # Show the windows
+
+NOTE: Uses only Python standard library (no external dependencies)
+"""
+
+import collections
+import os
+import sys
+import threading
+import time
+import uuid
+
+import hook_metrics
+from hook_budget import Deadline
+from hook_state import state_path, read_json, write_json_atomic
+from local_index import memory_id
+
+# Configuration
+MEMORY_API_URL = os.getenv("MEMORY_API_URL", "http://localhost:8765")
+WINDOWS_ENABLED = os.getenv("MEMORY_CURATION_WINDOWS", "1") != "0"
+WINDOW_BYTES = int(os.getenv("MEMORY_CURATION_WINDOW_KB", "1024")) * 1024
+OVERLAP_LINES = int(os.getenv("MEMORY_CURATION_OVERLAP_LINES", "20"))
+WORKERS = max(1, int(os.getenv("MEMORY_CURATION_WORKERS", "4")))
+WINDOW_TIMEOUT = 120  # Per window, like a whole synchronous curation
+STORE_TIMEOUT = 30
+CAPABILITY_TTL = 86400  # Re-probe a server without window support daily
+CAPABILITY_FILE = state_path("curation_windows.json")
+
+
+def split(path: str, start: int = 0, end: int = None, window_bytes: int = WINDOW_BYTES,
+          overlap: int = OVERLAP_LINES) -> list:
+    """
+    Windows [[start, end], ...] covering bytes [start, end) of a JSONL file,
+    cut at line boundaries after about window_bytes each. Every window but
+    the first begins overlap lines before the previous one ends. A short
+    tail is folded into the last window.
+    """
+    windows = []
+    recent = collections.deque(maxlen=overlap)  # Starts of the latest lines
+    window_start = own_start = position = start
+    with open(path, 'rb') as f:
+        if end is None:
+            end = os.fstat(f.fileno()).st_size
+        f.seek(start)
+        while position < end:
+            if position - own_start >= window_bytes:
+                windows.append([window_start, position])
+                own_start = position
+                window_start = recent[0] if recent else position
+            raw = f.readline()
+            if not raw:
+                break
+            recent.append(position)
+            position += len(raw)
+    end = min(position, end)
+    if windows and end - own_start < window_bytes // 4:
+        windows[-1][1] = end
+    elif end > own_start or not windows:
+        windows.append([window_start, end])
+    return windows
+
+
+def supported(base_url: str = MEMORY_API_URL):
+    """Whether base_url curates windows without storing them: True, False or None (unknown)."""
+    known = read_json(CAPABILITY_FILE, {}).get(base_url)
+    if not known or (not known.get("supported") and time.time() - known.get("checked_at", 0) > CAPABILITY_TTL):
+        return None
+    return known["supported"]
+
+
+def _remember_support(base_url: str, value: bool):
+    capabilities = read_json(CAPABILITY_FILE, {})
+    if capabilities.get(base_url, {}).get("supported") == value:
+        return
+    capabilities[base_url] = {"supported": value, "checked_at": time.time()}
+    write_json_atomic(CAPABILITY_FILE, capabilities)
+
+
+def wanted(size: int) -> bool:
+    """Whether a range of size bytes is long enough to split (and the server may allow it)."""
+    return (WINDOWS_ENABLED and WORKERS > 1 and size > WINDOW_BYTES * 5 // 4
+            and supported() is not False)
+
+
+def merge(results: list) -> tuple:
+    """
+    Combine per-window results (in window order) into
+    ([memory, ...], session_summary, duplicates dropped).
+    """
+    memories = []
+    seen = set()
+    summaries = []
+    for result in results:
+        for memory in result.get("memories", []):
+            content = memory.get("content", "") if isinstance(memory, dict) else str(memory)
+            key = memory_id(content)
+            if not content.strip() or key in seen:
+                continue
+            seen.add(key)
+            memories.append(memory if isinstance(memory, dict) else {"content": content})
+        summary = (result.get("session_summary") or "").strip()
+        if summary and summary not in summaries:
+            summaries.append(summary)
+    duplicates = sum(len(result.get("memories", [])) for result in results) - len(memories)
+    return memories, " ".join(summaries), duplicates
+
+
+def _curate_window(payload: dict, window: list, deadline: Deadline) -> tuple:
+    from memory_client import request_json
+    body = dict(payload, start_offset=window[0], end_offset=window[1], commit=False)
+    body.pop("async", None)  # Each window is waited for
+    return request_json(
+        f"{MEMORY_API_URL}/memory/curate-transcript",
+        body,
+        WINDOW_TIMEOUT,
+        deadline=deadline
+    )
+
+
+def _curate_rest(payload: dict, first: dict, windows: list, deadline: Deadline, outcome: dict) -> dict:
+    """
+    The server curated the first window the usual way (stored, no memory
+    list): curate the rest of the range as one ordinary request.
+    """
+    from memory_client import request_json
+    body = dict(payload, start_offset=windows[0][1], end_offset=windows[-1][1])
+    body.pop("async", None)
+    result, timing = request_json(
+        f"{MEMORY_API_URL}/memory/curate-transcript", body, WINDOW_TIMEOUT, deadline=deadline
+    )
+    outcome["windows"] = 1
+    if timing["status"] != 200:
+        outcome["error"] = f"rest of range: {timing['status'] or timing['error']}"
+        return outcome
+    outcome.update(success=True,
+                   memories_curated=first.get("memories_curated", 0) + result.get("memories_curated", 0),
+                   session_summary=merge([first, result])[1])
+    return outcome
+
+
+def curate(payload: dict, windows: list, deadline: Deadline = None, workers: int = WORKERS) -> dict:
+    """
+    Curate the windows of payload["transcript_path"] concurrently and store
+    the merged memories. Returns {"success", "memories_curated",
+    "session_summary", "windows", "duplicates", "error"}.
+    """
+    from memory_client import request_json
+    outcome = {"success": False, "memories_curated": 0, "session_summary": "",
+               "windows": len(windows), "duplicates": 0, "error": None}
+    outcomes = [None] * len(windows)
+    first = 0
+    if supported() is not True:
+        # Probe with the first window alone before sending the rest at once
+        outcomes[0] = _curate_window(payload, windows[0], deadline)
+        result, timing = outcomes[0]
+        if timing["status"] != 200:
+            outcome["error"] = f"window 1/{len(windows)}: {timing['status'] or timing['error']}"
+            return outcome
+        _remember_support(MEMORY_API_URL, isinstance(result.get("memories"), list))
+        if not isinstance(result.get("memories"), list):
+            return _curate_rest(payload, result, windows, deadline, outcome)
+        first = 1
+
+    pending = iter(range(first, len(windows)))
+    pending_lock = threading.Lock()
+    run = hook_metrics.current()
+
+    def worker():
+        hook_metrics.attach(run)
+        while True:
+            with pending_lock:
+                i = next(pending, None)
+            if i is None:
+                return
+            try:
+                outcomes[i] = _curate_window(payload, windows[i], deadline)
+            except Exception as e:
+                outcomes[i] = ({}, {"status": None, "error": str(e)})
+
+    threads = [threading.Thread(target=worker, daemon=True)
+               for _ in range(min(workers, len(windows) - first) - 1)]
+    for thread in threads:
+        thread.start()
+    worker()
+    for thread in threads:
+        thread.join()
+
+    for i, (result, timing) in enumerate(outcomes):
+        if timing["status"] != 200:
+            outcome["error"] = f"window {i + 1}/{len(windows)}: {timing['status'] or timing['error']}"
+            return outcome
+
+    results = [result for result, _ in outcomes]
+    if not all(isinstance(result.get("memories"), list) for result in results):
+        # Support went away mid-way (server replaced?) - those windows were stored
+        _remember_support(MEMORY_API_URL, False)
+        outcome.update(success=True, memories_curated=sum(r.get("memories_curated", 0) for r in results),
+                       session_summary=merge(results)[1])
+        return outcome
+
+    memories, summary, duplicates = merge(results)
+    outcome.update(session_summary=summary, duplicates=duplicates)
+    if not memories:
+        outcome["success"] = True
+        return outcome
+    result, timing = request_json(
+        f"{MEMORY_API_URL}/memory/store",
+        {
+            "project_id": payload.get("project_id"),
+            "session_id": payload.get("session_id"),
+            "curation_id": payload.get("curation_id") or uuid.uuid4().hex,
+            "memories": memories,
+            "session_summary": summary,
+        },
+        STORE_TIMEOUT,
+        deadline=deadline
+    )
+    if timing["status"] != 200:
+        outcome["error"] = f"store: {timing['status'] or timing['error']}"
+        return outcome
+    outcome.update(success=True, memories_curated=result.get("memories_stored", len(memories)))
+    return outcome
+
+
+def new_job_id() -> str:
+    return f"local-{uuid.uuid4().hex[:12]}"
+
+
+def run(job_id: str, payload: dict, windows: list):
+    """Background task: curate the windows as local curation job job_id."""
+    import curation_jobs
+    curation_jobs.update(job_id, status="running")
+    try:
+        outcome = curate(dict(payload, curation_id=job_id), windows)
+    except Exception as e:
+        outcome = {"success": False, "error": str(e)}
+    if outcome["success"]:
+        curation_jobs.update(job_id, status="done", memories_curated=outcome["memories_curated"],
+                             session_summary=outcome["session_summary"], windows=outcome["windows"],
+                             duplicates=outcome["duplicates"])
+    else:
+        curation_jobs.update(job_id, status="failed", error=outcome["error"])
+
+
+def main():
+    if len(sys.argv) != 2:
+        print(__doc__.split("Usage:")[1].split("NOTE:")[0].rstrip())
+        sys.exit(1)
+    windows = split(sys.argv[1])
+    for i, (start, end) in enumerate(windows):
+        print(f"{i + 1:4d}  {start:>12d} - {end:<12d} {(end - start) / 1024:10.1f} KB")
+    print(f"{len(windows)} windows of ~{WINDOW_BYTES // 1024} KB, {OVERLAP_LINES} lines overlap, "
+          f"{WORKERS} workers")
+
+
+if __name__ == "__main__":
+    main()
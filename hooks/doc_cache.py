@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Head reads and a rendered-doc cache for the SessionStart docs
+
+memory_session_start.py injects the first lines of a handful of docs
+(CLAUDE_CAPABILITIES.md, SESSION_HANDOFF.md, ROADMAP.md, APP_MAP.md) on
+every session start, although they rarely change between sessions.
+
+- read_head() reads only the lines it keeps; the truncation notice's line
+  count comes from counting newlines in the rest in binary chunks, without
+  decoding or splitting it.
+- read_doc() caches the rendered text keyed by path, size, mtime and line
+  limit, so an unchanged doc costs a stat call and a small cache read:
+
+    ~/.claude/memory-hooks/doc_cache/<sha1 of path and variant>.json
+
+  The hook daemon also keeps the entries in memory. cached() does the same
+  for anything else derived from a doc (see doc_digest.py).
+
+NOTE: Uses only Python standard library (no external dependencies)
+"""
+
+import hashlib
+import os
+import threading
+
+from hook_state import state_path, read_json, write_json_atomic
+
+# Configuration
+CACHE_ENABLED = os.getenv("MEMORY_DOC_CACHE", "1") != "0"
+COUNT_CHUNK_BYTES = 1 << 16
+
+CACHE_DIR = state_path("doc_cache")
+
+# Rendered docs by cache file, for the hook daemon
+_memory = {}
+_memory_lock = threading.Lock()
+
+
+def read_head(file_path, max_lines: int) -> str:
+    """
+    The first max_lines lines of a UTF-8 file, with a note of how many more
+    there are. Raises OSError/UnicodeDecodeError like open() and decode().
+    """
+    with open(file_path, 'rb') as f:
+        head = []
+        for _ in range(max_lines):
+            line = f.readline()
+            if not line:
+                break
+            head.append(line)
+
+        more = 0
+        last = b"\n"
+        while True:
+            chunk = f.read(COUNT_CHUNK_BYTES)
+            if not chunk:
+                break
+            more += chunk.count(b"\n")
+            last = chunk[-1:]
+        if last != b"\n":
+            more += 1  # Final line without a newline
+
+    content = b"".join(head).decode('utf-8').replace("\r\n", "\n")
+    if more:
+        content += f"\n... (truncated, {more} more lines)\n"
+    return content.strip()
+
+
+def _cache_file(file_path, variant: str):
+    raw = f"{os.path.abspath(file_path)}\0{variant}"
+    return CACHE_DIR / f"{hashlib.sha1(raw.encode('utf-8')).hexdigest()}.json"
+
+
+def cached(file_path, variant: str, render, default=""):
+    """
+    render(file_path) through the cache, keyed by path, variant, size and
+    mtime. render must return something JSON-serializable. Returns default
+    if the file is missing.
+    """
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return default
+    stamp = [st.st_size, st.st_mtime_ns]
+    if not CACHE_ENABLED:
+        return render(file_path)
+
+    cache_file = _cache_file(file_path, variant)
+    with _memory_lock:
+        entry = _memory.get(cache_file)
+    if entry is None or entry.get("stamp") != stamp:
+        entry = read_json(cache_file)
+    if entry and entry.get("stamp") == stamp:
+        with _memory_lock:
+            _memory[cache_file] = entry
+        return entry.get("content", default)
+
+    content = render(file_path)
+    entry = {"path": str(file_path), "stamp": stamp, "content": content}
+    write_json_atomic(cache_file, entry)
+    with _memory_lock:
+        _memory[cache_file] = entry
+    return content
+
+
+def read_doc(file_path, max_lines: int) -> str:
+    """read_head() through the cache. Returns "" if the file is missing or unreadable."""
+    return cached(file_path, f"head:{max_lines}", lambda path: _read(path, max_lines))
+
+
+def _read(file_path, max_lines: int) -> str:
+    try:
+        return read_head(file_path, max_lines)
+    except (OSError, ValueError):
+        return ""
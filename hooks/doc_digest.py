@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Heading-indexed digests of the SessionStart docs
+
+Cutting a doc at a fixed line count loses everything after the first
+screen of a long doc and pads out a short one. Instead each doc gets a
+heading index - its sections as a tree, with their character spans and
+estimated token sizes - and the digest keeps whole sections, in order of
+priority, until the doc's token budget is spent:
+
+1. The text before the first heading, then the sections in document order,
+   except that sections whose heading looks like current work (priorities,
+   in progress, next, status, blockers, ...) and their subsections go first.
+2. A section that fits is kept whole. One that doesn't keeps its heading
+   and intro, and its subsections compete on their own. If even the intro
+   is too long, the subsections still compete, and once every whole
+   section of the same priority has had its turn the intro keeps as many
+   of its first lines as still fit - so a doc without headings, or with a
+   long preamble, is cut like a plain head rather than dropped.
+3. The kept sections are rendered in document order, followed by a list of
+   the headings that were left out or cut short.
+
+If nothing at all fits, the digest is the doc's first max_lines lines, as
+with the budget off. The index and the rendered digests are cached by
+doc_cache.py, so they are rebuilt only when the file changes.
+
+Usage:
+    python3 ~/.claude/hooks/doc_digest.py <file> [token_budget [max_lines]]
+
+NOTE: Uses only Python standard library (no external dependencies)
+"""
+
+import heapq
+import re
+import sys
+
+import doc_cache
+from token_budget import estimate_tokens
+
+# Sections about current work are kept first
+PRIORITY_HEADINGS = re.compile(
+    r"priorit|in progress|next|current|status|blocker|summary|overview|todo|active", re.IGNORECASE
+)
+MAX_OMITTED_LISTED = 12
+FALLBACK_LINES = 150  # Head kept when no section fits
+SELECT_VERSION = 3  # Part of the digest cache key; bump when select() changes
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+
+
+def _read_text(file_path) -> str:
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def build_index(file_path) -> dict:
+    """
+    Section tree of a markdown file. Node 0 is the whole document; every
+    node is {"heading", "level", "parent", "start", "own_end", "end",
+    "own_tokens", "tokens"} with spans as character offsets.
+    """
+    try:
+        text = _read_text(file_path)
+    except (OSError, ValueError):
+        return {"nodes": []}
+
+    headings = []  # (offset, level, title)
+    offset = 0
+    in_fence = False
+    for line in text.splitlines(keepends=True):
+        if _FENCE.match(line):
+            in_fence = not in_fence
+        elif not in_fence:
+            match = _HEADING.match(line.rstrip("\r\n"))
+            if match:
+                headings.append((offset, len(match.group(1)), match.group(2)))
+        offset += len(line)
+
+    nodes = [{"heading": "", "level": 0, "parent": None, "start": 0,
+              "own_end": headings[0][0] if headings else len(text), "end": len(text)}]
+    stack = [0]
+    for i, (start, level, title) in enumerate(headings):
+        while nodes[stack[-1]]["level"] >= level:
+            stack.pop()
+        end = next((h[0] for h in headings[i + 1:] if h[1] <= level), len(text))
+        own_end = headings[i + 1][0] if i + 1 < len(headings) else len(text)
+        nodes.append({"heading": title, "level": level, "parent": stack[-1],
+                      "start": start, "own_end": own_end, "end": end})
+        stack.append(len(nodes) - 1)
+
+    for node in nodes:
+        node["own_tokens"] = estimate_tokens(text[node["start"]:node["own_end"]].strip())
+        node["tokens"] = estimate_tokens(text[node["start"]:node["end"]].strip())
+    return {"nodes": nodes}
+
+
+def heading_index(file_path) -> dict:
+    """build_index() through the doc cache."""
+    return doc_cache.cached(file_path, "index", build_index, {"nodes": []})
+
+
+def _head_end(text: str, start: int, end: int, budget: int) -> int:
+    """The end of the longest run of whole lines from start that fits in budget tokens."""
+    cut = start
+    for line in text[start:end].splitlines(keepends=True):
+        if estimate_tokens(text[start:cut + len(line)].strip()) > budget:
+            break
+        cut += len(line)
+    return cut
+
+
+def select(nodes: list, budget: int, text: str = "") -> tuple:
+    """
+    Choose spans within budget tokens. Given the doc's text, a section
+    whose own text doesn't fit is cut to its first lines instead of dropped.
+    Returns ([(start, end), ...] in document order, [omitted heading, ...]).
+    """
+    children = {}
+    for i, node in enumerate(nodes):
+        if node["parent"] is not None:
+            children.setdefault(node["parent"], []).append(i)
+
+    def priority(i, parent_rank):
+        # Current-work headings, and everything under them, go first
+        return 0 if parent_rank == 0 or PRIORITY_HEADINGS.search(nodes[i]["heading"]) else 1
+
+    spans = []
+    omitted = []
+    remaining = budget
+    # (priority, truncated head?, position, node): within a priority, whole
+    # sections and intros get their turn before any cut-down ones
+    queue = [(1, False, nodes[0]["start"], 0)]  # The root is neutral
+    while queue:
+        rank, partial, _, i = heapq.heappop(queue)
+        node = nodes[i]
+        if partial:
+            cut = _head_end(text, node["start"], node["own_end"], remaining)
+            heading_end = text.find("\n", node["start"], node["own_end"]) + 1 if node["heading"] else node["start"]
+            if cut > heading_end:
+                spans.append((node["start"], cut))
+                remaining -= estimate_tokens(text[node["start"]:cut].strip())
+                if node["heading"] and cut < node["own_end"]:
+                    omitted.append((node["start"], f"{node['heading']} (cut short)"))
+            elif node["heading"]:
+                omitted.append((node["start"], node["heading"]))
+        elif node["tokens"] <= remaining:
+            spans.append((node["start"], node["end"]))
+            remaining -= node["tokens"]
+        elif node["own_tokens"] <= remaining and i in children:
+            spans.append((node["start"], node["own_end"]))
+            remaining -= node["own_tokens"]
+            for child in children[i]:
+                heapq.heappush(queue, (priority(child, rank), False, nodes[child]["start"], child))
+        elif text:
+            # Too long even on its own: keep the head of it later, if room is left
+            heapq.heappush(queue, (rank, True, node["start"], i))
+            for child in children.get(i, []):
+                heapq.heappush(queue, (priority(child, rank), False, nodes[child]["start"], child))
+        elif node["heading"]:
+            omitted.append((node["start"], node["heading"]))
+    spans.sort()
+    return spans, [heading for _, heading in sorted(omitted)]
+
+
+def render(file_path, budget: int, max_lines: int = FALLBACK_LINES) -> str:
+    """
+    The digest of a doc within budget tokens, or its first max_lines lines
+    if no part of it fits ("" if it can't be read).
+    """
+    try:
+        text = _read_text(file_path)
+    except (OSError, ValueError):
+        return ""
+    nodes = heading_index(file_path)["nodes"]
+    if not nodes or nodes[0]["end"] != len(text):
+        nodes = build_index(file_path)["nodes"]  # Changed since it was indexed
+    if not nodes:
+        return ""
+    if nodes[0]["tokens"] <= budget:
+        return text.strip()
+
+    spans, omitted = select(nodes, budget, text)
+    digest = "".join(text[start:end] for start, end in spans).strip()
+    if not digest:
+        return doc_cache.read_head(file_path, max_lines).strip()
+    if omitted:
+        listed = "; ".join(omitted[:MAX_OMITTED_LISTED])
+        if len(omitted) > MAX_OMITTED_LISTED:
+            listed += f"; and {len(omitted) - MAX_OMITTED_LISTED} more"
+        digest += f"\n\n_(Sections omitted to fit the token budget: {listed})_"
+    return digest.strip()
+
+
+def digest(file_path, budget: int, max_lines: int = FALLBACK_LINES) -> str:
+    """render() through the doc cache. Returns "" if the file is missing."""
+    return doc_cache.cached(file_path, f"digest:{SELECT_VERSION}:{budget}:{max_lines}",
+                            lambda path: render(path, budget, max_lines))
+
+
+def main():
+    if len(sys.argv) not in (2, 3, 4):
+        print("Usage: doc_digest.py <file> [token_budget [max_lines]]", file=sys.stderr)
+        sys.exit(1)
+    nodes = build_index(sys.argv[1])["nodes"]
+    for node in nodes[1:]:
+        indent = "  " * (node["level"] - 1)
+        print(f"{node['tokens']:7d} {node['own_tokens']:7d}  {indent}{node['heading']}")
+    if len(sys.argv) >= 3:
+        print()
+        print(render(sys.argv[1], *map(int, sys.argv[2:])))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Per-hook latency budgets
+
+A hook gets one overall deadline for everything it does on the critical
+path. Each memory-server request is given only the time that is left, and
+work still pending when the deadline passes is abandoned so the hook can
+return whatever it already has.
+
+Budgets are configured per hook event in milliseconds:
+
+    MEMORY_HOOK_BUDGET_USERPROMPTSUBMIT_MS   (default 800)
+    MEMORY_HOOK_BUDGET_SESSIONSTART_MS       (default 2000)
+    MEMORY_HOOK_BUDGET_SESSIONEND_MS         (default 2000)
+    MEMORY_HOOK_BUDGET_PRECOMPACT_MS         (default 120000)
+
+NOTE: Uses only Python standard library (no external dependencies)
+"""
+
+import os
+import time
+
+DEFAULT_BUDGETS_MS = {
+    "UserPromptSubmit": 800,
+    "SessionStart": 2000,
+    "SessionEnd": 2000,
+    "PreCompact": 120000,
+}
+
+
+class Deadline:
+    """A point in time by which a hook must be done."""
+
+    def __init__(self, seconds: float):
+        self.budget = seconds
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + seconds
+
+    def remaining(self) -> float:
+        """Seconds left (never negative)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def timeout(self, cap: float = None) -> float:
+        """Time a sub-request may take: what is left, capped at cap."""
+        remaining = self.remaining()
+        return remaining if cap is None else min(cap, remaining)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+
+def budget_ms(event: str) -> int:
+    """Configured budget for a hook event, in milliseconds."""
+    default = DEFAULT_BUDGETS_MS.get(event, 5000)
+    try:
+        return int(os.getenv(f"MEMORY_HOOK_BUDGET_{event.upper()}_MS", default))
+    except ValueError:
+        return default
+
+
+def hook_deadline(event: str) -> Deadline:
+    """Start the deadline for one run of a hook handling event."""
+    return Deadline(budget_ms(event) / 1000)
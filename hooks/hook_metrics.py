@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Optional per-phase latency metrics for the memory hooks
+
+With MEMORY_HOOK_METRICS=1 every hook run appends one JSON line to
+
+    ~/.claude/memory-hooks/metrics/hook_metrics.jsonl
+
+rotated once it exceeds MEMORY_HOOK_METRICS_MAX_BYTES (keeping
+ROTATED_FILES older files). A record looks like:
+
+    {"ts": 1700000000.0, "hook": "memory_inject", "source": "hook",
+     "startup_ms": 41.0,                  # process start -> hook start
+     "phases": {"stdin_read": 0.1, "daemon_forward": 0.3, ...},
+     "http": [{"endpoint": "/memory/context", "status": 200, "error": null,
+               "reused": true, "connect_ms": 0.0, "server_ms": 12.3,
+               "total_ms": 12.9}],
+     "output_bytes": 1834, "total_ms": 15.2, "error": null}
+
+source is "hook" for the hook script itself and "daemon" for the run the
+hook daemon does on its behalf. startup_ms comes from /proc/self/stat and
+is omitted where that is not available. HTTP calls are reported by
+memory_client for whichever run is current on the calling thread.
+
+When metrics are off, start() returns a run that records nothing, so the
+hooks can instrument unconditionally. Importing this module costs next to
+nothing - the hooks load it before forwarding to the daemon - so the state
+directory helpers are only imported once a record is written or read.
+
+Usage:
+    python3 ~/.claude/hooks/hook_metrics.py report --since 1h
+    python3 ~/.claude/hooks/hook_metrics.py report --since 1d --hook memory_inject --json
+
+NOTE: Uses only Python standard library (no external dependencies)
+"""
+
+import json
+import math
+import os
+import sys
+import time
+from _thread import _local  # threading.local, without importing threading
+
+# Configuration
+METRICS_ENABLED = os.getenv("MEMORY_HOOK_METRICS", "0") == "1"
+MAX_BYTES = int(os.getenv("MEMORY_HOOK_METRICS_MAX_BYTES", str(5 * 1024 * 1024)))
+ROTATED_FILES = 3
+
+HTTP_FIELDS = ("endpoint", "status", "error", "reused", "connect_ms", "server_ms", "total_ms")
+TIMEOUT_ERRORS = ("timeout", "deadline")
+
+_current = _local()
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+def process_age_ms():
+    """Milliseconds since this process started, from /proc (None if unavailable)."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the parenthesised command name; starttime is field 22
+            fields = f.read().rsplit(")", 1)[1].split()
+        start_ticks = int(fields[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return round((uptime - start_ticks / os.sysconf("SC_CLK_TCK")) * 1000, 1)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class _Phase:
+    """Context manager timing one named phase of a run."""
+
+    def __init__(self, run, name: str):
+        self.run = run
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.run is not None and self.run.enabled:
+            phases = self.run.phases
+            phases[self.name] = round(phases.get(self.name, 0) + _ms(time.perf_counter() - self.started), 2)
+        return False
+
+
+class HookRun:
+    """Metrics for one run of one hook."""
+
+    def __init__(self, hook: str, source: str = "hook", enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self.hook = hook
+        self.source = source
+        self.started = time.perf_counter()
+        self.startup_ms = process_age_ms() if enabled and source == "hook" else None
+        self.phases = {}
+        self.http = []
+        self.error = None
+
+    def phase(self, name: str) -> _Phase:
+        return _Phase(self, name)
+
+    def fail(self, exc: BaseException):
+        """Note the exception a hook swallowed."""
+        self.error = f"{type(exc).__name__}: {exc}"[:200]
+
+    def finish(self, output: str = ""):
+        """Write the record. Never raises."""
+        if getattr(_current, "run", None) is self:
+            _current.run = None
+        if not self.enabled:
+            return
+        record = {
+            "ts": round(time.time(), 3),
+            "hook": self.hook,
+            "source": self.source,
+            "pid": os.getpid(),
+            "phases": self.phases,
+            "http": self.http,
+            "output_bytes": len(output.encode('utf-8')) if output else 0,
+            "total_ms": _ms(time.perf_counter() - self.started),
+            "error": self.error,
+        }
+        if self.startup_ms is not None:
+            record["startup_ms"] = self.startup_ms
+        try:
+            _append(json.dumps(record, separators=(',', ':')) + "\n")
+        except OSError:
+            pass
+
+
+def start(hook: str, source: str = "hook") -> HookRun:
+    """Start measuring a hook run and make it current on this thread."""
+    run = HookRun(hook, source)
+    _current.run = run
+    return run
+
+
+def current():
+    """The run current on this thread (None without one)."""
+    return getattr(_current, "run", None)
+
+
+def attach(run):
+    """Make run current on this thread too (for work a hook fans out)."""
+    _current.run = run
+
+
+def phase(name: str) -> _Phase:
+    """Time a phase of the current run (no-op without one)."""
+    return _Phase(getattr(_current, "run", None), name)
+
+
+def record_http(timing: dict):
+    """Attach a memory_client timing dict to the current run."""
+    run = getattr(_current, "run", None)
+    if run is not None and run.enabled:
+        run.http.append({field: timing.get(field) for field in HTTP_FIELDS})
+
+
+def metrics_file():
+    """Path of the current metrics file (~/.claude/memory-hooks/metrics/hook_metrics.jsonl)."""
+    from hook_state import state_path
+    return state_path("metrics", "hook_metrics.jsonl")
+
+
+def _rotated(n: int):
+    path = metrics_file()
+    return path.with_name(f"{path.name}.{n}")
+
+
+def _append(line: str):
+    path = metrics_file()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+    try:
+        os.write(fd, line.encode('utf-8'))
+        size = os.fstat(fd).st_size
+    finally:
+        os.close(fd)
+    if size > MAX_BYTES:
+        for n in range(ROTATED_FILES - 1, 0, -1):
+            try:
+                os.replace(_rotated(n), _rotated(n + 1))
+            except OSError:
+                pass
+        try:
+            os.replace(path, _rotated(1))
+        except OSError:
+            pass
+
+
+# --- Report -----------------------------------------------------------------
+
+def parse_window(text: str) -> float:
+    """'90', '15m', '1h', '2d' -> seconds."""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+def load_records(since: float = 0, hook: str = None) -> list:
+    """Read records newer than since (epoch seconds), oldest file first."""
+    records = []
+    for path in [_rotated(n) for n in range(ROTATED_FILES, 0, -1)] + [metrics_file()]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record.get("ts", 0) < since:
+                        continue
+                    if hook and record.get("hook") != hook:
+                        continue
+                    records.append(record)
+        except OSError:
+            pass
+    return records
+
+
+def percentile(values: list, p: float):
+    """Nearest-rank percentile of values (None when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def _latency(values: list) -> dict:
+    return {
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+    }
+
+
+def summarize(records: list) -> dict:
+    """Aggregate records into per-hook and per-endpoint statistics."""
+    hooks = {}
+    endpoints = {}
+
+    for record in records:
+        key = f"{record.get('hook')} ({record.get('source', 'hook')})"
+        hook = hooks.setdefault(key, {"total": [], "startup": [], "phases": {}, "errors": 0, "output": []})
+        hook["total"].append(record.get("total_ms", 0))
+        if record.get("startup_ms") is not None:
+            hook["startup"].append(record["startup_ms"])
+        for name, ms in record.get("phases", {}).items():
+            hook["phases"].setdefault(name, []).append(ms)
+        hook["output"].append(record.get("output_bytes", 0))
+        if record.get("error"):
+            hook["errors"] += 1
+
+        for call in record.get("http", []):
+            endpoint = endpoints.setdefault(call.get("endpoint"), {"total": [], "errors": 0, "timeouts": 0, "reused": 0})
+            endpoint["total"].append(call.get("total_ms") or 0)
+            if call.get("error"):
+                endpoint["errors"] += 1
+            if call.get("error") in TIMEOUT_ERRORS:
+                endpoint["timeouts"] += 1
+            if call.get("reused"):
+                endpoint["reused"] += 1
+
+    summary = {"records": len(records), "hooks": {}, "endpoints": {}}
+    for key, hook in sorted(hooks.items()):
+        runs = len(hook["total"])
+        summary["hooks"][key] = {
+            "runs": runs,
+            "error_rate": round(hook["errors"] / runs, 4),
+            "total_ms": _latency(hook["total"]),
+            "startup_ms": _latency(hook["startup"]),
+            "phases_ms": {name: _latency(values) for name, values in sorted(hook["phases"].items())},
+            "avg_output_bytes": round(sum(hook["output"]) / runs),
+        }
+    for key, endpoint in sorted(endpoints.items(), key=lambda item: str(item[0])):
+        calls = len(endpoint["total"])
+        summary["endpoints"][key] = {
+            "calls": calls,
+            "error_rate": round(endpoint["errors"] / calls, 4),
+            "timeouts": endpoint["timeouts"],
+            "reuse_rate": round(endpoint["reused"] / calls, 4),
+            "total_ms": _latency(endpoint["total"]),
+        }
+    return summary
+
+
+def _fmt(latency: dict) -> str:
+    return "  ".join(
+        f"{p}={latency[p]:.1f}" if latency[p] is not None else f"{p}=-"
+        for p in ("p50", "p95", "p99")
+    )
+
+
+def print_report(summary: dict, window: str):
+    print(f"Hook metrics - last {window} ({summary['records']} runs)")
+    print()
+    for key, hook in summary["hooks"].items():
+        print(f"{key}: {hook['runs']} runs, error rate {hook['error_rate']:.1%}, "
+              f"avg output {hook['avg_output_bytes']} bytes")
+        print(f"    total ms    {_fmt(hook['total_ms'])}")
+        if hook["startup_ms"]["p50"] is not None:
+            print(f"    startup ms  {_fmt(hook['startup_ms'])}")
+        for name, latency in hook["phases_ms"].items():
+            print(f"    {name:<22} {_fmt(latency)}")
+    if summary["endpoints"]:
+        print()
+        for key, endpoint in summary["endpoints"].items():
+            print(f"{key}: {endpoint['calls']} calls, error rate {endpoint['error_rate']:.1%}, "
+                  f"{endpoint['timeouts']} timeouts, reused {endpoint['reuse_rate']:.0%}")
+            print(f"    total ms    {_fmt(endpoint['total_ms'])}")
+
+
+def main():
+    import argparse  # Only the CLI needs it; keep hook imports light
+
+    parser = argparse.ArgumentParser(description="Memory hook latency report")
+    parser.add_argument("action", choices=["report"])
+    parser.add_argument("--since", default="1d", help="Time window, e.g. 30m, 1h, 7d (default 1d)")
+    parser.add_argument("--hook", help="Only this hook (e.g. memory_inject)")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of text")
+    args = parser.parse_args()
+
+    try:
+        since = time.time() - parse_window(args.since)
+    except ValueError:
+        print(f"Invalid --since: {args.since}", file=sys.stderr)
+        sys.exit(2)
+
+    summary = summarize(load_records(since, args.hook))
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_report(summary, args.since)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Local state directory shared by the memory hooks
+
+Small JSON files the hooks keep between runs (capability markers, caches,
+per-session state) live under one directory:
+
+    ~/.claude/memory-hooks/   (override with MEMORY_HOOKS_STATE_DIR)
+
+Writes are atomic (temp file + rename) so concurrent hook processes never
+see a half-written file; readers fall back to a default on any error.
+
+NOTE: Uses only Python standard library (no external dependencies)
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+STATE_DIR = Path(os.getenv(
+    "MEMORY_HOOKS_STATE_DIR",
+    str(Path.home() / ".claude" / "memory-hooks")
+))
+
+
+def state_path(*parts: str) -> Path:
+    """Return a path inside the state directory (parents are not created)."""
+    return STATE_DIR.joinpath(*parts)
+
+
+def read_json(path: Path, default=None):
+    """Read a JSON file, returning default if it is missing or unreadable."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def write_json_atomic(path: Path, data) -> bool:
+    """Atomically replace path with data as JSON. Returns False on failure."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.parent / f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        return True
+    except OSError:
+        return False
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Offline BM25 index over a local mirror of each project's memories
+
+When the memory server is slow or down memory_inject.py would return
+nothing. This module keeps a mirror of the project's memories with a
+precomputed inverted index, so /memory/context-style queries are answered
+in-process in a few milliseconds:
+
+    ~/.claude/memory-hooks/local_index/<project>.idx
+
+The file is a marshal dump of the documents, their lengths and the
+postings {term: packed uint32 (doc, tf) pairs}; the packed arrays load as
+plain bytes and are only unpacked for the terms a query uses, which keeps
+loading a few thousand memories in the low milliseconds. The index is
+rebuilt whenever the mirror changes. The mirror is filled from /memory/context responses as
+they come back (in the background, only when they hold new memories), and
+by memory_sync.py, which pulls the memories changed on the server since the
+last sync. Synced memories are stored under their server IDs, seeded ones
+under a hash of their text; the index maps text hashes to IDs so a memory
+already mirrored under either is not seeded again. Every change to a
+project's mirror holds the project's sync lock (sync_locks/), so a seed
+cannot overwrite a page that a sync has just applied.
+
+MEMORY_LOCAL_INDEX selects how it is used:
+    fallback  (default) answer from the index when the server gives nothing
+    primary   answer from the index first; the server only refreshes it
+    off       never use it
+
+Usage:
+    python3 ~/.claude/hooks/local_index.py stats <project_id>
+    python3 ~/.claude/hooks/local_index.py query <project_id> "prompt text"
+
+NOTE: Uses only Python standard library (no external dependencies)
+"""
+
+import hashlib
+import heapq
+from array import array
+import marshal
+import math
+import os
+import re
+import sys
+import threading
+import time
+
+from hook_state import state_path
+from token_budget import is_memory_list, split_items
+
+# Configuration
+INDEX_MODE = os.getenv("MEMORY_LOCAL_INDEX", "fallback")
+REFRESH_SECONDS = float(os.getenv("MEMORY_LOCAL_INDEX_REFRESH", "60"))  # Primary mode
+MAX_DOCS = int(os.getenv("MEMORY_LOCAL_INDEX_MAX_DOCS", "5000"))
+INDEX_VERSION = 3
+LOCK_STALE_SECONDS = 120   # A lock holder silent for longer is assumed dead
+UPDATE_LOCK_WAIT = 5.0     # How long a seed waits for a running sync
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+INDEX_DIR = state_path("local_index")
+LOCK_DIR = state_path("sync_locks")
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9_.-]")
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by can do does for from has have how i if in is it its "
+    "me my not of on or our so that the their then there this to was we were what when "
+    "where which who why will with you your".split()
+)
+
+# Loaded indexes by path, reused while the file is unchanged (hook daemon)
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+def tokenize(text: str) -> list:
+    return [t for t in _TOKEN.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def memory_id(text: str) -> str:
+    """ID for a memory seen only as rendered text (no server ID)."""
+    normalized = " ".join(text.split()).lower()
+    return "h:" + hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:16]
+
+
+def index_path(project_id: str):
+    return INDEX_DIR / f"{_SAFE_NAME.sub('_', project_id)}.idx"
+
+
+class LocalIndex:
+    """Documents of one project plus their BM25 inverted index."""
+
+    def __init__(self, docs: dict = None, updated_at: dict = None):
+        self.docs = docs or {}                # id -> text
+        self.updated_at = updated_at or {}    # id -> epoch seconds
+        self.build()
+
+    def build(self):
+        """(Re)compute postings, document lengths and text hashes from self.docs."""
+        self.ids = list(self.docs)
+        self.hashes = {memory_id(text): doc_id for doc_id, text in self.docs.items()}
+        self.lengths = array('I')
+        postings = {}
+        for doc, doc_id in enumerate(self.ids):
+            counts = {}
+            terms = tokenize(self.docs[doc_id])
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            for term, tf in counts.items():
+                postings.setdefault(term, array('I')).extend((doc, tf))
+            self.lengths.append(len(terms))
+        self.postings = {term: entries.tobytes() for term, entries in postings.items()}
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+    def search(self, query: str, k: int = 5) -> list:
+        """Top k documents for query as [(score, id, text)], best first."""
+        if not self.ids:
+            return []
+        n = len(self.ids)
+        scores = {}
+        for term in set(tokenize(query)):
+            packed = self.postings.get(term)
+            if not packed:
+                continue
+            entries = array('I')
+            entries.frombytes(packed)
+            df = len(entries) // 2
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for doc, tf in zip(entries[::2], entries[1::2]):
+                norm = K1 * (1 - B + B * self.lengths[doc] / self.avg_length)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(round(score, 3), self.ids[doc], self.docs[self.ids[doc]]) for doc, score in best]
+
+    def with_changes(self, memories: dict, deleted=()):
+        """
+        New index with memories (id -> text) added or replaced and deleted
+        IDs dropped, or None if nothing changed. self is left untouched
+        since the daemon may be searching it on another thread.
+        """
+        docs = dict(self.docs)
+        updated_at = dict(self.updated_at)
+        changed = False
+        now = time.time()
+        for doc_id, text in memories.items():
+            if docs.get(doc_id) != text:
+                docs[doc_id] = text
+                updated_at[doc_id] = now
+                changed = True
+        for doc_id in deleted:
+            if docs.pop(doc_id, None) is not None:
+                updated_at.pop(doc_id, None)
+                changed = True
+        if not changed:
+            return None
+        if len(docs) > MAX_DOCS:
+            # Keep the most recently changed memories
+            newest = sorted(docs, key=lambda d: updated_at.get(d, 0), reverse=True)
+            for doc_id in newest[MAX_DOCS:]:
+                del docs[doc_id]
+                updated_at.pop(doc_id, None)
+        return LocalIndex(docs, updated_at)
+
+    def dump(self) -> bytes:
+        return marshal.dumps({
+            "version": INDEX_VERSION,
+            "docs": self.docs,
+            "updated_at": self.updated_at,
+            "ids": self.ids,
+            "lengths": self.lengths.tobytes(),
+            "postings": self.postings,
+            "hashes": self.hashes,
+        })
+
+    @classmethod
+    def loads(cls, data: bytes):
+        raw = marshal.loads(data)
+        if raw.get("version") != INDEX_VERSION:
+            return cls(raw.get("docs", {}), raw.get("updated_at", {}))
+        index = cls.__new__(cls)
+        index.docs = raw["docs"]
+        index.updated_at = raw["updated_at"]
+        index.ids = raw["ids"]
+        index.lengths = array('I')
+        index.lengths.frombytes(raw["lengths"])
+        index.postings = raw["postings"]
+        index.hashes = raw["hashes"]
+        index.avg_length = (sum(index.lengths) / len(index.lengths)) if index.lengths else 0.0
+        return index
+
+
+def load(project_id: str) -> LocalIndex:
+    """Load a project's index (empty if there is none or it is unreadable)."""
+    path = index_path(project_id)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return LocalIndex()
+    with _loaded_lock:
+        cached = _loaded.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(path, 'rb') as f:
+            index = LocalIndex.loads(f.read())
+    except (OSError, ValueError, EOFError, TypeError, KeyError):
+        return LocalIndex()
+    with _loaded_lock:
+        _loaded[path] = (mtime, index)
+    return index
+
+
+def save(project_id: str, index: LocalIndex) -> bool:
+    """Atomically write a project's index."""
+    path = index_path(project_id)
+    try:
+        INDEX_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.parent / f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(index.dump())
+        os.replace(tmp_path, path)
+        return True
+    except OSError:
+        return False
+
+
+def acquire_lock(project_id: str, wait: float = 0.0):
+    """
+    O_EXCL lock on a project's mirror, shared with memory_sync.py. Waits up
+    to wait seconds for it. Returns the lock path (touch it to keep a long
+    hold alive, unlink it to release) or None.
+    """
+    path = LOCK_DIR / f"{index_path(project_id).stem}.lock"
+    give_up = time.monotonic() + wait
+    while True:
+        try:
+            LOCK_DIR.mkdir(parents=True, exist_ok=True)
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.close(fd)
+            return path
+        except FileExistsError:
+            try:
+                if time.time() - os.stat(path).st_mtime >= LOCK_STALE_SECONDS:
+                    os.utime(path)  # Previous holder died - take it over
+                    return path
+            except OSError:
+                continue  # Released meanwhile - try again
+        except OSError:
+            return None
+        if time.monotonic() >= give_up:
+            return None
+        time.sleep(0.05)
+
+
+def release_lock(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def update(project_id: str, memories: dict, deleted=(), locked: bool = False, only_new: bool = False) -> bool:
+    """
+    Upsert memories into a project's mirror and persist the index. Takes
+    the project's lock unless the caller holds it (locked). only_new skips
+    memories whose text is already mirrored under any ID.
+    """
+    lock = None
+    if not locked:
+        lock = acquire_lock(project_id, UPDATE_LOCK_WAIT)
+        if lock is None:
+            return False
+    try:
+        index = load(project_id)
+        if only_new:
+            memories = {doc_id: text for doc_id, text in memories.items()
+                        if memory_id(text) not in index.hashes}
+        index = index.with_changes(memories, deleted)
+        if index is None:
+            return False
+        return save(project_id, index)
+    finally:
+        if lock is not None:
+            release_lock(lock)
+
+
+def memories_from_context(context_text: str) -> dict:
+    """Memories (id -> text) found in a rendered /memory/context response."""
+    if not context_text or not is_memory_list(context_text):
+        return {}
+    _, items = split_items(context_text)
+    memories = {}
+    for item in items:
+        text = _BULLET.sub("", item, count=1).strip()
+        if text and not text.endswith("…"):
+            memories[memory_id(text)] = text
+    return memories
+
+
+def has_new(project_id: str, context_text: str) -> bool:
+    """Whether a context response holds memories the mirror does not have yet."""
+    memories = memories_from_context(context_text)
+    if not memories:
+        return False
+    hashes = load(project_id).hashes
+    return any(memory_id(text) not in hashes for text in memories.values())
+
+
+def seed_from_context(project_id: str, context_text: str):
+    """Add the memories of a context response to the mirror."""
+    memories = memories_from_context(context_text)
+    if memories:
+        update(project_id, memories, only_new=True)
+
+
+def claim_refresh(project_id: str) -> bool:
+    """
+    Primary mode: whether the mirror is due a refresh from the server.
+    Touches the index so other hooks don't refresh it too for a while.
+    """
+    path = index_path(project_id)
+    try:
+        if time.time() - os.stat(path).st_mtime < REFRESH_SECONDS:
+            return False
+        os.utime(path)
+        return True
+    except OSError:
+        return True
+
+
+def query_context(project_id: str, prompt: str, max_memories: int = 5) -> str:
+    """Answer a context query from the local index, rendered like the server's."""
+    results = load(project_id).search(prompt, max_memories)
+    if not results:
+        return ""
+    lines = [f"- {text}" for _, _, text in results]
+    return "## Relevant Memories (local index)\n\n" + "\n".join(lines)
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] not in ("stats", "query"):
+        print(__doc__.split("Usage:")[1].split("NOTE:")[0].rstrip())
+        sys.exit(1)
+    project_id = sys.argv[2]
+
+    started = time.perf_counter()
+    index = load(project_id)
+    load_ms = (time.perf_counter() - started) * 1000
+
+    if sys.argv[1] == "stats":
+        print(f"{len(index.ids)} memories, {len(index.postings)} terms, "
+              f"avg length {index.avg_length:.1f}, loaded in {load_ms:.2f} ms")
+        return
+
+    started = time.perf_counter()
+    results = index.search(" ".join(sys.argv[3:]), 5)
+    search_ms = (time.perf_counter() - started) * 1000
+    for score, doc_id, text in results:
+        print(f"{score:7.3f}  {doc_id}  {text[:100]}")
+    print(f"(load {load_ms:.2f} ms, search {search_ms:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
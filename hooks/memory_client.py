@@ -0,0 +1,574 @@
+#!/usr/bin/env python3
+"""
+Shared Memory API Client for Claude Code hooks
+
+Every hook talks to the memory server through this module. It keeps
+persistent HTTP/1.1 connections so a long-lived process (see
+memory_daemon.py) pays the TCP handshake once instead of on every request,
+can pipeline several requests over one connection, and reports where the
+time went for each request:
+
+    connect_ms  - TCP connect (0 when a pooled connection was reused)
+    server_ms   - request sent -> response headers received
+    total_ms    - whole call including reading the body
+
+Idle connections live in a small pool; each request checks one out, so
+the threaded daemon never shares a socket between two requests in flight.
+
+Every call accepts an optional Deadline (see hook_budget.py). Each request
+then gets only the time left before it, capped by its own timeout, and
+responses still outstanding when the deadline passes are abandoned.
+
+All requests go through a shared circuit breaker (circuit_breaker.py):
+while the server is known to be down, calls fail immediately with
+timing["error"] == "circuit_open" instead of waiting on a timeout.
+
+conditional_request() keeps a response on disk with its validator (ETag
+or a "version" field) and revalidates it with If-None-Match, so an
+unchanged response costs an empty 304.
+
+Several operations can also be queued and sent as one POST to
+/memory/batch (see MemoryBatch). Servers without that endpoint are
+detected once and served by pipelining the individual requests instead.
+
+Usage:
+    from memory_client import http_post, request_json, conditional_request, pipeline, MemoryBatch
+
+    result = http_post(f"{MEMORY_API_URL}/memory/context", payload, timeout=5)
+    result, timing = request_json(f"{MEMORY_API_URL}/memory/context", payload)
+    results = pipeline(MEMORY_API_URL, [("/memory/context", a), ("/memory/process", b)])
+
+    batch = MemoryBatch()
+    batch.add("context", a)
+    batch.add("process", b)
+    context_result, _ = batch.flush(timeout=5)
+
+NOTE: Uses only Python standard library (no external dependencies)
+"""
+
+import io
+import json
+import os
+import socket
+import threading
+import time
+from http.client import HTTPConnection, HTTPException, HTTPResponse
+from urllib.parse import urlsplit
+
+import circuit_breaker
+import hook_metrics
+from hook_budget import Deadline
+from hook_state import state_path, read_json, write_json_atomic
+
+# Configuration
+MEMORY_API_URL = os.getenv("MEMORY_API_URL", "http://localhost:8765")
+
+MAX_IDLE_PER_HOST = 8
+
+# Operations accepted by /memory/batch and their standalone endpoints
+BATCH_OPERATIONS = {
+    "context": "/memory/context",
+    "process": "/memory/process",
+    "checkpoint": "/memory/checkpoint",
+}
+# "auto" tries /memory/batch and remembers servers that lack it,
+# "batch" always uses it, "pipeline" never does
+BATCH_MODE = os.getenv("MEMORY_BATCH_MODE", "auto")
+BATCH_CAPABILITY_TTL = 3600  # Re-probe an unsupported server hourly
+BATCH_CAPABILITY_FILE = state_path("batch_capability.json")
+
+# Idle keep-alive connections, checked out by one request at a time
+_idle = {}
+_idle_lock = threading.Lock()
+
+
+def _connection_key(url: str) -> tuple:
+    """Return (host, port) for a URL on the memory server."""
+    parts = urlsplit(url)
+    return parts.hostname or "localhost", parts.port or 80
+
+
+def _request_path(url: str) -> str:
+    """Return the path (and query) part of a URL."""
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    return path
+
+
+def _checkout(key: tuple, timeout: float) -> HTTPConnection:
+    """Take an idle connection for key from the pool, or open a new one."""
+    with _idle_lock:
+        idle = _idle.get(key)
+        conn = idle.pop() if idle else None
+
+    if conn is None:
+        return HTTPConnection(key[0], key[1], timeout=timeout)
+    conn.timeout = timeout
+    if conn.sock is not None:
+        conn.sock.settimeout(timeout)
+    return conn
+
+
+def _checkin(key: tuple, conn: HTTPConnection):
+    """Return a healthy connection to the pool for reuse."""
+    with _idle_lock:
+        idle = _idle.setdefault(key, [])
+        if len(idle) < MAX_IDLE_PER_HOST:
+            idle.append(conn)
+            return
+    conn.close()
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+def _new_timing(endpoint: str) -> dict:
+    return {
+        "endpoint": endpoint,
+        "status": 0,
+        "error": None,
+        "sent": False,
+        "reused": False,
+        "connect_ms": 0.0,
+        "server_ms": 0.0,
+        "total_ms": 0.0,
+    }
+
+
+def _classify_error(exc: Exception, deadline: Deadline = None) -> str:
+    """Map an exception to a short error kind for timing records."""
+    if isinstance(exc, (socket.timeout, TimeoutError)):
+        if deadline is not None and deadline.expired():
+            return "deadline"
+        return "timeout"
+    if isinstance(exc, ValueError):
+        return "decode"
+    if isinstance(exc, HTTPException):
+        return "protocol"
+    return "connect"
+
+
+def _decode(status: int, payload: bytes, timing: dict) -> dict:
+    """Decode a JSON response body, recording HTTP and decode errors."""
+    timing["status"] = status
+    if status == 304:
+        return {}  # Not modified - the caller has the body (see conditional_request)
+    if status >= 400:
+        timing["error"] = "http"
+        return {}
+    try:
+        return json.loads(payload.decode('utf-8'))
+    except ValueError:
+        timing["error"] = "decode"
+        return {}
+
+
+def _time_left(timeout: float, deadline: Deadline = None) -> float:
+    """Timeout for the next socket operation given an optional deadline."""
+    if deadline is None:
+        return timeout
+    # A zero timeout would switch the socket to non-blocking mode
+    return max(0.001, deadline.timeout(timeout))
+
+
+def request_json(url: str, data: dict, timeout: float = 5, headers: dict = None,
+                 deadline: Deadline = None) -> tuple:
+    """
+    POST JSON over a pooled keep-alive connection.
+
+    Returns (result, timing). result is the decoded JSON response or {}
+    on any failure; timing["error"] is then one of "connect" (nothing was
+    sent), "circuit_open" (skipped, server known to be down), "timeout"
+    (sent, no reply in time), "deadline" (budget spent before sending or
+    while waiting), "http", "protocol" or "decode".
+    """
+    key = _connection_key(url)
+    timing = _new_timing(_request_path(url))
+    if not circuit_breaker.allow(key):
+        timing["error"] = "circuit_open"
+        hook_metrics.record_http(timing)
+        return {}, timing
+
+    result, timing = _request_json(url, data, timeout, headers, deadline, timing)
+    circuit_breaker.record(key, timing)
+    hook_metrics.record_http(timing)
+    return result, timing
+
+
+def _request_json(url: str, data: dict, timeout: float, headers: dict,
+                  deadline: Deadline, timing: dict) -> tuple:
+    """request_json() without the circuit breaker."""
+    key = _connection_key(url)
+    path = _request_path(url)
+    body = json.dumps(data).encode('utf-8')
+    request_headers = {'Content-Type': 'application/json', 'Connection': 'keep-alive'}
+    if headers:
+        request_headers.update(headers)
+
+    started = time.perf_counter()
+
+    # A reused connection may have been closed by the server while idle;
+    # retry once on a fresh connection in that case.
+    for attempt in range(2):
+        if deadline is not None and deadline.expired():
+            timing["error"] = "deadline"
+            break
+        conn = _checkout(key, _time_left(timeout, deadline))
+        timing["reused"] = conn.sock is not None
+        if conn.sock is None:
+            connect_started = time.perf_counter()
+            try:
+                conn.connect()
+            except OSError:
+                # Refused or timed out before anything was sent
+                conn.close()
+                timing["error"] = "connect"
+                break
+            timing["connect_ms"] = _ms(time.perf_counter() - connect_started)
+        try:
+            sent = time.perf_counter()
+            conn.sock.settimeout(_time_left(timeout, deadline))
+            conn.request('POST', path, body=body, headers=request_headers)
+            timing["sent"] = True
+            response = conn.getresponse()
+            timing["server_ms"] = _ms(time.perf_counter() - sent)
+            if conn.sock is not None:  # Detached once a closing response arrives
+                conn.sock.settimeout(_time_left(timeout, deadline))
+            payload = response.read()
+        except (ConnectionResetError, BrokenPipeError, HTTPException) as e:
+            conn.close()
+            if timing["reused"] and attempt == 0:
+                continue
+            timing["error"] = _classify_error(e, deadline)
+            break
+        except OSError as e:
+            conn.close()
+            timing["error"] = _classify_error(e, deadline)
+            break
+
+        if response.will_close:
+            conn.close()
+        else:
+            _checkin(key, conn)
+
+        timing["response_headers"] = {k.lower(): v for k, v in response.getheaders()}
+        result = _decode(response.status, payload, timing)
+        timing["total_ms"] = _ms(time.perf_counter() - started)
+        return result, timing
+
+    timing["total_ms"] = _ms(time.perf_counter() - started)
+    return {}, timing
+
+
+def conditional_request(url: str, data: dict, cache_file, timeout: float = 5,
+                        deadline: Deadline = None) -> tuple:
+    """
+    request_json() with a locally cached response and its validator.
+
+    The cached response's ETag (or "version" field) goes out as
+    If-None-Match; a 304 answer returns the cached body. Fresh responses
+    that carry a validator replace the cache entry. timing["cache"] is
+    "hit" (304), "stored", or None.
+    """
+    entry = read_json(cache_file)
+    headers = {"If-None-Match": entry["etag"]} if entry and entry.get("etag") else None
+    result, timing = request_json(url, data, timeout, headers=headers, deadline=deadline)
+    timing["cache"] = None
+
+    if timing["status"] == 304 and headers:
+        timing["cache"] = "hit"
+        return entry.get("result", {}), timing
+    if timing["error"] is None and timing["status"] == 200:
+        etag = timing.get("response_headers", {}).get("etag")
+        if etag is None and result.get("version") is not None:
+            etag = f'"{result["version"]}"'
+        if etag and (not entry or entry.get("etag") != etag):
+            write_json_atomic(cache_file, {"etag": etag, "result": result, "stored_at": time.time()})
+            timing["cache"] = "stored"
+    return result, timing
+
+
+def http_post(url: str, data: dict, timeout: float = 5, deadline: Deadline = None) -> dict:
+    """
+    POST JSON to the memory server over a keep-alive connection.
+
+    Returns the decoded JSON response, or {} on any failure (connection
+    refused, timeout, HTTP error status, invalid JSON).
+    """
+    result, _ = request_json(url, data, timeout, deadline=deadline)
+    return result
+
+
+class _SharedReader(io.BufferedReader):
+    """
+    Buffered socket reader shared by consecutive pipelined responses.
+    HTTPResponse closes its reader when a body is done; keep it open.
+    """
+
+    def close(self):
+        pass
+
+    def really_close(self):
+        super().close()
+
+
+class _PipelineSocket:
+    """Socket stand-in whose makefile() hands every response the same reader."""
+
+    def __init__(self, reader: _SharedReader):
+        self._reader = reader
+
+    def makefile(self, mode, *args, **kwargs):
+        return self._reader
+
+
+def _pipeline_once(conn: HTTPConnection, wire: bytes, timings: list, results: list,
+                   started: float, timeout: float, deadline: Deadline = None) -> tuple:
+    """
+    Write all pipelined requests to conn and read responses in order.
+    Returns (responses_read, will_close).
+    """
+    conn.sock.settimeout(_time_left(timeout, deadline))
+    conn.sock.sendall(wire)
+    for timing in timings:
+        timing["sent"] = True
+    reader = _SharedReader(socket.SocketIO(conn.sock, "rb"))
+    shared = _PipelineSocket(reader)
+    done = 0
+    try:
+        # server_ms for later responses is measured from the end of the
+        # previous one, i.e. how long the client actually waited for it
+        last = time.perf_counter()
+        for i in range(len(timings)):
+            # Re-arm with what is left of the budget before each response
+            conn.sock.settimeout(_time_left(timeout, deadline))
+            response = HTTPResponse(shared, method="POST")
+            response.begin()
+            timings[i]["server_ms"] = _ms(time.perf_counter() - last)
+            payload = response.read()
+            last = time.perf_counter()
+            timings[i]["total_ms"] = _ms(last - started)
+            timings[i]["response_headers"] = {k.lower(): v for k, v in response.getheaders()}
+            results[i] = _decode(response.status, payload, timings[i])
+            done += 1
+            if response.will_close:
+                return done, True
+        return done, False
+    finally:
+        reader.really_close()
+
+
+def pipeline(base_url: str, requests: list, timeout: float = 5, deadline: Deadline = None) -> list:
+    """
+    Send several POSTs back to back on one connection (HTTP/1.1 pipelining)
+    and read the responses in order.
+
+    requests is a list of (path, data) tuples. Returns a list of
+    (result, timing) tuples in the same order; requests that never got a
+    response (including those abandoned at the deadline) come back as
+    ({}, timing) with timing["error"] set ("circuit_open" for all of them
+    while the server is known to be down).
+    """
+    if not requests:
+        return []
+
+    key = _connection_key(base_url)
+    if not circuit_breaker.allow(key):
+        responses = [({}, dict(_new_timing(path), error="circuit_open")) for path, _ in requests]
+    else:
+        responses = _pipeline(base_url, requests, timeout, deadline)
+        if responses:
+            # The first response shows whether the server is answering at all
+            circuit_breaker.record(key, responses[0][1])
+    for _, timing in responses:
+        hook_metrics.record_http(timing)
+    return responses
+
+
+def _pipeline(base_url: str, requests: list, timeout: float, deadline: Deadline) -> list:
+    """pipeline() without the circuit breaker."""
+    key = _connection_key(base_url)
+    base_path = _request_path(base_url).rstrip("/")
+    host_header = f"{key[0]}:{key[1]}"
+
+    wire = []
+    for path, data in requests:
+        body = json.dumps(data).encode('utf-8')
+        wire.append(
+            f"POST {base_path}{path} HTTP/1.1\r\n"
+            f"Host: {host_header}\r\n"
+            "Content-Type: application/json\r\n"
+            "Connection: keep-alive\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body
+        )
+    wire = b"".join(wire)
+
+    started = time.perf_counter()
+    for attempt in range(2):
+        timings = [_new_timing(path) for path, _ in requests]
+        results = [{} for _ in requests]
+        if deadline is not None and deadline.expired():
+            for timing in timings:
+                timing["error"] = "deadline"
+            return list(zip(results, timings))
+        conn = _checkout(key, _time_left(timeout, deadline))
+        reused = conn.sock is not None
+        if not reused:
+            try:
+                conn.connect()
+            except OSError:
+                conn.close()
+                for timing in timings:
+                    timing.update(error="connect", total_ms=_ms(time.perf_counter() - started))
+                return list(zip(results, timings))
+            timings[0]["connect_ms"] = _ms(time.perf_counter() - started)
+        for i, timing in enumerate(timings):
+            timing["reused"] = reused or i > 0
+
+        error = None
+        try:
+            done, will_close = _pipeline_once(conn, wire, timings, results, started, timeout, deadline)
+        except (OSError, HTTPException, ValueError) as e:
+            error = e
+            will_close = True
+            done = sum(1 for timing in timings if timing["status"])
+
+        if error is not None and reused and done == 0 and attempt == 0:
+            # Idle pooled connection was closed by the server - retry fresh
+            conn.close()
+            continue
+
+        for timing in timings[done:]:
+            timing["error"] = _classify_error(error, deadline) if error is not None else "protocol"
+            timing["total_ms"] = _ms(time.perf_counter() - started)
+
+        if will_close or done < len(requests):
+            conn.close()
+        else:
+            _checkin(key, conn)
+        return list(zip(results, timings))
+
+    return []
+
+
+def _batch_supported(base_url: str) -> bool:
+    """Whether /memory/batch should be tried against base_url."""
+    if BATCH_MODE != "auto":
+        return BATCH_MODE == "batch"
+    known = read_json(BATCH_CAPABILITY_FILE, {}).get(base_url)
+    if not known:
+        return True
+    return known.get("supported", True) or time.time() - known.get("checked_at", 0) > BATCH_CAPABILITY_TTL
+
+
+def _remember_batch_support(base_url: str, supported: bool):
+    """Record whether base_url implements /memory/batch."""
+    capabilities = read_json(BATCH_CAPABILITY_FILE, {})
+    if capabilities.get(base_url, {}).get("supported") == supported:
+        return
+    capabilities[base_url] = {"supported": supported, "checked_at": time.time()}
+    write_json_atomic(BATCH_CAPABILITY_FILE, capabilities)
+
+
+class MemoryBatch:
+    """
+    Queue of memory operations sent together in one round trip.
+
+    Request:  POST /memory/batch
+              {"operations": [{"op": "context", "payload": {...}}, ...]}
+    Response: {"results": [{"status": 200, "body": {...}}, ...]}
+
+    Results come back in the order operations were added. If the server
+    has no /memory/batch endpoint the operations are pipelined to their
+    individual endpoints instead, which is still a single round trip.
+    After flush(), statuses holds each operation's HTTP status - None for
+    anything the server did not answer (refused, circuit open, timed out,
+    deadline hit before sending) - so callers can tell a rejected operation
+    from one worth retrying (see transient()).
+    """
+
+    def __init__(self, base_url: str = MEMORY_API_URL):
+        self.base_url = base_url.rstrip("/")
+        self.operations = []
+        self.timing = None
+        self.statuses = []
+
+    def add(self, op: str, payload: dict) -> int:
+        """Queue an operation. Returns its index in the flush() results."""
+        if op not in BATCH_OPERATIONS:
+            raise ValueError(f"Unknown memory operation: {op}")
+        self.operations.append({"op": op, "payload": payload})
+        return len(self.operations) - 1
+
+    def __len__(self) -> int:
+        return len(self.operations)
+
+    def flush(self, timeout: float = 5, deadline: Deadline = None) -> list:
+        """
+        Send every queued operation and clear the queue.
+        Returns one result dict per operation ({} for failed operations,
+        including any abandoned at the deadline).
+        """
+        operations, self.operations = self.operations, []
+        self.statuses = [None] * len(operations)
+        if not operations:
+            return []
+
+        if _batch_supported(self.base_url):
+            result, timing = request_json(
+                f"{self.base_url}/memory/batch",
+                {"operations": operations},
+                timeout,
+                deadline=deadline
+            )
+            self.timing = timing
+            if timing["status"] in (404, 405):
+                _remember_batch_support(self.base_url, False)
+            elif timing["error"] is None:
+                if BATCH_MODE == "auto":
+                    _remember_batch_support(self.base_url, True)
+                entries = result.get("results", [])[:len(operations)]
+                for i, entry in enumerate(entries):
+                    if isinstance(entry, dict):
+                        self.statuses[i] = entry.get("status", 200)
+                return self._unpack(result, len(operations))
+            else:
+                # Server unreachable or timed out - don't retry another way
+                return [{} for _ in operations]
+
+        responses = pipeline(
+            self.base_url,
+            [(BATCH_OPERATIONS[op["op"]], op["payload"]) for op in operations],
+            timeout,
+            deadline=deadline
+        )
+        self.timing = responses[0][1] if responses else None
+        self.statuses = [timing["status"] or None for _, timing in responses]
+        return [result for result, _ in responses]
+
+    @staticmethod
+    def _unpack(result: dict, count: int) -> list:
+        """Turn a /memory/batch response into one result dict per operation."""
+        results = []
+        for entry in result.get("results", [])[:count]:
+            ok = isinstance(entry, dict) and entry.get("status", 200) < 400
+            results.append(entry.get("body", {}) if ok else {})
+        results.extend({} for _ in range(count - len(results)))
+        return results
+
+
+def transient(status) -> bool:
+    """Whether an operation with this HTTP status (None/0: not answered) may succeed if retried."""
+    return not status or status == 429 or status >= 500
+
+
+def close_connections():
+    """Close every idle pooled connection."""
+    with _idle_lock:
+        idle = [conn for conns in _idle.values() for conn in conns]
+        _idle.clear()
+    for conn in idle:
+        conn.close()
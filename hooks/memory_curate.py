@@ -5,7 +5,8 @@ Hooks: SessionEnd, PreCompact
 
 Triggers memory curation when a session ends or before compaction.
 Fire-and-forget approach - user sees immediate feedback,
-curation happens in background.
+curation happens in background. If the memory server is down the
+checkpoint is written to the local spool and replayed once it is back.
 
 NOTE: Uses only Python standard library (no external dependencies)
 """
@@ -13,58 +14,28 @@ NOTE: Uses only Python standard library (no external dependencies)
 import sys
 import json
 import os
-from pathlib import Path
-from urllib.request import urlopen, Request
-from urllib.error import URLError, HTTPError
-from socket import timeout as SocketTimeout
+
+import hook_metrics
+from hook_budget import Deadline, hook_deadline
+from memory_client import request_json
+from memory_spool import spool
+from project_resolver import get_project_id
 
 # Configuration  
 MEMORY_API_URL = os.getenv("MEMORY_API_URL", "http://localhost:8765")
-DEFAULT_PROJECT_ID = os.getenv("MEMORY_PROJECT_ID", "default")
 TRIGGER_TIMEOUT = 5  # Just enough to send the request
 
 
-def http_post_fire_and_forget(url: str, data: dict, timeout: int = 2) -> bool:
+def http_post_fire_and_forget(url: str, data: dict, timeout: int = 2, deadline: Deadline = None) -> bool:
     """
     Make HTTP POST request - fire and forget style.
     Returns True if request was sent (even if timed out waiting for response).
     Returns False only if connection failed.
     """
-    try:
-        json_data = json.dumps(data).encode('utf-8')
-        request = Request(
-            url,
-            data=json_data,
-            headers={'Content-Type': 'application/json'},
-            method='POST'
-        )
-        with urlopen(request, timeout=timeout) as response:
-            return True
-    except (SocketTimeout, TimeoutError):
-        # Timeout means request was sent, server is processing
-        return True
-    except (URLError, HTTPError):
-        # Connection failed - server not running
-        return False
-    except Exception:
-        return False
-
-
-def get_project_id(cwd: str) -> str:
-    """Determine project ID from working directory."""
-    path = Path(cwd)
-    
-    for parent in [path] + list(path.parents):
-        config_file = parent / ".memory-project.json"
-        if config_file.exists():
-            try:
-                with open(config_file) as f:
-                    config = json.load(f)
-                    return config.get("project_id", DEFAULT_PROJECT_ID)
-            except:
-                pass
-    
-    return path.name or DEFAULT_PROJECT_ID
+    _, timing = request_json(url, data, timeout, deadline=deadline)
+    # Timeout means request was sent, server is processing;
+    # "connect" and "http" mean the server is not running or refused it
+    return timing["sent"] and timing["error"] in (None, "timeout", "deadline", "decode")
 
 
 def get_trigger_type(input_data: dict) -> str:
@@ -74,44 +45,60 @@ def get_trigger_type(input_data: dict) -> str:
     return "session_end"
 
 
-def trigger_curation_async(session_id: str, project_id: str, trigger: str, cwd: str) -> bool:
+def trigger_curation_async(session_id: str, project_id: str, trigger: str, cwd: str,
+                           deadline: Deadline = None) -> bool:
     """Trigger curation - fire and forget style."""
     return http_post_fire_and_forget(
         f"{MEMORY_API_URL}/memory/checkpoint",
-        {
-            "session_id": session_id,
-            "project_id": project_id,
-            "trigger": trigger,
-            "claude_session_id": session_id,
-            "cwd": cwd
-        },
-        timeout=2  # Just enough to send, not wait for completion
+        checkpoint_payload(session_id, project_id, trigger, cwd),
+        timeout=2,  # Just enough to send, not wait for completion
+        deadline=deadline
     )
 
 
+def checkpoint_payload(session_id: str, project_id: str, trigger: str, cwd: str) -> dict:
+    """Build the /memory/checkpoint request body."""
+    return {
+        "session_id": session_id,
+        "project_id": project_id,
+        "trigger": trigger,
+        "claude_session_id": session_id,
+        "cwd": cwd
+    }
+
+
 def main():
     """Main hook entry point."""
     if os.getenv("MEMORY_CURATOR_ACTIVE") == "1":
         return
     
+    metrics = hook_metrics.start("memory_curate")
     try:
-        input_data = json.load(sys.stdin)
+        with metrics.phase("stdin_parse"):
+            input_data = json.load(sys.stdin)
         session_id = input_data.get("session_id", "unknown")
         cwd = input_data.get("cwd", os.getcwd())
-        project_id = get_project_id(cwd)
+        with metrics.phase("project_resolution"):
+            project_id = get_project_id(cwd)
         trigger = get_trigger_type(input_data)
+        deadline = hook_deadline("PreCompact" if trigger == "pre_compact" else "SessionEnd")
         
         print("🧠 Curating memories...", file=sys.stderr)
         
-        success = trigger_curation_async(session_id, project_id, trigger, cwd)
+        success = trigger_curation_async(session_id, project_id, trigger, cwd, deadline=deadline)
         
         if success:
             print("✨ Memory curation started", file=sys.stderr)
+        elif spool("checkpoint", checkpoint_payload(session_id, project_id, trigger, cwd)):
+            print("📥 Memory system not available - checkpoint spooled for replay", file=sys.stderr)
         else:
             print("⚠️ Memory system not available", file=sys.stderr)
             
     except Exception as e:
+        metrics.fail(e)
         print(f"Hook error: {e}", file=sys.stderr)
+    finally:
+        metrics.finish()
 
 
 if __name__ == "__main__":
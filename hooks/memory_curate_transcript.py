@@ -6,6 +6,14 @@ Hook: PreCompact
 Uses the new /memory/curate-transcript endpoint that reads the JSONL
 transcript file directly, rather than resuming a Claude session.
 
+By default curation is submitted as a server-side job so compaction doesn't
+wait for it; the outcome is reported the next time the hook runs (see
+curation_jobs.py). Only the part of the transcript added since the last
+successful curation is sent (see transcript_watermark.py), as a compact
+digest sidecar without bulky tool output (see transcript_digest.py). A very
+long range is curated as overlapping windows in parallel (see
+curation_windows.py).
+
 This is the transcript-based approach - we read the conversation from
 the transcript file and use Claude Agent SDK to curate memories.
 
@@ -15,34 +23,25 @@ NOTE: Uses only Python standard library (no external dependencies)
 import sys
 import json
 import os
-from pathlib import Path
-from urllib.request import urlopen, Request
-from urllib.error import URLError, HTTPError
-import socket
+
+import curation_jobs
+import curation_windows
+import hook_metrics
+import session_dedup
+import transcript_digest
+import transcript_watermark
+from background_task import run_in_background
+from hook_budget import Deadline, hook_deadline
+from memory_client import request_json
+from project_resolver import get_project_id
 
 # Configuration
 MEMORY_API_URL = os.getenv("MEMORY_API_URL", "http://localhost:8765")
-DEFAULT_PROJECT_ID = os.getenv("MEMORY_PROJECT_ID", "default")
 CURATION_METHOD = os.getenv("MEMORY_CURATION_METHOD", "sdk")  # sdk or cli
-
-
-def get_project_id(cwd: str) -> str:
-    """Determine project ID from working directory."""
-    path = Path(cwd)
-    
-    # Look for .memory-project.json in current or parent directories
-    for parent in [path] + list(path.parents):
-        config_file = parent / ".memory-project.json"
-        if config_file.exists():
-            try:
-                with open(config_file) as f:
-                    config = json.load(f)
-                    return config.get("project_id", DEFAULT_PROJECT_ID)
-            except:
-                pass
-    
-    # Default to directory name
-    return path.name or DEFAULT_PROJECT_ID
+# Submit curation as a server-side job instead of waiting for it
+ASYNC_CURATION = os.getenv("MEMORY_CURATION_ASYNC", "1") != "0"
+SUBMIT_TIMEOUT = 10  # Job mode: the server only has to queue the job
+CURATION_TIMEOUT = 120  # Servers without job mode curate before answering
 
 
 def expand_transcript_path(transcript_path: str) -> str:
@@ -52,7 +51,89 @@ def expand_transcript_path(transcript_path: str) -> str:
     return transcript_path
 
 
-def trigger_transcript_curation(transcript_path: str, session_id: str, project_id: str, trigger: str):
+def predigest(full_path: str, start: int, end: int):
+    """
+    Write the digest sidecar for transcript bytes [start, end).
+    Returns its stats with "path", or None to send the raw transcript.
+    """
+    if not transcript_digest.DIGEST_ENABLED:
+        return None
+    sidecar = transcript_digest.sidecar_path(full_path, start)
+    try:
+        transcript_digest.sweep_sidecars(full_path)
+        with hook_metrics.phase("predigest"):
+            stats = transcript_digest.digest(full_path, start, end, sidecar)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Transcript digest failed ({e}) - sending the raw transcript", file=sys.stderr)
+        return None
+    print(f"🗜️ Transcript digest: {transcript_digest.summary(stats)}", file=sys.stderr)
+    stats["path"] = sidecar
+    return stats
+
+
+def report_curated(result: dict, project_id: str):
+    """Print the outcome of a finished curation."""
+    memories_count = result.get("memories_curated", 0)
+    summary = result.get("session_summary", "")
+
+    if memories_count > 0:
+        print(f"✨ Curated {memories_count} memories", file=sys.stderr)
+        if summary:
+            print(f"📝 {summary[:100]}...", file=sys.stderr)
+        # Pull the new memories into the local mirror
+        run_in_background("memory_sync", "sync", project_id)
+    else:
+        print("📭 No memories to curate", file=sys.stderr)
+
+
+def plan_windows(payload: dict) -> list:
+    """Windows of the range to curate when it is long enough to split, else []."""
+    path = payload["transcript_path"]
+    start = payload["start_offset"]
+    end = payload["end_offset"]
+    try:
+        if end is None:
+            end = os.path.getsize(path)
+        if not curation_windows.wanted(end - start):
+            return []
+        with hook_metrics.phase("split_windows"):
+            windows = curation_windows.split(path, start, end)
+    except OSError:
+        return []
+    return windows if len(windows) > 1 else []
+
+
+def curate_windows(payload: dict, windows: list, transcript: dict, deadline: Deadline = None) -> bool:
+    """Curate a long range as concurrent windows (see curation_windows.py)."""
+    size_kb = (windows[-1][1] - windows[0][0]) // 1024
+    project_id = payload["project_id"]
+    if ASYNC_CURATION:
+        job_id = curation_windows.new_job_id()
+        curation_jobs.record(job_id, project_id, payload["session_id"], payload["trigger"], transcript,
+                             local=True)
+        if run_in_background("curation_windows", "run", job_id, payload, windows):
+            transcript_watermark.advance(transcript["path"], transcript["end"])
+            print(f"📨 Curating {len(windows)} windows ({size_kb} KB) as job {job_id}", file=sys.stderr)
+            return True
+        curation_jobs.forget(job_id)
+
+    print(f"🪟 Curating {len(windows)} windows ({size_kb} KB), "
+          f"{curation_windows.WORKERS} at a time", file=sys.stderr)
+    with hook_metrics.phase("curate_windows"):
+        outcome = curation_windows.curate(payload, windows, deadline)
+    if not outcome["success"]:
+        print(f"⚠️ Curation failed: {outcome['error']}", file=sys.stderr)
+        return False
+    transcript_watermark.advance(transcript["path"], transcript["end"])
+    if outcome["duplicates"]:
+        print(f"🔁 Merged the windows, dropping {outcome['duplicates']} duplicate memories",
+              file=sys.stderr)
+    report_curated(outcome, project_id)
+    return True
+
+
+def trigger_transcript_curation(transcript_path: str, session_id: str, project_id: str, trigger: str,
+                                deadline: Deadline = None):
     """
     Call the new /memory/curate-transcript endpoint.
     
@@ -68,50 +149,81 @@ def trigger_transcript_curation(transcript_path: str, session_id: str, project_i
             print(f"⚠️ Transcript file not found: {full_path}", file=sys.stderr)
             return False
         
-        # Prepare request
-        json_data = json.dumps({
+        # Only the part added since the last successful curation
+        start, end = transcript_watermark.pending_range(full_path)
+        if start >= end:
+            print("📭 Nothing new in the transcript since the last curation", file=sys.stderr)
+            return True
+        if start > 0:
+            print(f"➕ Curating {(end - start) // 1024} KB added since the last curation", file=sys.stderr)
+
+        payload = {
             "transcript_path": full_path,
             "project_id": project_id,
             "session_id": session_id,
             "trigger": trigger,
-            "curation_method": CURATION_METHOD
-        }).encode('utf-8')
-        
-        request = Request(
+            "curation_method": CURATION_METHOD,
+            "start_offset": start,  # Byte range; servers that ignore it curate it all
+            "end_offset": end
+        }
+
+        # Send a compact digest of the range instead of the raw transcript
+        sidecar = predigest(full_path, start, end)
+        if sidecar is not None:
+            if not sidecar["lines_out"]:
+                print("📭 Nothing to curate in the new part of the transcript", file=sys.stderr)
+                transcript_watermark.advance(full_path, end)
+                return True
+            payload.update(transcript_path=sidecar["path"], source_transcript_path=full_path,
+                           start_offset=0, end_offset=None)
+
+        # A very long range is curated as concurrent windows
+        windows = plan_windows(payload)
+        if windows:
+            return curate_windows(payload, windows, {"path": full_path, "start": start, "end": end}, deadline)
+
+        if ASYNC_CURATION:
+            payload["async"] = True  # Servers without job mode ignore it
+        # Only a server known to queue jobs answers quickly; the others curate
+        # synchronously, which can take minutes
+        queues_jobs = ASYNC_CURATION and curation_jobs.job_mode(MEMORY_API_URL) is True
+        result, timing = request_json(
             f"{MEMORY_API_URL}/memory/curate-transcript",
-            data=json_data,
-            headers={'Content-Type': 'application/json'},
-            method='POST'
+            payload,
+            timeout=SUBMIT_TIMEOUT if queues_jobs else CURATION_TIMEOUT,
+            deadline=deadline
         )
-        
-        with urlopen(request, timeout=120) as response:  # Curation can take time
-            result = json.loads(response.read().decode('utf-8'))
-        
-        if response.status == 200:
-            memories_count = result.get("memories_curated", 0)
-            summary = result.get("session_summary", "")
-            
-            if memories_count > 0:
-                print(f"✨ Curated {memories_count} memories", file=sys.stderr)
-                if summary:
-                    print(f"📝 {summary[:100]}...", file=sys.stderr)
-            else:
-                print("📭 No memories to curate", file=sys.stderr)
-            
-            return True
-        else:
-            print(f"⚠️ Curation failed: {response.status}", file=sys.stderr)
-            return False
-            
-    except socket.timeout:
-        print("⏳ Curation in progress (timed out waiting)", file=sys.stderr)
-        return True  # Request was sent
-    except URLError as e:
-        if isinstance(e.reason, socket.timeout):
+
+        if timing["sent"] and timing["error"] in ("timeout", "deadline"):
             print("⏳ Curation in progress (timed out waiting)", file=sys.stderr)
             return True  # Request was sent
-        print("⚠️ Memory server not running", file=sys.stderr)
-        return False
+        if timing["error"] == "circuit_open":
+            print("⚠️ Memory server unavailable (recent failures) - skipping curation", file=sys.stderr)
+            return False
+        if not timing["sent"]:
+            print("⚠️ Memory server not running", file=sys.stderr)
+            return False
+        if timing["status"] not in (200, 202):
+            print(f"⚠️ Curation failed: {timing['status'] or timing['error']}", file=sys.stderr)
+            return False
+
+        if ASYNC_CURATION:
+            curation_jobs.remember_job_mode(MEMORY_API_URL, bool(result.get("job_id")))
+
+        # Accepted - the next curation starts where this one ends (a job that
+        # fails later rewinds it)
+        transcript_watermark.advance(full_path, end)
+
+        if result.get("job_id"):
+            # Job mode - the outcome is reported the next time this hook runs
+            curation_jobs.record(result["job_id"], project_id, session_id, trigger,
+                                 {"path": full_path, "start": start, "end": end})
+            print(f"📨 Curation queued as job {result['job_id']}", file=sys.stderr)
+            return True
+
+        report_curated(result, project_id)
+        return True
+
     except Exception as e:
         print(f"❌ Error: {e}", file=sys.stderr)
         return False
@@ -123,9 +235,11 @@ def main():
     if os.getenv("MEMORY_CURATOR_ACTIVE") == "1":
         return
     
+    metrics = hook_metrics.start("memory_curate_transcript")
     try:
         # Read hook input from stdin
-        input_data = json.load(sys.stdin)
+        with metrics.phase("stdin_parse"):
+            input_data = json.load(sys.stdin)
         
         # Extract data from hook input
         session_id = input_data.get("session_id", "unknown")
@@ -133,10 +247,20 @@ def main():
         cwd = input_data.get("cwd", os.getcwd())
         trigger = input_data.get("trigger", "pre_compact")
         hook_event = input_data.get("hook_event_name", "PreCompact")
+
+        # Compaction drops the memories injected so far from the context
+        if hook_event == "PreCompact":
+            session_dedup.reset(session_id)
         
         # Determine project ID
-        project_id = get_project_id(cwd)
+        with metrics.phase("project_resolution"):
+            project_id = get_project_id(cwd)
         
+        # How did the curation jobs submitted last time go?
+        with metrics.phase("previous_jobs"):
+            for line in curation_jobs.report_previous(project_id, Deadline(curation_jobs.STATUS_TIMEOUT)):
+                print(line, file=sys.stderr)
+
         # Validate we have a transcript path
         if not transcript_path:
             print("⚠️ No transcript path in hook input", file=sys.stderr)
@@ -149,16 +273,21 @@ def main():
             transcript_path=transcript_path,
             session_id=session_id,
             project_id=project_id,
-            trigger="pre_compact" if hook_event == "PreCompact" else "session_end"
+            trigger="pre_compact" if hook_event == "PreCompact" else "session_end",
+            deadline=hook_deadline(hook_event)
         )
         
         if not success:
             print("⚠️ Memory curation unavailable", file=sys.stderr)
             
-    except json.JSONDecodeError:
+    except json.JSONDecodeError as e:
+        metrics.fail(e)
         print("❌ Invalid JSON input", file=sys.stderr)
     except Exception as e:
+        metrics.fail(e)
         print(f"❌ Hook error: {e}", file=sys.stderr)
+    finally:
+        metrics.finish()
 
 
 if __name__ == "__main__":
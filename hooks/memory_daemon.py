@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Memory Hook Daemon for Claude Code
+
+Long-lived local process that runs the memory hooks on behalf of the
+per-event hook scripts. The interpreter, imported hook modules and
+keep-alive connections to MEMORY_API_URL stay warm between prompts, so a
+hook invocation costs one Unix-socket round trip instead of a cold start
+plus fresh TCP connections.
+
+The hook scripts stay the entry points configured in settings.json. They
+forward their stdin JSON here via memory_daemon_client.forward_to_daemon()
+and fall back to running in-process when the daemon is not running.
+
+Usage:
+    python3 ~/.claude/hooks/memory_daemon.py start    # detach into background
+    python3 ~/.claude/hooks/memory_daemon.py run      # run in foreground
+    python3 ~/.claude/hooks/memory_daemon.py status
+    python3 ~/.claude/hooks/memory_daemon.py stop
+
+Restart the daemon after editing hook scripts - it keeps the modules it
+imported at startup.
+
+Protocol (one request per connection, client half-closes after sending):
+    request:  {"hook": "memory_inject", "input": "<raw stdin JSON>"}
+              {"command": "ping" | "shutdown"}
+    reply:    {"status": "ok", "stdout": "..."}
+
+NOTE: Uses only Python standard library (no external dependencies)
+"""
+
+import argparse
+import importlib
+import json
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import background_task
+import hook_metrics
+import memory_spool
+from memory_daemon_client import SOCKET_PATH, daemon_request
+
+# Hooks the daemon can run. Each module exposes run_hook(input_data) -> str,
+# returning what the standalone script would print to stdout.
+HOOK_MODULES = {
+    "memory_inject": "memory_inject",
+    "memory_session_start": "memory_session_start",
+}
+
+PID_PATH = os.getenv("MEMORY_DAEMON_PID", SOCKET_PATH + ".pid")
+START_WAIT_SECONDS = 5
+SPOOL_REPLAY_SECONDS = float(os.getenv("MEMORY_SPOOL_REPLAY_SECONDS", "60"))
+
+
+class HookDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threaded Unix-socket server holding the warm hook modules."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str):
+        self.hooks = {}
+        self.hooks_lock = threading.Lock()
+        self.started_at = time.time()
+        self.requests_served = 0
+        super().__init__(socket_path, HookRequestHandler)
+
+    def get_hook(self, name: str):
+        """Return the run_hook callable for a hook, importing it on first use."""
+        if name not in HOOK_MODULES:
+            return None
+        with self.hooks_lock:
+            if name not in self.hooks:
+                module = importlib.import_module(HOOK_MODULES[name])
+                self.hooks[name] = module.run_hook
+            return self.hooks[name]
+
+
+class HookRequestHandler(socketserver.StreamRequestHandler):
+    """Handle one hook request per connection."""
+
+    def handle(self):
+        try:
+            message = json.loads(self.rfile.read().decode('utf-8'))
+            reply = self.dispatch(message)
+        except Exception as e:
+            reply = {"status": "error", "error": str(e), "stdout": ""}
+        self.wfile.write(json.dumps(reply).encode('utf-8'))
+
+    def dispatch(self, message: dict) -> dict:
+        command = message.get("command")
+        if command == "ping":
+            return {
+                "status": "ok",
+                "pid": os.getpid(),
+                "uptime_seconds": round(time.time() - self.server.started_at, 1),
+                "requests_served": self.server.requests_served,
+                "hooks_loaded": sorted(self.server.hooks),
+            }
+        if command == "shutdown":
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return {"status": "ok"}
+
+        run_hook = self.server.get_hook(message.get("hook", ""))
+        if run_hook is None:
+            return {"status": "unknown_hook", "stdout": ""}
+
+        metrics = hook_metrics.start(message["hook"], source="daemon")
+        stdout = ""
+        try:
+            with metrics.phase("stdin_parse"):
+                input_data = json.loads(message.get("input") or "{}")
+            with self.server.hooks_lock:
+                self.server.requests_served += 1
+            stdout = run_hook(input_data) or ""
+        except Exception as e:
+            metrics.fail(e)
+            raise
+        finally:
+            metrics.finish(stdout)
+        return {"status": "ok", "stdout": stdout}
+
+
+def remove_stale_socket() -> bool:
+    """
+    Remove a leftover socket file from a daemon that died.
+    Returns False if a live daemon is answering on it.
+    """
+    if not os.path.exists(SOCKET_PATH):
+        return True
+    try:
+        daemon_request({"command": "ping"}, timeout=1)
+        return False
+    except (OSError, ValueError):
+        os.unlink(SOCKET_PATH)
+        return True
+
+
+def replay_spool_periodically(stop_event: threading.Event):
+    """Drain the write spool every SPOOL_REPLAY_SECONDS while the daemon runs."""
+    while not stop_event.wait(SPOOL_REPLAY_SECONDS):
+        try:
+            memory_spool.seal_current()
+            if memory_spool.has_pending():
+                memory_spool.replay()
+        except Exception:
+            pass
+
+
+def run_server():
+    """Run the daemon in the foreground until shutdown."""
+    socket_dir = Path(SOCKET_PATH).parent
+    socket_dir.mkdir(parents=True, exist_ok=True)
+    os.chmod(socket_dir, 0o700)
+
+    if not remove_stale_socket():
+        print(f"Daemon already running on {SOCKET_PATH}", file=sys.stderr)
+        sys.exit(1)
+
+    # Off-critical-path work runs on threads here instead of subprocesses
+    background_task.use_threads()
+
+    server = HookDaemon(SOCKET_PATH)
+    os.chmod(SOCKET_PATH, 0o600)
+    with open(PID_PATH, 'w') as f:
+        f.write(str(os.getpid()))
+
+    stop_replay = threading.Event()
+    threading.Thread(target=replay_spool_periodically, args=(stop_replay,), daemon=True).start()
+
+    try:
+        server.serve_forever()
+    finally:
+        stop_replay.set()
+        memory_spool.seal_current()
+        server.server_close()
+        for path in (SOCKET_PATH, PID_PATH):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+def start_background():
+    """Spawn a detached daemon and wait until it answers."""
+    if not remove_stale_socket():
+        print(f"Daemon already running on {SOCKET_PATH}")
+        return
+
+    subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "run"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+    deadline = time.time() + START_WAIT_SECONDS
+    while time.time() < deadline:
+        try:
+            info = daemon_request({"command": "ping"}, timeout=1)
+            print(f"Daemon started (pid {info.get('pid')}) on {SOCKET_PATH}")
+            return
+        except (OSError, ValueError):
+            time.sleep(0.05)
+
+    print("Daemon did not come up in time", file=sys.stderr)
+    sys.exit(1)
+
+
+def stop():
+    """Ask a running daemon to shut down."""
+    try:
+        daemon_request({"command": "shutdown"}, timeout=2)
+        print("Daemon stopped")
+    except (OSError, ValueError):
+        print("Daemon not running")
+
+
+def status():
+    """Print daemon status."""
+    try:
+        info = daemon_request({"command": "ping"}, timeout=2)
+    except (OSError, ValueError):
+        print("Daemon not running")
+        sys.exit(1)
+    print(json.dumps(info, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory hook daemon")
+    parser.add_argument("action", choices=["start", "run", "stop", "status"])
+    args = parser.parse_args()
+
+    if not hasattr(socket, "AF_UNIX"):
+        print("Unix sockets are not available on this platform", file=sys.stderr)
+        sys.exit(1)
+
+    if args.action == "run":
+        run_server()
+    elif args.action == "start":
+        start_background()
+    elif args.action == "stop":
+        stop()
+    else:
+        status()
+
+
+if __name__ == "__main__":
+    main()
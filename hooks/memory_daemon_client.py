@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Thin client for the memory hook daemon (memory_daemon.py)
+
+Hook scripts call forward_to_daemon() first. If the daemon is running, the
+raw stdin JSON is handed to it over a Unix socket and its output is
+returned; the hook process never imports the HTTP stack or touches the
+memory server itself. If the daemon is not running, None is returned and
+the hook falls back to its normal in-process path.
+
+Deliberately imports nothing beyond json/os/socket so the thin path stays
+as close to bare interpreter startup as possible.
+
+NOTE: Uses only Python standard library (no external dependencies)
+"""
+
+import json
+import os
+import socket
+
+# Configuration
+SOCKET_PATH = os.getenv(
+    "MEMORY_DAEMON_SOCKET",
+    os.path.join(os.path.expanduser("~"), ".claude", "run", "memory-daemon.sock")
+)
+CONNECT_TIMEOUT = 0.1  # Local socket - anything slower means the daemon is wedged
+REPLY_TIMEOUT = float(os.getenv("MEMORY_DAEMON_TIMEOUT", "10"))
+
+
+def connect_daemon() -> socket.socket:
+    """Open a connection to the daemon socket. Raises OSError if unreachable."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(SOCKET_PATH)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def daemon_request(message: dict, timeout: float = REPLY_TIMEOUT, sock: socket.socket = None) -> dict:
+    """
+    Send one JSON message to the daemon and return its JSON reply.
+
+    Raises OSError if the daemon cannot be reached and ValueError if the
+    reply is not valid JSON.
+    """
+    if sock is None:
+        sock = connect_daemon()
+    try:
+        sock.settimeout(timeout)
+        sock.sendall(json.dumps(message).encode('utf-8') + b"\n")
+        sock.shutdown(socket.SHUT_WR)
+
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        sock.close()
+
+    return json.loads(b"".join(chunks).decode('utf-8'))
+
+
+def forward_to_daemon(hook: str, raw_input: str):
+    """
+    Run a hook inside the daemon.
+
+    Returns the hook's stdout text, or None if the daemon is unavailable
+    and the caller should run the hook in-process. Once the daemon has
+    accepted the request, failures return "" rather than None so the work
+    (e.g. message tracking) is never done twice.
+    """
+    if os.getenv("MEMORY_DAEMON_DISABLE") == "1":
+        return None
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(SOCKET_PATH):
+        return None
+
+    try:
+        sock = connect_daemon()
+    except OSError:
+        # Not running, stale socket file, or wedged - run in-process
+        return None
+
+    try:
+        reply = daemon_request({"hook": hook, "input": raw_input}, sock=sock)
+    except (OSError, ValueError):
+        return ""
+
+    if reply.get("status") == "unknown_hook":
+        return None
+    return reply.get("stdout", "")
@@ -13,7 +13,16 @@ The hook receives JSON on stdin:
     "cwd": "/current/working/directory"
 }
 
-Output to stdout is PREPENDED to the user's message.
+Output to stdout is PREPENDED to the user's message, so it is held to a
+token budget (see token_budget.py) and memories already injected earlier
+in the session are not sent again (see session_dedup.py). The first prompt
+may be answered from context prefetched at SessionStart (see
+context_warmup.py). When the server gives nothing, or with
+MEMORY_LOCAL_INDEX=primary, memories come from the local BM25 index (see
+local_index.py).
+
+If the memory hook daemon (memory_daemon.py) is running, this script only
+forwards stdin to it; otherwise the hook runs in-process.
 
 NOTE: Uses only Python standard library (no external dependencies)
 """
@@ -21,82 +30,162 @@ NOTE: Uses only Python standard library (no external dependencies)
 import sys
 import json
 import os
-from pathlib import Path
-from urllib.request import urlopen, Request
-from urllib.error import URLError, HTTPError
+
+import hook_metrics
+from hook_budget import Deadline, hook_deadline
+from memory_daemon_client import forward_to_daemon
+
+# The in-process machinery (caches, local index, tracking, resolver) is
+# imported inside the functions that use it: when the daemon is running
+# the hook only forwards stdin, and shouldn't pay for importing it.
 
 # Configuration
 MEMORY_API_URL = os.getenv("MEMORY_API_URL", "http://localhost:8765")
-DEFAULT_PROJECT_ID = os.getenv("MEMORY_PROJECT_ID", "default")
-TIMEOUT_SECONDS = 5  # Don't block user for too long
+TIMEOUT_SECONDS = 5  # Cap per request; the UserPromptSubmit budget usually wins
 
 
-def http_post(url: str, data: dict, timeout: int = 5) -> dict:
-    """Make HTTP POST request using only standard library."""
-    try:
-        json_data = json.dumps(data).encode('utf-8')
-        request = Request(
-            url,
-            data=json_data,
-            headers={'Content-Type': 'application/json'},
-            method='POST'
-        )
-        with urlopen(request, timeout=timeout) as response:
-            return json.loads(response.read().decode('utf-8'))
-    except (URLError, HTTPError, TimeoutError, json.JSONDecodeError):
-        return {}
-
-
-def get_project_id(cwd: str) -> str:
+def http_post(url: str, data: dict, timeout: int = 5, deadline: Deadline = None) -> dict:
     """
-    Determine project ID from working directory.
-    Looks for .memory-project.json in cwd or parents.
+    Make HTTP POST request over the shared keep-alive client.
+    Imported lazily so the daemon fast path never loads the HTTP stack.
     """
-    path = Path(cwd)
-    
-    # Walk up directory tree looking for config
-    for parent in [path] + list(path.parents):
-        config_file = parent / ".memory-project.json"
-        if config_file.exists():
-            try:
-                with open(config_file) as f:
-                    config = json.load(f)
-                    return config.get("project_id", DEFAULT_PROJECT_ID)
-            except:
-                pass
-    
-    # Fallback: use directory name as project ID
-    return path.name or DEFAULT_PROJECT_ID
-
-
-def get_memory_context(session_id: str, project_id: str, message: str) -> str:
-    """Query memory system for relevant context."""
+    from memory_client import http_post as client_post
+    return client_post(url, data, timeout, deadline=deadline)
+
+
+def context_request(session_id: str, project_id: str, message: str, max_memories: int) -> dict:
+    """Build the /memory/context payload for a prompt."""
+    import token_budget
+    request = {
+        "session_id": session_id,
+        "project_id": project_id,
+        "current_message": message,
+        "max_memories": max_memories
+    }
+    if token_budget.TOKEN_BUDGET > 0:
+        # Servers that understand it can trim server-side; others ignore it
+        request["max_tokens"] = token_budget.TOKEN_BUDGET
+    return request
+
+
+def get_memory_context(session_id: str, project_id: str, message: str,
+                       deadline: Deadline = None) -> str:
+    """
+    Query memory system for relevant context and cache the response.
+    With a deadline, the request is abandoned when it runs out.
+    Returns the untrimmed context text.
+    """
+    import context_cache
+    import local_index
+    import token_budget
+    from background_task import run_in_background
+    max_memories = token_budget.memories_for_budget(project_id)
     result = http_post(
         f"{MEMORY_API_URL}/memory/context",
-        {
-            "session_id": session_id,
-            "project_id": project_id,
-            "current_message": message,
-            "max_memories": 5
-        },
-        timeout=TIMEOUT_SECONDS
+        context_request(session_id, project_id, message, max_memories),
+        timeout=TIMEOUT_SECONDS,
+        deadline=deadline
     )
-    return result.get("context_text", "")
+    context_text = result.get("context_text", "")
+    if context_text and is_memory_list(result):
+        context_cache.put(project_id, message, max_memories, context_text)
+        token_budget.observe(project_id, context_text)
+        if local_index.INDEX_MODE != "off" and local_index.has_new(project_id, context_text):
+            run_in_background("local_index", "seed_from_context", project_id, context_text)
+    return context_text
+
+
+def is_memory_list(result: dict) -> bool:
+    """
+    Whether a /memory/context response is retrieved memories. The primer
+    (and anything else that isn't a memory list) is specific to the session
+    that asked, so it must not be cached for other sessions or mirrored.
+    """
+    return isinstance(result.get("memories"), list) and not result.get("is_primer")
 
 
 def track_message(session_id: str, project_id: str):
     """
     Track that a message was sent in this session.
     This increments the message counter so the primer only shows once.
+    Handed to the background sender - the prompt never waits for it.
     """
-    http_post(
-        f"{MEMORY_API_URL}/memory/process",
-        {
-            "session_id": session_id,
-            "project_id": project_id
-        },
-        timeout=2
-    )
+    import memory_tracker
+    memory_tracker.record(session_id, project_id)
+
+
+def run_hook(input_data: dict) -> str:
+    """
+    Run the hook for one prompt and return the context to prepend.
+    Called in-process by main() or warm by the hook daemon.
+    """
+    import context_cache
+    import context_warmup
+    import local_index
+    import token_budget
+    from background_task import run_in_background
+    from project_resolver import get_project_id
+
+    # One latency budget for the whole prompt path
+    deadline = hook_deadline("UserPromptSubmit")
+
+    session_id = input_data.get("session_id", "unknown")
+    prompt = input_data.get("prompt", "")
+    cwd = input_data.get("cwd", os.getcwd())
+
+    # Get project ID from directory
+    with hook_metrics.phase("project_resolution"):
+        project_id = get_project_id(cwd)
+
+    # Track that this message happened (increments counter)
+    # This ensures primer only shows on first message
+    track_message(session_id, project_id)
+
+    max_memories = token_budget.memories_for_budget(project_id)
+
+    # Primary local index: answer in-process, refresh from the server behind
+    if local_index.INDEX_MODE == "primary":
+        with hook_metrics.phase("local_index"):
+            local = local_index.query_context(project_id, prompt, max_memories)
+        if local:
+            if local_index.claim_refresh(project_id):
+                run_in_background("memory_inject", "get_memory_context", session_id, project_id, prompt)
+            return prepare_context(session_id, local)
+
+    # First prompt of the session: use the context prefetched at SessionStart
+    # if the prompt is about what was predicted
+    with hook_metrics.phase("warmup"):
+        warm = context_warmup.take(session_id, project_id, prompt)
+    if warm is not None:
+        return prepare_context(session_id, warm)
+
+    # Serve repeats and near-repeats from the local cache. A stale entry is
+    # returned right away and refreshed in the background.
+    with hook_metrics.phase("context_cache"):
+        cached = context_cache.get(project_id, prompt, max_memories)
+    if cached is not None:
+        if cached["stale"] and context_cache.claim_refresh(project_id, prompt, max_memories):
+            run_in_background("memory_inject", "get_memory_context", session_id, project_id, prompt)
+        context_text = cached["context_text"]
+    else:
+        # Query memory system for context
+        context_text = get_memory_context(session_id, project_id, prompt, deadline=deadline)
+        if not context_text and local_index.INDEX_MODE == "fallback":
+            # Server down, slow or empty-handed - use the local mirror
+            with hook_metrics.phase("local_index"):
+                context_text = local_index.query_context(project_id, prompt, max_memories)
+
+    return prepare_context(session_id, context_text)
+
+
+def prepare_context(session_id: str, context_text: str) -> str:
+    """Drop memories this session already has, then fit the token budget."""
+    import session_dedup
+    import token_budget
+    offered = session_dedup.filter_seen(session_id, context_text)
+    shown = token_budget.fit(offered)
+    session_dedup.remember(session_id, offered, shown)
+    return shown
 
 
 def main():
@@ -106,31 +195,29 @@ def main():
     if os.getenv("MEMORY_CURATOR_ACTIVE") == "1":
         return
     
+    metrics = hook_metrics.start("memory_inject")
+    context = ""
     try:
         # Read input from stdin
-        input_data = json.load(sys.stdin)
-        
-        session_id = input_data.get("session_id", "unknown")
-        prompt = input_data.get("prompt", "")
-        cwd = input_data.get("cwd", os.getcwd())
-        
-        # Get project ID from directory
-        project_id = get_project_id(cwd)
-        
-        # Query memory system for context
-        context = get_memory_context(session_id, project_id, prompt)
-        
-        # Track that this message happened (increments counter)
-        # This ensures primer only shows on first message
-        track_message(session_id, project_id)
+        with metrics.phase("stdin_read"):
+            raw_input = sys.stdin.read()
+
+        # Hand off to the warm daemon if it is running
+        with metrics.phase("daemon_forward"):
+            context = forward_to_daemon("memory_inject", raw_input)
+        if context is None:
+            with metrics.phase("stdin_parse"):
+                input_data = json.loads(raw_input)
+            context = run_hook(input_data)
         
         # Output context to stdout (will be prepended to message)
         if context:
             print(context)
             
-    except Exception:
+    except Exception as e:
         # Never crash - just output nothing
-        pass
+        metrics.fail(e)
+    metrics.finish(context)
 
 
 if __name__ == "__main__":
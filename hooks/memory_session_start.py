@@ -10,6 +10,8 @@ what we were working on, project status.
 Also loads key documentation:
 - Global docs (always): CLAUDE_CAPABILITIES.md (skills, hooks, commands inventory)
 - Project docs (when in project): SESSION_HANDOFF.md, ROADMAP.md, APP_MAP.md
+Long docs are digested to their most relevant sections within a token
+budget (MEMORY_SESSION_DOC_TOKENS).
 
 Note: SESSION_HANDOFF.md is auto-generated by SessionEnd hook.
       Content from SESSION_KICKOFF.md has been consolidated into ROADMAP.md.
@@ -18,21 +20,30 @@ The hook receives JSON on stdin:
 {
     "session_id": "...",
     "cwd": "/current/working/directory",
-    "source": "startup" | "resume" | "clear"
+    "source": "startup" | "resume" | "clear" | "compact"
 }
 
 Output to stdout is injected as context for the session.
 
+If the memory hook daemon (memory_daemon.py) is running, this script only
+forwards stdin to it; otherwise the hook runs in-process.
+
 NOTE: Uses only Python standard library (no external dependencies)
 """
 
 import sys
 import json
 import os
+import re
 from pathlib import Path
-from typing import Optional
-from urllib.request import urlopen, Request
-from urllib.error import URLError, HTTPError
+
+import hook_metrics
+from hook_budget import Deadline, hook_deadline
+from memory_daemon_client import forward_to_daemon
+
+# The in-process machinery (doc cache, local index, spool, tracking,
+# resolver) is imported inside the functions that use it: when the daemon
+# is running the hook only forwards stdin, and shouldn't pay for importing it.
 
 # Documentation configuration
 CLAUDE_HOME = Path.home() / ".claude"
@@ -52,87 +63,47 @@ PROJECT_DOCS = [
     ("APP_MAP.md", "App Architecture", 200),
 ]
 
+# Token budget shared by all docs in proportion to their line limits; each
+# doc is digested to whole sections within its share (see doc_digest.py).
+# 0 falls back to cutting docs at their line limits.
+DOC_TOKEN_BUDGET = int(os.getenv("MEMORY_SESSION_DOC_TOKENS", "7000"))
+
 # Configuration
 MEMORY_API_URL = os.getenv("MEMORY_API_URL", "http://localhost:8765")
-DEFAULT_PROJECT_ID = os.getenv("MEMORY_PROJECT_ID", "default")
 TIMEOUT_SECONDS = 5
+REGISTER_TIMEOUT = 2
+PRIMER_CACHE_ENABLED = os.getenv("MEMORY_PRIMER_CACHE", "1") != "0"
 
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9_.-]")
 
-def http_post(url: str, data: dict, timeout: int = 5) -> dict:
-    """Make HTTP POST request using only standard library."""
-    try:
-        json_data = json.dumps(data).encode('utf-8')
-        request = Request(
-            url,
-            data=json_data,
-            headers={'Content-Type': 'application/json'},
-            method='POST'
-        )
-        with urlopen(request, timeout=timeout) as response:
-            return json.loads(response.read().decode('utf-8'))
-    except (URLError, HTTPError, TimeoutError, json.JSONDecodeError):
-        return {}
-
-
-def get_project_id(cwd: str) -> str:
-    """
-    Determine project ID from working directory.
-    Looks for .memory-project.json in cwd or parents.
-    """
-    path = Path(cwd)
-
-    for parent in [path] + list(path.parents):
-        config_file = parent / ".memory-project.json"
-        if config_file.exists():
-            try:
-                with open(config_file) as f:
-                    config = json.load(f)
-                    return config.get("project_id", DEFAULT_PROJECT_ID)
-            except:
-                pass
-
-    return path.name or DEFAULT_PROJECT_ID
 
-
-def find_project_root(cwd: str) -> Optional[Path]:
+def http_post(url: str, data: dict, timeout: int = 5, deadline: Deadline = None) -> dict:
     """
-    Find project root by looking for CLAUDE.md or .git directory.
-    Returns None if not in a project.
+    Make HTTP POST request over the shared keep-alive client.
+    Imported lazily so the daemon fast path never loads the HTTP stack.
     """
-    path = Path(cwd)
-
-    for parent in [path] + list(path.parents):
-        # Stop at home directory
-        if parent == Path.home():
-            return None
-        # Look for project markers
-        if (parent / "CLAUDE.md").exists() or (parent / ".git").exists():
-            return parent
-
-    return None
+    from memory_client import http_post as client_post
+    return client_post(url, data, timeout, deadline=deadline)
 
 
 def read_doc_file(file_path: Path, max_lines: int = 100) -> str:
     """
-    Read a documentation file, truncating if needed.
+    Read a documentation file: a digest of whole sections within the doc's
+    share of DOC_TOKEN_BUDGET, or its first max_lines lines with the budget
+    off. Served from the doc cache while the file is unchanged.
     Returns empty string if file doesn't exist.
     """
-    if not file_path.exists():
-        return ""
+    import doc_cache
+    import doc_digest
+    if DOC_TOKEN_BUDGET > 0:
+        return doc_digest.digest(file_path, doc_token_budget(max_lines), max_lines)
+    return doc_cache.read_doc(file_path, max_lines)
 
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
 
-        if len(lines) > max_lines:
-            content = ''.join(lines[:max_lines])
-            content += f"\n... (truncated, {len(lines) - max_lines} more lines)\n"
-        else:
-            content = ''.join(lines)
-
-        return content.strip()
-    except Exception:
-        return ""
+def doc_token_budget(max_lines: int) -> int:
+    """A doc's share of DOC_TOKEN_BUDGET, weighted by its line limit."""
+    total_lines = sum(doc[2] for doc in GLOBAL_DOCS + PROJECT_DOCS)
+    return DOC_TOKEN_BUDGET * max_lines // total_lines
 
 
 def load_global_docs() -> str:
@@ -165,7 +136,7 @@ def load_project_docs(project_root: Path) -> str:
     return ""
 
 
-def get_session_primer(session_id: str, project_id: str) -> str:
+def get_session_primer(session_id: str, project_id: str, deadline: Deadline = None) -> str:
     """
     Get session primer from memory system.
     
@@ -173,83 +144,185 @@ def get_session_primer(session_id: str, project_id: str) -> str:
     - When we last spoke
     - What happened in previous session
     - Current project status
+
+    The last primer of each project is kept locally with its validator, so
+    an unchanged primer costs an empty 304 instead of the full text.
     """
-    result = http_post(
+    request = {
+        "session_id": session_id,
+        "project_id": project_id,
+        "current_message": "",  # Empty to get just primer
+        "max_memories": 0  # No memories, just primer
+    }
+    if not PRIMER_CACHE_ENABLED:
+        result = http_post(f"{MEMORY_API_URL}/memory/context", request,
+                           timeout=TIMEOUT_SECONDS, deadline=deadline)
+        return result.get("context_text", "")
+
+    from hook_state import state_path
+    from memory_client import conditional_request
+    result, _ = conditional_request(
         f"{MEMORY_API_URL}/memory/context",
-        {
-            "session_id": session_id,
-            "project_id": project_id,
-            "current_message": "",  # Empty to get just primer
-            "max_memories": 0  # No memories, just primer
-        },
-        timeout=TIMEOUT_SECONDS
+        request,
+        state_path("primer_cache", f"{_SAFE_NAME.sub('_', project_id)}.json"),
+        timeout=TIMEOUT_SECONDS,
+        deadline=deadline
     )
     return result.get("context_text", "")
 
 
-def register_session(session_id: str, project_id: str):
+def register_session(session_id: str, project_id: str, deadline: Deadline = None):
     """
     Register the session with the memory system.
     This increments the message counter so the inject hook
     knows to retrieve memories instead of the primer.
+    Sent right away, not coalesced: the first prompt's context request must
+    not overtake it. If it isn't sent (server down, circuit open, budget
+    spent), times out or gets a 5xx, it goes to the background sender
+    instead (which retries and spools); an extra increment after a timeout
+    the server did act on is cheaper than a lost one.
     """
-    http_post(
+    import memory_tracker
+    from memory_client import request_json
+    metadata = {"event": "session_start"}
+    _, timing = request_json(
         f"{MEMORY_API_URL}/memory/process",
-        {
-            "session_id": session_id,
-            "project_id": project_id,
-            "metadata": {"event": "session_start"}
-        },
-        timeout=2
+        {"session_id": session_id, "project_id": project_id, "metadata": metadata},
+        REGISTER_TIMEOUT,
+        deadline=deadline
     )
+    if (not timing["sent"] or timing["error"] in ("timeout", "deadline")
+            or timing["status"] >= 500):
+        memory_tracker.record(session_id, project_id, metadata)
 
 
-def main():
-    """Main hook entry point."""
-    # Skip if this is being called from the memory curator subprocess
-    if os.getenv("MEMORY_CURATOR_ACTIVE") == "1":
-        return
-
+def fan_out(*calls) -> list:
+    """
+    Run independent calls (no arguments) concurrently and return their
+    results in call order. The last call runs on this thread; a call that
+    raises yields "".
+    """
+    import threading
+    results = [""] * len(calls)
+    run = hook_metrics.current()
+
+    def worker(i):
+        hook_metrics.attach(run)
+        try:
+            results[i] = calls[i]()
+        except Exception:
+            pass
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(len(calls) - 1)]
+    for thread in threads:
+        thread.start()
     try:
-        # Read input from stdin
-        input_data = json.load(sys.stdin)
-
-        session_id = input_data.get("session_id", "unknown")
-        cwd = input_data.get("cwd", os.getcwd())
-        source = input_data.get("source", "startup")
+        results[-1] = calls[-1]()
+    except Exception:
+        pass
+    for thread in threads:
+        thread.join()
+    return results
 
-        # Collect all context sections
-        context_parts = []
 
-        # 1. Get session primer from memory system
+def run_hook(input_data: dict) -> str:
+    """
+    Build the session context for one SessionStart event.
+    Called in-process by main() or warm by the hook daemon.
+    """
+    import context_warmup
+    import local_index
+    import memory_spool
+    import session_dedup
+    from background_task import run_in_background
+    from project_resolver import get_project_id, find_project_root
+
+    # One latency budget for everything on the session start path
+    deadline = hook_deadline("SessionStart")
+
+    session_id = input_data.get("session_id", "unknown")
+    cwd = input_data.get("cwd", os.getcwd())
+    source = input_data.get("source", "startup")
+
+    # The conversation was cleared or compacted - memories injected so far
+    # are no longer in context
+    if source in ("clear", "compact"):
+        session_dedup.reset(session_id)
+
+    with hook_metrics.phase("project_resolution"):
         project_id = get_project_id(cwd)
-        primer = get_session_primer(session_id, project_id)
-        if primer:
-            context_parts.append(primer)
 
+    def primer_phase():
+        # 1. Session primer from the memory system (network bound)
+        return get_session_primer(session_id, project_id, deadline=deadline)
+
+    def global_docs_phase():
+        # 2. Global documentation (always)
+        with hook_metrics.phase("global_docs"):
+            return load_global_docs()
+
+    def project_phase():
         # Register session so inject hook knows to get memories, not primer
-        register_session(session_id, project_id)
+        register_session(session_id, project_id, deadline=deadline)
 
-        # 2. Load global documentation (always)
-        global_docs = load_global_docs()
-        if global_docs:
-            context_parts.append(global_docs)
+        # Deliver writes spooled while the server was down
+        if memory_spool.has_pending():
+            run_in_background("memory_spool", "replay")
 
-        # 3. Load project documentation (if in a project)
+        # Bring the local memory mirror up to date with what changed since last time
+        if local_index.INDEX_MODE != "off":
+            run_in_background("memory_sync", "sync", project_id)
+
+        # 3. Project documentation (if in a project)
         project_root = find_project_root(cwd)
-        if project_root:
-            project_docs = load_project_docs(project_root)
-            if project_docs:
-                context_parts.append(project_docs)
+
+        # Prefetch context for the likely first prompt while the session starts
+        context_warmup.start(session_id, project_id, str(project_root) if project_root else "")
+
+        if not project_root:
+            return ""
+        with hook_metrics.phase("project_docs"):
+            return load_project_docs(project_root)
+
+    # The phases don't depend on each other, so startup takes as long as the
+    # slowest of them; the sections keep their order in the output
+    context_parts = [part for part in fan_out(primer_phase, global_docs_phase, project_phase) if part]
+
+    if not context_parts:
+        return ""
+    output = "\n\n---\n\n".join(context_parts)
+    return f"# Session Context\n\n{output}"
+
+
+def main():
+    """Main hook entry point."""
+    # Skip if this is being called from the memory curator subprocess
+    if os.getenv("MEMORY_CURATOR_ACTIVE") == "1":
+        return
+
+    metrics = hook_metrics.start("memory_session_start")
+    output = ""
+    try:
+        # Read input from stdin
+        with metrics.phase("stdin_read"):
+            raw_input = sys.stdin.read()
+
+        # Hand off to the warm daemon if it is running
+        with metrics.phase("daemon_forward"):
+            output = forward_to_daemon("memory_session_start", raw_input)
+        if output is None:
+            with metrics.phase("stdin_parse"):
+                input_data = json.loads(raw_input)
+            output = run_hook(input_data)
 
         # Output combined context to stdout
-        if context_parts:
-            output = "\n\n---\n\n".join(context_parts)
-            print(f"# Session Context\n\n{output}")
+        if output:
+            print(output)
 
-    except Exception:
+    except Exception as e:
         # Never crash
-        pass
+        metrics.fail(e)
+    metrics.finish(output)
 
 
 if __name__ == "__main__":
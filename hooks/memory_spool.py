@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Write-ahead spool for memory writes that could not be delivered
+
+When the memory server is unreachable, /memory/process (message tracking)
+and /memory/checkpoint (curation triggers) writes are appended here instead
+of being lost, and replayed in bulk once the server is back.
+
+Layout (~/.claude/memory-hooks/spool/):
+    segment-<time>-<pid>.open.jsonl   being written by a live process
+    segment-<time>-<pid>.jsonl        sealed, ready for replay
+
+Each line is {"op": "process" | "checkpoint", "payload": {...}, "spooled_at": ts}.
+Writers fsync in batches (every FSYNC_BATCH records or FSYNC_INTERVAL
+seconds, and when the segment is sealed) rather than once per record.
+Segments are sealed on rotation and at process exit; an .open segment whose
+writer has died is sealed by the next replay.
+
+Replay sends sealed segments to /memory/batch in chunks of REPLAY_BATCH
+operations, coalescing message-count increments first, and stops as soon
+as the server is unreachable. Records the server rejects (4xx) would never
+go through, so they are moved to dead-letter.jsonl instead of blocking the
+segments behind them. Replay runs from the CLI, as a daemon task, or in
+the background at session start.
+
+Usage:
+    python3 ~/.claude/hooks/memory_spool.py status
+    python3 ~/.claude/hooks/memory_spool.py replay
+
+NOTE: Uses only Python standard library (no external dependencies)
+"""
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+
+from hook_state import state_path
+
+# Configuration
+MEMORY_API_URL = os.getenv("MEMORY_API_URL", "http://localhost:8765")
+SPOOL_DIR = state_path("spool")
+SPOOLED_OPERATIONS = ("process", "checkpoint")
+FSYNC_BATCH = 32
+FSYNC_INTERVAL = 1.0
+SEGMENT_MAX_BYTES = 1024 * 1024
+REPLAY_BATCH = 100
+REPLAY_TIMEOUT = 10
+REPLAY_LOCK = SPOOL_DIR / "replay.lock"
+DEAD_LETTER_FILE = SPOOL_DIR / "dead-letter.jsonl"
+REPLAY_LOCK_STALE_SECONDS = 300
+
+
+class SpoolWriter:
+    """Appends records to this process's open segment with batched fsync."""
+
+    def __init__(self, spool_dir=SPOOL_DIR):
+        self.spool_dir = spool_dir
+        self.lock = threading.Lock()
+        self.file = None
+        self.path = None
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def append(self, op: str, payload: dict):
+        line = json.dumps({"op": op, "payload": payload, "spooled_at": time.time()}) + "\n"
+        with self.lock:
+            if self.file is None:
+                self._open_segment()
+            self.file.write(line)
+            self.file.flush()
+            self.unsynced += 1
+            if self.unsynced >= FSYNC_BATCH or time.monotonic() - self.last_sync >= FSYNC_INTERVAL:
+                self._sync()
+            if self.file.tell() >= SEGMENT_MAX_BYTES:
+                self._seal()
+
+    def seal(self):
+        """fsync and seal the open segment so replay can pick it up."""
+        with self.lock:
+            self._seal()
+
+    def _open_segment(self):
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        name = f"segment-{time.time():.6f}-{os.getpid()}.open.jsonl"
+        self.path = self.spool_dir / name
+        self.file = open(self.path, 'a', encoding='utf-8')
+
+    def _sync(self):
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def _seal(self):
+        if self.file is None:
+            return
+        self._sync()
+        self.file.close()
+        os.replace(self.path, sealed_name(self.path))
+        self.file = None
+        self.path = None
+
+
+def sealed_name(path):
+    """segment-X.open.jsonl -> segment-X.jsonl"""
+    return path.with_name(path.name.replace(".open.jsonl", ".jsonl"))
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def spool(op: str, payload: dict) -> bool:
+    """Append one undelivered write to the spool. Returns False on failure."""
+    global _writer
+    if op not in SPOOLED_OPERATIONS:
+        return False
+    try:
+        with _writer_lock:
+            if _writer is None:
+                _writer = SpoolWriter()
+                atexit.register(_writer.seal)
+        _writer.append(op, payload)
+        return True
+    except OSError:
+        return False
+
+
+def seal_current():
+    """Seal this process's open segment (used by the daemon before replay)."""
+    if _writer is not None:
+        try:
+            _writer.seal()
+        except OSError:
+            pass
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+
+
+def sealed_segments() -> list:
+    """Sealed segments oldest first, sealing orphaned open ones on the way."""
+    try:
+        names = os.listdir(SPOOL_DIR)
+    except OSError:
+        return []
+
+    for name in names:
+        if not name.endswith(".open.jsonl"):
+            continue
+        try:
+            pid = int(name[:-len(".open.jsonl")].rsplit("-", 1)[1])
+        except (IndexError, ValueError):
+            continue
+        if pid != os.getpid() and not _pid_alive(pid):
+            try:
+                os.replace(SPOOL_DIR / name, sealed_name(SPOOL_DIR / name))
+            except OSError:
+                pass
+
+    return sorted(
+        SPOOL_DIR / name for name in os.listdir(SPOOL_DIR)
+        if name.startswith("segment-") and name.endswith(".jsonl") and not name.endswith(".open.jsonl")
+    )
+
+
+def has_pending() -> bool:
+    """Cheap check for anything to replay (sealed or open segments)."""
+    try:
+        return any(name.startswith("segment-") for name in os.listdir(SPOOL_DIR))
+    except OSError:
+        return False
+
+
+def _read_segment(path) -> list:
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Torn final line from a crash
+            if record.get("op") in SPOOLED_OPERATIONS:
+                records.append(record)
+    return records
+
+
+def _acquire_replay_lock() -> bool:
+    try:
+        SPOOL_DIR.mkdir(parents=True, exist_ok=True)
+        fd = os.open(REPLAY_LOCK, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        os.close(fd)
+        return True
+    except FileExistsError:
+        try:
+            if time.time() - os.stat(REPLAY_LOCK).st_mtime < REPLAY_LOCK_STALE_SECONDS:
+                return False
+            os.utime(REPLAY_LOCK)
+            return True
+        except OSError:
+            return False
+    except OSError:
+        return False
+
+
+def _send_records(records: list) -> tuple:
+    """
+    Send records in bulk batches.
+    Returns (undelivered records, rejected records).
+    """
+    from memory_client import MemoryBatch, transient
+    from memory_tracker import coalesce, coalesce_key
+
+    # One operation per coalesced increment or checkpoint, with its records
+    groups = {}
+    for record in records:
+        if record["op"] == "process":
+            groups.setdefault(coalesce_key(record["payload"]), []).append(record)
+    operations = [("process", coalesce([r["payload"] for r in group])[0], group) for group in groups.values()]
+    operations += [("checkpoint", r["payload"], [r]) for r in records if r["op"] == "checkpoint"]
+
+    undelivered = []
+    rejected = []
+    for start in range(0, len(operations), REPLAY_BATCH):
+        chunk = operations[start:start + REPLAY_BATCH]
+        batch = MemoryBatch(MEMORY_API_URL)
+        for op, payload, _ in chunk:
+            batch.add(op, payload)
+        batch.flush(timeout=REPLAY_TIMEOUT)
+        failed = 0
+        for (_, _, group), status in zip(chunk, batch.statuses):
+            if status is not None and 200 <= status < 300:
+                continue
+            if transient(status):
+                undelivered += group
+                failed += 1
+            else:
+                rejected += [dict(record, status=status) for record in group]
+        if failed == len(chunk):
+            # Server still down - keep the rest for the next replay
+            for _, _, group in operations[start + REPLAY_BATCH:]:
+                undelivered += group
+            break
+
+    return undelivered, rejected
+
+
+def _dead_letter(records: list):
+    """Keep rejected records for inspection; they are never replayed."""
+    with open(DEAD_LETTER_FILE, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(dict(record, rejected_at=time.time())) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def replay() -> dict:
+    """
+    Drain sealed segments into the memory server.
+    Returns {"sent": n, "rejected": n, "remaining": n, "segments": n}
+    (counts of records).
+    """
+    stats = {"sent": 0, "rejected": 0, "remaining": 0, "segments": 0}
+    if not _acquire_replay_lock():
+        return stats
+
+    try:
+        for path in sealed_segments():
+            try:
+                records = _read_segment(path)
+            except OSError:
+                continue
+            stats["segments"] += 1
+            undelivered, rejected = _send_records(records) if records else ([], [])
+            if rejected:
+                _dead_letter(rejected)
+            stats["sent"] += len(records) - len(undelivered) - len(rejected)
+            stats["rejected"] += len(rejected)
+            stats["remaining"] += len(undelivered)
+
+            if not undelivered:
+                os.unlink(path)
+                continue
+
+            # Rewrite what is left in place (keeps segment order) and stop
+            tmp_path = path.with_name(f".{path.name}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for record in undelivered:
+                    f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+            break
+    finally:
+        try:
+            os.unlink(REPLAY_LOCK)
+        except OSError:
+            pass
+
+    return stats
+
+
+def status() -> dict:
+    """Count spooled records by operation."""
+    counts = {"segments": 0, "process": 0, "checkpoint": 0, "dead_letter": 0}
+    try:
+        names = sorted(os.listdir(SPOOL_DIR))
+    except OSError:
+        return counts
+    try:
+        with open(DEAD_LETTER_FILE, 'rb') as f:
+            counts["dead_letter"] = sum(1 for _ in f)
+    except OSError:
+        pass
+    for name in names:
+        if not name.startswith("segment-"):
+            continue
+        counts["segments"] += 1
+        try:
+            for record in _read_segment(SPOOL_DIR / name):
+                counts[record["op"]] += 1
+        except OSError:
+            pass
+    return counts
+
+
+def main():
+    import argparse  # Only the CLI needs it; keep hook imports light
+
+    parser = argparse.ArgumentParser(description="Memory write spool")
+    parser.add_argument("action", choices=["status", "replay"])
+    args = parser.parse_args()
+
+    if args.action == "status":
+        print(json.dumps(status(), indent=2))
+    else:
+        stats = replay()
+        print(json.dumps(stats, indent=2))
+        if stats["remaining"]:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
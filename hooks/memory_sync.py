@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Delta sync of project memories into the local mirror
+
+Keeps the local BM25 mirror (local_index.py) current without downloading
+every memory each session. The server is asked only for what changed
+since the cursor stored for the project:
+
+    POST /memory/changes  {"project_id": ..., "cursor": "..." | null, "limit": 500}
+    ->  {"changes": [{"id", "content", "updated_at", "deleted"}, ...],
+         "cursor": "...", "has_more": bool}
+
+Changes are applied page by page and the cursor is saved after each page,
+so an interrupted sync resumes where it stopped. The project's mirror lock
+(see local_index.acquire_lock) is held for the whole sync, so only one
+sync per project runs and nothing else writes the mirror meanwhile. Cost scales with churn,
+not with the number of memories. Cursors live in
+~/.claude/memory-hooks/sync_cursors.json.
+
+Runs in the background after SessionStart and after a transcript curation
+that produced memories. Servers without /memory/changes are remembered
+and re-probed hourly.
+
+Usage:
+    python3 ~/.claude/hooks/memory_sync.py <project_id>
+    python3 ~/.claude/hooks/memory_sync.py <project_id> --full   # forget the cursor
+
+NOTE: Uses only Python standard library (no external dependencies)
+"""
+
+import json
+import os
+import sys
+import time
+
+import local_index
+from hook_state import state_path, read_json, write_json_atomic
+
+# Configuration
+MEMORY_API_URL = os.getenv("MEMORY_API_URL", "http://localhost:8765")
+SYNC_ENABLED = os.getenv("MEMORY_SYNC", "1") != "0"
+PAGE_SIZE = 500
+MAX_PAGES = 20          # Per run; the next trigger continues from the cursor
+REQUEST_TIMEOUT = 10
+UNSUPPORTED_RECHECK_SECONDS = 3600
+
+CURSOR_FILE = state_path("sync_cursors.json")
+
+
+def _server_supported(cursors: dict) -> bool:
+    unsupported_at = cursors.get("_unsupported", {}).get(MEMORY_API_URL)
+    return not unsupported_at or time.time() - unsupported_at > UNSUPPORTED_RECHECK_SECONDS
+
+
+def _save_state(update):
+    """Read-modify-write the cursor file (update is a function of the dict)."""
+    cursors = read_json(CURSOR_FILE, {})
+    update(cursors)
+    write_json_atomic(CURSOR_FILE, cursors)
+
+
+def apply_changes(project_id: str, changes: list) -> tuple:
+    """
+    Apply one page of changes to the mirror (the caller holds the project's
+    lock). Returns (upserted, deleted).
+    """
+    memories = {}
+    deleted = []
+    seeded = []
+    for change in changes:
+        memory_id = change.get("id")
+        if not memory_id:
+            continue
+        content = change.get("content") or ""
+        if change.get("deleted") or not content:
+            deleted.append(memory_id)
+            continue
+        memories[memory_id] = content
+        # Drop the copy seeded from a context response under its text hash
+        seeded.append(local_index.memory_id(content))
+    local_index.update(project_id, memories, deleted + seeded, locked=True)
+    return len(memories), len(deleted)
+
+
+def sync(project_id: str, full: bool = False) -> dict:
+    """
+    Pull changes since the stored cursor into the local mirror.
+    Returns {"status", "upserted", "deleted", "pages", "cursor"}.
+    """
+    from memory_client import request_json
+
+    stats = {"status": "ok", "upserted": 0, "deleted": 0, "pages": 0, "cursor": None}
+    if not SYNC_ENABLED or local_index.INDEX_MODE == "off":
+        stats["status"] = "disabled"
+        return stats
+
+    cursors = read_json(CURSOR_FILE, {})
+    if not _server_supported(cursors):
+        stats["status"] = "unsupported"
+        return stats
+
+    lock = local_index.acquire_lock(project_id)
+    if lock is None:
+        stats["status"] = "busy"
+        return stats
+
+    try:
+        cursor = None if full else cursors.get(project_id, {}).get("cursor")
+        for _ in range(MAX_PAGES):
+            result, timing = request_json(
+                f"{MEMORY_API_URL}/memory/changes",
+                {"project_id": project_id, "cursor": cursor, "limit": PAGE_SIZE},
+                REQUEST_TIMEOUT
+            )
+            if timing["status"] in (404, 405):
+                _save_state(lambda c: c.setdefault("_unsupported", {}).__setitem__(MEMORY_API_URL, time.time()))
+                stats["status"] = "unsupported"
+                break
+            if timing["error"] is not None:
+                stats["status"] = timing["error"]
+                break
+
+            upserted, deleted = apply_changes(project_id, result.get("changes", []))
+            stats["upserted"] += upserted
+            stats["deleted"] += deleted
+            stats["pages"] += 1
+            cursor = result.get("cursor", cursor)
+            saved = {"cursor": cursor, "synced_at": time.time()}
+            _save_state(lambda c: c.__setitem__(project_id, saved))
+            os.utime(lock)
+
+            if not result.get("has_more"):
+                break
+        stats["cursor"] = cursor
+    finally:
+        local_index.release_lock(lock)
+    return stats
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if len(args) != 1:
+        print("Usage: memory_sync.py <project_id> [--full]", file=sys.stderr)
+        sys.exit(1)
+    stats = sync(args[0], full="--full" in sys.argv)
+    print(json.dumps(stats, indent=2))
+    if stats["status"] not in ("ok", "disabled"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Background sender for message tracking
+
+track_message (UserPromptSubmit) only bumps the server-side message
+counter, so nothing on the prompt path should wait for it. record() hands
+the increment to a background sender and returns immediately.
+(register_session sends its increment directly, so the first prompt's
+context request can't overtake it, and only falls back to record().)
+
+- Inside the hook daemon: increments are held in memory and flushed by a
+  timer thread.
+- In a one-shot hook process: the increment is appended to
+  ~/.claude/memory-hooks/tracking/pending.jsonl and a detached flusher
+  process is started unless one is already running.
+
+The sender waits COALESCE_SECONDS so bursts accumulate, merges all
+increments for the same (session, project, metadata) into one /memory/process
+operation carrying "message_count": n, sends them as one batch, and retries
+with backoff. Servers that ignore message_count still see at least one
+increment, which is all the primer logic needs. Increments that still
+cannot be delivered go to the write-ahead spool (memory_spool.py).
+
+NOTE: Uses only Python standard library (no external dependencies)
+"""
+
+import json
+import os
+import threading
+import time
+
+import background_task
+from hook_state import state_path
+
+# Configuration
+MEMORY_API_URL = os.getenv("MEMORY_API_URL", "http://localhost:8765")
+COALESCE_SECONDS = float(os.getenv("MEMORY_TRACKING_COALESCE_SECONDS", "0.25"))
+SEND_TIMEOUT = 2
+RETRY_DELAYS = (0.5, 1.0, 2.0)  # Seconds before each retry
+LOCK_STALE_SECONDS = 30
+
+TRACKING_DIR = state_path("tracking")
+PENDING_FILE = TRACKING_DIR / "pending.jsonl"
+LOCK_FILE = TRACKING_DIR / "flusher.lock"
+
+# In-daemon queue
+_pending = []
+_pending_lock = threading.Lock()
+_flush_scheduled = False
+
+
+def record(session_id: str, project_id: str, metadata: dict = None):
+    """Queue one message-counter increment without waiting for the server."""
+    increment = {"session_id": session_id, "project_id": project_id}
+    if metadata:
+        increment["metadata"] = metadata
+
+    if background_task.threads_enabled():
+        _record_in_memory(increment)
+    else:
+        _record_to_file(increment)
+
+
+def coalesce_key(increment: dict) -> tuple:
+    """Increments with the same key are merged into one operation."""
+    return (
+        increment.get("session_id"),
+        increment.get("project_id"),
+        json.dumps(increment.get("metadata"), sort_keys=True),
+    )
+
+
+def coalesce(increments: list) -> list:
+    """Merge increments into one /memory/process payload per session/project/metadata."""
+    merged = {}
+    for increment in increments:
+        key = coalesce_key(increment)
+        if key in merged:
+            merged[key]["message_count"] += increment.get("message_count", 1)
+        else:
+            merged[key] = dict(increment, message_count=increment.get("message_count", 1))
+    return list(merged.values())
+
+
+def send(payloads: list) -> list:
+    """
+    Send coalesced /memory/process payloads as one batch, retrying the
+    ones that failed. Payloads that could not be delivered are spooled for
+    replay and returned; ones the server rejected (4xx) are dropped.
+    """
+    from memory_client import MemoryBatch, transient
+    from memory_spool import spool
+
+    for delay in (0,) + RETRY_DELAYS:
+        if not payloads:
+            break
+        time.sleep(delay)
+        batch = MemoryBatch(MEMORY_API_URL)
+        for payload in payloads:
+            batch.add("process", payload)
+        batch.flush(timeout=SEND_TIMEOUT)
+        payloads = [payload for payload, status in zip(payloads, batch.statuses)
+                     if status != 200 and transient(status)]
+    for payload in payloads:
+        spool("process", payload)
+    return payloads
+
+
+# --- In-daemon sender -------------------------------------------------------
+
+def _record_in_memory(increment: dict):
+    global _flush_scheduled
+    with _pending_lock:
+        _pending.append(increment)
+        if _flush_scheduled:
+            return
+        _flush_scheduled = True
+    timer = threading.Timer(COALESCE_SECONDS, _flush_in_memory)
+    timer.daemon = True
+    timer.start()
+
+
+def _flush_in_memory():
+    global _flush_scheduled
+    with _pending_lock:
+        increments = _pending[:]
+        del _pending[:]
+        _flush_scheduled = False
+    try:
+        send(coalesce(increments))
+    except Exception:
+        pass
+
+
+# --- One-shot process sender ------------------------------------------------
+
+def _record_to_file(increment: dict):
+    try:
+        TRACKING_DIR.mkdir(parents=True, exist_ok=True)
+        # A single O_APPEND write of one short line is atomic across processes
+        fd = os.open(PENDING_FILE, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        try:
+            os.write(fd, (json.dumps(increment) + "\n").encode('utf-8'))
+        finally:
+            os.close(fd)
+    except OSError:
+        return
+
+    if not _flusher_running():
+        background_task.run_in_background("memory_tracker", "flush_pending")
+
+
+def _flusher_running() -> bool:
+    try:
+        return time.time() - os.stat(LOCK_FILE).st_mtime < LOCK_STALE_SECONDS
+    except OSError:
+        return False
+
+
+def _acquire_lock() -> bool:
+    try:
+        fd = os.open(LOCK_FILE, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        return True
+    except FileExistsError:
+        if _flusher_running():
+            return False
+        # Previous flusher died - take over its lock
+        try:
+            os.utime(LOCK_FILE)
+            return True
+        except OSError:
+            return False
+    except OSError:
+        return False
+
+
+def _release_lock():
+    try:
+        os.unlink(LOCK_FILE)
+    except OSError:
+        pass
+
+
+def _take_pending() -> list:
+    """
+    Claim everything appended so far by renaming the pending file, plus any
+    in-flight files a crashed flusher left behind. Returns the increments.
+    """
+    try:
+        os.rename(PENDING_FILE, TRACKING_DIR / f"inflight-{os.getpid()}.jsonl")
+        # Let writers that opened the old file just before the rename finish
+        time.sleep(0.05)
+    except OSError:
+        pass
+
+    increments = []
+    for path in sorted(TRACKING_DIR.glob("inflight-*.jsonl")):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        increments.append(json.loads(line))
+                    except ValueError:
+                        pass
+            os.unlink(path)
+        except OSError:
+            pass
+    return increments
+
+
+def flush_pending():
+    """Detached flusher: drain the pending file until it stays empty."""
+    while _acquire_lock():
+        try:
+            time.sleep(COALESCE_SECONDS)  # Let a burst of prompts accumulate
+            while True:
+                increments = _take_pending()
+                if not increments:
+                    break
+                os.utime(LOCK_FILE)
+                send(coalesce(increments))
+        finally:
+            _release_lock()
+
+        # A hook may have appended after our last check but seen the lock
+        if not PENDING_FILE.exists():
+            break
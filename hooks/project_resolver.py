@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Project ID and project root resolution shared by all hooks
+
+Every hook needs to know which project the session is in:
+
+- project ID:   "project_id" from the nearest .memory-project.json in cwd
+                or its parents, else the cwd directory name
+- project root: nearest directory containing CLAUDE.md or .git, stopping
+                at the home directory (None when not in a project)
+
+Walking the parents costs several stat calls per level, which adds up on
+deep monorepo paths and network filesystems. Results are cached per cwd in
+~/.claude/memory-hooks/project_resolver.json together with the mtime of
+every directory the walk looked at (and of any config file it read). A
+marker file appearing or disappearing changes its directory's mtime, so a
+cached answer is reused only while all those mtimes are unchanged - one
+stat per directory instead of three, and no JSON parsing.
+
+NOTE: Uses only Python standard library (no external dependencies)
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from hook_state import state_path, read_json, write_json_atomic
+
+# Configuration
+DEFAULT_PROJECT_ID = os.getenv("MEMORY_PROJECT_ID", "default")
+CACHE_ENABLED = os.getenv("MEMORY_RESOLVER_CACHE", "1") != "0"
+MAX_CACHED_CWDS = 256
+
+PROJECT_CONFIG = ".memory-project.json"
+ROOT_MARKERS = ("CLAUDE.md", ".git")
+
+CACHE_FILE = state_path("project_resolver.json")
+
+# In-process copy so the hook daemon skips re-reading the cache file
+_memory_cache = {}
+_memory_lock = threading.Lock()
+
+
+def _mtime(path) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _read_project_id(config_file: Path) -> Optional[str]:
+    try:
+        with open(config_file) as f:
+            config = json.load(f)
+        return config.get("project_id", DEFAULT_PROJECT_ID)
+    except Exception:
+        return None
+
+
+def resolve_uncached(cwd: str) -> dict:
+    """
+    Walk cwd and its parents once, finding both the project ID and root.
+    Returns the result plus the mtimes needed to validate it later.
+    """
+    path = Path(cwd)
+    home = Path.home()
+    project_id = None
+    project_root = None
+    root_done = False
+    checked = {}
+    config_files = {}
+
+    for parent in [path] + list(path.parents):
+        if project_id is not None and root_done:
+            break
+        checked[str(parent)] = _mtime(parent)
+
+        if project_id is None:
+            candidate = parent / PROJECT_CONFIG
+            if candidate.exists():
+                # Edits don't change the directory mtime, so track the file too
+                config_files[str(candidate)] = _mtime(candidate)
+                project_id = _read_project_id(candidate)
+
+        if not root_done:
+            if parent == home:
+                # Stop at home directory
+                root_done = True
+            elif any((parent / marker).exists() for marker in ROOT_MARKERS):
+                project_root = parent
+                root_done = True
+
+    return {
+        "project_id": project_id or path.name or DEFAULT_PROJECT_ID,
+        "project_root": str(project_root) if project_root else None,
+        "checked": checked,
+        "config_files": config_files,
+    }
+
+
+def _is_valid(entry: dict) -> bool:
+    """Whether nothing the cached walk looked at has changed since."""
+    for paths in (entry.get("config_files", {}), entry.get("checked", {})):
+        for path, mtime in paths.items():
+            if _mtime(path) != mtime:
+                return False
+    return True
+
+
+def resolve(cwd: str) -> dict:
+    """Return {"project_id": str, "project_root": str or None} for cwd."""
+    if not CACHE_ENABLED:
+        return resolve_uncached(cwd)
+
+    with _memory_lock:
+        entry = _memory_cache.get(cwd)
+    if entry is None:
+        entry = read_json(CACHE_FILE, {}).get(cwd)
+    if entry is not None and _is_valid(entry):
+        with _memory_lock:
+            _memory_cache[cwd] = entry
+        return entry
+
+    entry = resolve_uncached(cwd)
+    entry["resolved_at"] = time.time()
+    with _memory_lock:
+        _memory_cache[cwd] = entry
+    _store(cwd, entry)
+    return entry
+
+
+def _store(cwd: str, entry: dict):
+    """Write an entry to the cache file, keeping the newest MAX_CACHED_CWDS."""
+    cache = read_json(CACHE_FILE, {})
+    cache[cwd] = entry
+    if len(cache) > MAX_CACHED_CWDS:
+        newest = sorted(cache.items(), key=lambda item: item[1].get("resolved_at", 0), reverse=True)
+        cache = dict(newest[:MAX_CACHED_CWDS])
+    write_json_atomic(CACHE_FILE, cache)
+
+
+def get_project_id(cwd: str) -> str:
+    """
+    Determine project ID from working directory.
+    Looks for .memory-project.json in cwd or parents.
+    """
+    return resolve(cwd)["project_id"]
+
+
+def find_project_root(cwd: str) -> Optional[Path]:
+    """
+    Find project root by looking for CLAUDE.md or .git directory.
+    Returns None if not in a project.
+    """
+    root = resolve(cwd)["project_root"]
+    return Path(root) if root else None
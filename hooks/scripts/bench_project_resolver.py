@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cold vs warm project resolution
+
+Compares the original per-hook parent walk (get_project_id plus
+find_project_root, each walking from cwd) with project_resolver.py:
+
+- legacy:   both original walks, as the hooks did before the resolver
+- cold:     resolver with its cache cleared before every call
+- warm:     resolver with the on-disk cache (a fresh one-shot hook process)
+- daemon:   resolver with the in-process cache kept (the hook daemon)
+
+Reports mean and p95 time per resolution and stat calls per resolution.
+
+Usage:
+    python3 bench_project_resolver.py                  # synthetic deep tree
+    python3 bench_project_resolver.py --depth 25 -n 2000
+    python3 bench_project_resolver.py --cwd ~/code/monorepo/packages/app/src
+
+NOTE: Uses only Python standard library (no external dependencies)
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+
+def legacy_get_project_id(cwd: str) -> str:
+    """The walk every hook used to copy-paste."""
+    path = Path(cwd)
+    for parent in [path] + list(path.parents):
+        config_file = parent / ".memory-project.json"
+        if config_file.exists():
+            try:
+                with open(config_file) as f:
+                    return json.load(f).get("project_id", "default")
+            except Exception:
+                pass
+    return path.name or "default"
+
+
+def legacy_find_project_root(cwd: str):
+    path = Path(cwd)
+    for parent in [path] + list(path.parents):
+        if parent == Path.home():
+            return None
+        if (parent / "CLAUDE.md").exists() or (parent / ".git").exists():
+            return parent
+    return None
+
+
+def build_tree(base: Path, depth: int) -> str:
+    """Create base/repo/d1/.../dN with project markers at the repo root."""
+    repo = base / "repo"
+    (repo / ".git").mkdir(parents=True)
+    (repo / ".memory-project.json").write_text(json.dumps({"project_id": "bench"}))
+    leaf = repo.joinpath(*[f"d{i}" for i in range(depth)])
+    leaf.mkdir(parents=True)
+    return str(leaf)
+
+
+class StatCounter:
+    """Count os.stat calls (Path.exists goes through os.stat too)."""
+
+    def __init__(self):
+        self.calls = 0
+        self._original = os.stat
+
+    def __enter__(self):
+        def counting_stat(*args, **kwargs):
+            self.calls += 1
+            return self._original(*args, **kwargs)
+        os.stat = counting_stat
+        return self
+
+    def __exit__(self, *exc):
+        os.stat = self._original
+
+
+def measure(label: str, func, iterations: int) -> dict:
+    samples = []
+    with StatCounter() as counter:
+        for _ in range(iterations):
+            started = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    return {
+        "mode": label,
+        "mean_us": round(statistics.mean(samples), 1),
+        "p95_us": round(samples[int(len(samples) * 0.95) - 1], 1),
+        "stats_per_call": round(counter.calls / iterations, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark project resolution")
+    parser.add_argument("--cwd", help="Resolve this directory instead of a synthetic tree")
+    parser.add_argument("--depth", type=int, default=12, help="Synthetic tree depth below the repo root")
+    parser.add_argument("-n", "--iterations", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["MEMORY_HOOKS_STATE_DIR"] = str(Path(tmp) / "state")
+        import project_resolver
+
+        cwd = os.path.abspath(os.path.expanduser(args.cwd)) if args.cwd else build_tree(Path(tmp), args.depth)
+
+        def cold():
+            project_resolver._memory_cache.clear()
+            try:
+                os.unlink(project_resolver.CACHE_FILE)
+            except OSError:
+                pass
+            project_resolver.resolve(cwd)
+
+        def warm():
+            project_resolver._memory_cache.clear()
+            project_resolver.resolve(cwd)
+
+        results = [
+            measure("legacy", lambda: (legacy_get_project_id(cwd), legacy_find_project_root(cwd)), args.iterations),
+            measure("cold", cold, args.iterations),
+        ]
+        project_resolver.resolve(cwd)
+        results.append(measure("warm", warm, args.iterations))
+        results.append(measure("daemon", lambda: project_resolver.resolve(cwd), args.iterations))
+
+        print(f"cwd: {cwd} ({len(Path(cwd).parts)} path components)")
+        print(f"{'mode':<8} {'mean_us':>10} {'p95_us':>10} {'stats/call':>11}")
+        for row in results:
+            print(f"{row['mode']:<8} {row['mean_us']:>10} {row['p95_us']:>10} {row['stats_per_call']:>11}")
+
+
+if __name__ == "__main__":
+    main()
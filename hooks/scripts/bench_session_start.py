@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark: sequential vs concurrent SessionStart phases
+
+memory_session_start.run_hook fans out its independent phases (primer
+request, global docs, project docs) on threads. This runs the hook
+in-process against a stand-in memory server with the given latency, once
+with the phases run one after another (as before) and once fanned out,
+and reports mean / p50 / p95 per mode.
+
+Warmup prefetch and delta sync are turned off so no background processes
+skew the numbers.
+
+Usage:
+    python3 bench_session_start.py                    # 40 ms server latency
+    python3 bench_session_start.py --latency 150 -n 50
+    python3 bench_session_start.py --doc-lines 5000   # bigger docs
+
+NOTE: Uses only Python standard library (no external dependencies)
+"""
+
+import argparse
+import math
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+HOOKS_DIR = SCRIPTS_DIR.parent
+sys.path.insert(0, str(HOOKS_DIR))
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from hook_loadgen import free_port, wait_for_port  # noqa: E402
+
+
+def write_doc(path: Path, title: str, lines: int):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"# {title}\n\n")
+        for i in range(lines):
+            if i % 40 == 0:
+                f.write(f"\n## Section {i // 40}\n\n")
+            f.write(f"- Line {i} of {title}: notes on hooks, caching and session handoff.\n")
+
+
+def percentile(values: list, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential vs concurrent SessionStart phases")
+    parser.add_argument("-n", type=int, default=30, help="Runs per mode")
+    parser.add_argument("--latency", type=float, default=40, help="Stand-in server latency (ms)")
+    parser.add_argument("--doc-lines", type=int, default=1000, help="Lines per generated doc")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="bench-session-start-"))
+    project = workdir / "project"
+    write_doc(project / "SESSION_HANDOFF.md", "Session Handoff", args.doc_lines)
+    write_doc(project / "ROADMAP.md", "Roadmap", args.doc_lines)
+    write_doc(project / "APP_MAP.md", "App Map", args.doc_lines)
+    (project / "CLAUDE.md").write_text("# Bench project\n")
+    claude_home = workdir / "claude-home"
+    write_doc(claude_home / "workflows" / "CLAUDE_CAPABILITIES.md", "Capabilities", args.doc_lines)
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, str(SCRIPTS_DIR / "memory_standin_server.py"), "--port", str(port),
+         "--latency", str(args.latency)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        if not wait_for_port(port):
+            print("Stand-in server did not start", file=sys.stderr)
+            sys.exit(1)
+        os.environ.update({
+            "MEMORY_API_URL": f"http://127.0.0.1:{port}",
+            "MEMORY_HOOKS_STATE_DIR": str(workdir / "state"),
+            "MEMORY_DAEMON_DISABLE": "1",
+            "MEMORY_WARMUP": "0",
+            "MEMORY_LOCAL_INDEX": "off",
+        })
+        import memory_session_start
+        memory_session_start.CLAUDE_HOME = claude_home
+        concurrent_fan_out = memory_session_start.fan_out
+
+        def sequential_fan_out(*calls):
+            return [call() for call in calls]
+
+        modes = {"sequential": sequential_fan_out, "concurrent": concurrent_fan_out}
+        timings = {mode: [] for mode in modes}
+        outputs = {}
+        memory_session_start.run_hook({"session_id": "warm-up", "cwd": str(project)})
+        for i in range(args.n):
+            for mode, fan_out in modes.items():
+                memory_session_start.fan_out = fan_out
+                started = time.perf_counter()
+                outputs[mode] = memory_session_start.run_hook(
+                    {"session_id": f"{mode}-{i}", "cwd": str(project), "source": "startup"})
+                timings[mode].append((time.perf_counter() - started) * 1000)
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"SessionStart, {args.n} runs per mode, server latency {args.latency:g} ms, "
+          f"{args.doc_lines} lines per doc")
+    print(f"{'mode':<12} {'mean':>8} {'p50':>8} {'p95':>8}")
+    for mode, values in timings.items():
+        print(f"{mode:<12} {statistics.mean(values):8.2f} {percentile(values, 50):8.2f} "
+              f"{percentile(values, 95):8.2f}  ms")
+    same = outputs["sequential"].replace("sequential", "") == outputs["concurrent"].replace("concurrent", "")
+    print(f"outputs identical: {'yes' if same else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Load generator: run the real memory hooks for N concurrent synthetic sessions
+
+Each synthetic session runs the hook scripts configured in settings.json,
+one process per event exactly as Claude Code would:
+
+    SessionStart       memory_session_start.py
+    UserPromptSubmit   memory_inject.py          (--prompts per session)
+    PreCompact         memory_curate_transcript.py  (with --precompact)
+    SessionEnd         memory_curate.py
+
+Sessions run concurrently (--concurrency at a time); events within a
+session run in order. Every hook process is reaped with os.wait4 so its
+CPU time and peak RSS are measured alongside wall-clock latency. When the
+hook daemon is used, its CPU time is sampled from /proc before and after.
+
+By default a stand-in memory server (memory_standin_server.py) is started
+on a free port, and hook state goes to a throwaway directory so caches
+start cold. Pass --api-url to target a server you started yourself.
+
+Reports per event: count, failures, throughput, p50/p95/p99/max latency
+and mean/p95 CPU per invocation. Results can be saved as a baseline and
+later runs compared against it:
+
+    python3 hook_loadgen.py --sessions 20 --prompts 10 --save-baseline base.json
+    python3 hook_loadgen.py --sessions 20 --prompts 10 --daemon --compare base.json
+
+NOTE: Uses only Python standard library (no external dependencies)
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+EVENT_HOOKS = {
+    "SessionStart": "memory_session_start.py",
+    "UserPromptSubmit": "memory_inject.py",
+    "PreCompact": "memory_curate_transcript.py",
+    "SessionEnd": "memory_curate.py",
+}
+EVENT_ORDER = ("SessionStart", "UserPromptSubmit", "PreCompact", "SessionEnd")
+
+PROMPTS = (
+    "Why is the daemon socket latency so high on the first prompt?",
+    "Add eviction to the context cache and keep it LRU",
+    "How does the project resolver decide the cache is still valid?",
+    "The circuit breaker probe never closes the circuit, can you check?",
+    "Replay the spool in bigger batches",
+    "Split transcript curation into windows",
+    "What did we decide about the session primer handoff last time?",
+    "Tune the keep-alive connection pool size",
+    "continue",
+    "Show me the metrics percentile report for yesterday",
+    "Why did the hook deadline budget expire?",
+    "continue",
+)
+
+
+def percentile(values: list, p: float):
+    """Nearest-rank percentile of values (None when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 5) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+
+def process_cpu_ms(pid: int):
+    """utime + stime of a running process in ms, from /proc (None if unavailable)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        ticks = int(fields[11]) + int(fields[12])
+        return ticks * 1000 / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def write_transcript(path: Path, prompts: list):
+    """A synthetic Claude Code transcript: user/assistant turns with tool calls."""
+    with open(path, 'w', encoding='utf-8') as f:
+        for i, prompt in enumerate(prompts):
+            f.write(json.dumps({"type": "user", "message": {"role": "user", "content": prompt}}) + "\n")
+            f.write(json.dumps({"type": "assistant", "message": {"role": "assistant", "content": [
+                {"type": "text", "text": f"Looking into it ({i})."},
+                {"type": "tool_use", "id": f"tool-{i}", "name": "Read",
+                 "input": {"file_path": f"/src/module_{i % 5}.py"}},
+            ]}}) + "\n")
+            f.write(json.dumps({"type": "user", "message": {"role": "user", "content": [
+                {"type": "tool_result", "tool_use_id": f"tool-{i}", "content": "x = 1\n" * 200},
+            ]}}) + "\n")
+
+
+def run_hook(event: str, payload: dict, env: dict, cwd: str) -> dict:
+    """Run one hook process and measure it."""
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, str(HOOKS_DIR / EVENT_HOOKS[event])],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        env=env,
+        cwd=cwd,
+    )
+    proc.stdin.write(json.dumps(payload).encode('utf-8'))
+    proc.stdin.close()
+    output = proc.stdout.read()
+    proc.stdout.close()
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return {
+        "event": event,
+        "wall_ms": (time.perf_counter() - started) * 1000,
+        "cpu_ms": (usage.ru_utime + usage.ru_stime) * 1000,
+        "max_rss_kb": usage.ru_maxrss,
+        "exit_code": proc.returncode,
+        "output_bytes": len(output),
+    }
+
+
+def run_session(index: int, args, env: dict, workdir: Path) -> list:
+    """Run one synthetic session's events in order."""
+    rng = random.Random(args.seed + index)
+    session_id = f"loadgen-{index:04d}"
+    project_dir = workdir / f"project-{index % args.projects}"
+    prompts = [rng.choice(PROMPTS) for _ in range(args.prompts)]
+    common = {"session_id": session_id, "cwd": str(project_dir)}
+
+    results = [run_hook("SessionStart", dict(common, hook_event_name="SessionStart", source="startup"),
+                        env, str(project_dir))]
+    for prompt in prompts:
+        results.append(run_hook("UserPromptSubmit",
+                                dict(common, hook_event_name="UserPromptSubmit", prompt=prompt),
+                                env, str(project_dir)))
+    if args.precompact:
+        transcript = workdir / f"{session_id}.jsonl"
+        write_transcript(transcript, prompts)
+        results.append(run_hook("PreCompact",
+                                dict(common, hook_event_name="PreCompact", trigger="auto",
+                                     transcript_path=str(transcript)),
+                                env, str(project_dir)))
+    results.append(run_hook("SessionEnd", dict(common, hook_event_name="SessionEnd", reason="exit"),
+                            env, str(project_dir)))
+    return results
+
+
+def summarize(results: list, wall_seconds: float) -> dict:
+    """Per-event latency, CPU and throughput."""
+    events = {}
+    for event in EVENT_ORDER:
+        runs = [r for r in results if r["event"] == event]
+        if not runs:
+            continue
+        wall = [r["wall_ms"] for r in runs]
+        cpu = [r["cpu_ms"] for r in runs]
+        events[event] = {
+            "count": len(runs),
+            "failures": sum(1 for r in runs if r["exit_code"] != 0),
+            "throughput_per_s": round(len(runs) / wall_seconds, 2),
+            "p50_ms": round(percentile(wall, 50), 1),
+            "p95_ms": round(percentile(wall, 95), 1),
+            "p99_ms": round(percentile(wall, 99), 1),
+            "max_ms": round(max(wall), 1),
+            "cpu_mean_ms": round(sum(cpu) / len(cpu), 1),
+            "cpu_p95_ms": round(percentile(cpu, 95), 1),
+            "max_rss_kb": max(r["max_rss_kb"] for r in runs),
+        }
+    return {
+        "events": events,
+        "total_invocations": len(results),
+        "wall_seconds": round(wall_seconds, 2),
+        "throughput_per_s": round(len(results) / wall_seconds, 2),
+    }
+
+
+def print_summary(summary: dict):
+    print(f"{summary['total_invocations']} hook runs in {summary['wall_seconds']}s "
+          f"({summary['throughput_per_s']}/s)")
+    if summary.get("daemon_cpu_ms") is not None:
+        print(f"daemon CPU: {summary['daemon_cpu_ms']:.0f} ms")
+    print()
+    print(f"{'event':<18} {'n':>5} {'fail':>4} {'/s':>7} {'p50':>7} {'p95':>7} "
+          f"{'p99':>7} {'max':>7} {'cpu':>6} {'cpu95':>6}")
+    for event, s in summary["events"].items():
+        print(f"{event:<18} {s['count']:>5} {s['failures']:>4} {s['throughput_per_s']:>7} "
+              f"{s['p50_ms']:>7} {s['p95_ms']:>7} {s['p99_ms']:>7} {s['max_ms']:>7} "
+              f"{s['cpu_mean_ms']:>6} {s['cpu_p95_ms']:>6}")
+
+
+def print_comparison(summary: dict, baseline: dict):
+    """Percent change against a saved baseline (negative is faster)."""
+    print()
+    print(f"vs baseline {baseline.get('label') or ''}".rstrip())
+    print(f"{'event':<18} {'p50':>9} {'p95':>9} {'p99':>9} {'cpu':>9}")
+
+    def change(new, old):
+        if not old:
+            return "-"
+        return f"{(new - old) / old:+.0%}"
+
+    for event, s in summary["events"].items():
+        b = baseline.get("events", {}).get(event)
+        if not b:
+            continue
+        print(f"{event:<18} {change(s['p50_ms'], b['p50_ms']):>9} {change(s['p95_ms'], b['p95_ms']):>9} "
+              f"{change(s['p99_ms'], b['p99_ms']):>9} {change(s['cpu_mean_ms'], b['cpu_mean_ms']):>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the memory hooks for concurrent synthetic sessions")
+    parser.add_argument("--sessions", type=int, default=10, help="Synthetic sessions to run")
+    parser.add_argument("--concurrency", type=int, default=None, help="Sessions at a time (default: all)")
+    parser.add_argument("--prompts", type=int, default=5, help="UserPromptSubmit events per session")
+    parser.add_argument("--projects", type=int, default=3, help="Distinct project directories")
+    parser.add_argument("--precompact", action="store_true", help="Include a PreCompact event per session")
+    parser.add_argument("--daemon", action="store_true", help="Run through the hook daemon")
+    parser.add_argument("--api-url", help="Memory server to use (default: start a stand-in)")
+    parser.add_argument("--latency", type=float, default=10, help="Stand-in latency per request (ms)")
+    parser.add_argument("--jitter", type=float, default=10, help="Stand-in jitter (ms)")
+    parser.add_argument("--error-rate", type=float, default=0, help="Stand-in injected error rate")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--label", default="", help="Name stored with --save-baseline")
+    parser.add_argument("--save-baseline", help="Write the summary to this JSON file")
+    parser.add_argument("--compare", help="Compare against a saved baseline JSON file")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="hook-loadgen-"))
+    for i in range(args.projects):
+        project_dir = workdir / f"project-{i}"
+        project_dir.mkdir()
+        (project_dir / "CLAUDE.md").write_text(f"# Project {i}\n\nSynthetic project for load tests.\n")
+        (project_dir / ".memory-project.json").write_text(json.dumps({"project_id": f"loadgen-{i}"}))
+
+    env = dict(os.environ)
+    env["MEMORY_HOOKS_STATE_DIR"] = str(workdir / "state")
+    env["MEMORY_DAEMON_SOCKET"] = str(workdir / "daemon.sock")
+    env.pop("MEMORY_DAEMON_DISABLE", None)
+
+    children = []
+    daemon_pid = None
+    try:
+        if args.api_url:
+            env["MEMORY_API_URL"] = args.api_url
+        else:
+            port = free_port()
+            children.append(subprocess.Popen(
+                [sys.executable, str(SCRIPTS_DIR / "memory_standin_server.py"), "--port", str(port),
+                 "--latency", str(args.latency), "--jitter", str(args.jitter),
+                 "--error-rate", str(args.error_rate), "--curate-latency", "200", "--seed", str(args.seed)],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            ))
+            if not wait_for_port(port):
+                print("Stand-in server did not start", file=sys.stderr)
+                sys.exit(1)
+            env["MEMORY_API_URL"] = f"http://127.0.0.1:{port}"
+
+        if args.daemon:
+            subprocess.run([sys.executable, str(HOOKS_DIR / "memory_daemon.py"), "start"],
+                           env=env, check=True, stdout=subprocess.DEVNULL)
+            try:
+                daemon_pid = int((workdir / "daemon.sock.pid").read_text())
+            except (OSError, ValueError):
+                daemon_pid = None
+        else:
+            env["MEMORY_DAEMON_DISABLE"] = "1"
+
+        daemon_cpu_before = process_cpu_ms(daemon_pid) if daemon_pid else None
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency or args.sessions) as pool:
+            sessions = list(pool.map(lambda i: run_session(i, args, env, workdir), range(args.sessions)))
+        wall_seconds = time.perf_counter() - started
+
+        summary = summarize([r for session in sessions for r in session], wall_seconds)
+        summary["label"] = args.label
+        summary["config"] = {
+            "sessions": args.sessions,
+            "concurrency": args.concurrency or args.sessions,
+            "prompts": args.prompts,
+            "precompact": args.precompact,
+            "daemon": args.daemon,
+        }
+        if daemon_cpu_before is not None:
+            daemon_cpu_after = process_cpu_ms(daemon_pid)
+            if daemon_cpu_after is not None:
+                summary["daemon_cpu_ms"] = round(daemon_cpu_after - daemon_cpu_before, 1)
+    finally:
+        if args.daemon:
+            subprocess.run([sys.executable, str(HOOKS_DIR / "memory_daemon.py"), "stop"],
+                           env=env, stdout=subprocess.DEVNULL)
+        for child in children:
+            child.terminate()
+            child.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_summary(summary)
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(summary, json.load(f))
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"\nBaseline saved to {args.save_baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,494 @@
+#!/usr/bin/env python3
+"""
+Stand-in memory server for offline benchmarking of the hooks
+
+Implements the endpoints the hooks call, with the request and response
+shapes they use, backed by in-memory synthetic memories:
+
+    GET  /health
+    GET  /stats                      request counters (for benchmarks)
+    POST /memory/context             {"context_text": ...}
+    POST /memory/process             {"success": true, "message_count": n}
+    POST /memory/checkpoint          {"success": true, ...}
+    POST /memory/curate-transcript   {"success": true, "memories_curated": n,
+                                      "session_summary": ...}
+                                     with "async": true: 202 {"job_id", "status"}
+                                     "start_offset"/"end_offset": curate that byte range only
+                                     with "commit": false: {"memories": [{"content"}, ...]}, nothing stored
+    POST /memory/store               {"success": true, "memories_stored": n}
+    POST /memory/curation-job        {"job_id", "status": queued|running|done|failed, ...}
+    POST /memory/batch               {"results": [{"status", "body"}, ...]}
+    POST /memory/changes             {"changes": [...], "cursor": ..., "has_more": ...}
+
+/memory/context returns the session primer until the session has a
+message recorded (or when max_memories is 0), otherwise the memories whose
+words overlap the prompt most. /memory/process honours "message_count" so
+coalesced tracking increments are counted correctly. Every memory carries
+a global sequence number, so /memory/changes can return just the memories
+created after a client's cursor (see memory_sync.py). /memory/context
+responses carry an ETag; a request whose If-None-Match matches gets an
+empty 304 (the primer cache in memory_session_start.py relies on this).
+Curation with "commit": false returns the memories it would store, one
+per transcript line whose hash picks it, so overlapping windows of a
+transcript yield the same memory for the same line (see
+curation_windows.py); /memory/store then stores the merged set once per
+"curation_id".
+
+Injected behaviour (all optional):
+    --latency MS          added to every request (context/process/...)
+    --jitter MS           uniform random extra latency, 0..MS
+    --curate-latency MS   extra latency for /memory/curate-transcript
+    --curate-ms-per-kb MS more curation latency per KB of transcript curated
+    --error-rate P        fraction of requests answered with HTTP 503
+    --payload-bytes N     size of each synthetic memory's text
+    --memories N          synthetic memories seeded per project
+
+Responses are written with a single send and TCP_NODELAY so the stand-in
+does not add Nagle/delayed-ACK stalls the real server would not have.
+
+This is not the memory engine - nothing is persisted and retrieval is a
+word-overlap toy. It exists so hook latency can be measured on an
+isolated machine.
+
+Usage:
+    python3 ~/.claude/hooks/scripts/memory_standin_server.py --port 8765
+    python3 memory_standin_server.py --port 8799 --latency 20 --jitter 30 --error-rate 0.01
+
+NOTE: Uses only Python standard library (no external dependencies)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_WORDS = re.compile(r"[a-z0-9]+")
+
+TOPICS = (
+    "daemon socket latency", "context cache eviction", "project resolver mtime",
+    "circuit breaker probe", "spool replay batch", "transcript curation window",
+    "session primer handoff", "keep-alive connection pool", "token budget trim",
+    "metrics percentile report", "hook deadline budget", "background tracking flush",
+)
+
+
+def words(text: str) -> set:
+    return set(_WORDS.findall(text.lower()))
+
+
+class StandinState:
+    """In-memory sessions and memories, shared by all request threads."""
+
+    def __init__(self, options):
+        self.options = options
+        self.lock = threading.Lock()
+        self.message_counts = {}   # (project_id, session_id) -> messages seen
+        self.memories = {}         # project_id -> [memory dict]
+        self.sequence = 0          # Last change sequence number handed out
+        self.checkpoints = []
+        self.requests = {}         # endpoint -> count
+        self.errors = 0
+        self.not_modified = 0      # 304 responses to conditional requests
+        self.jobs = {}             # job_id -> curation job status
+        self.job_sequence = 0
+        self.stored = {}           # curation_id -> memories stored by /memory/store
+        self.random = random.Random(options.seed)
+
+    def project_memories(self, project_id: str) -> list:
+        """Memories for a project, seeding synthetic ones on first use."""
+        with self.lock:
+            if project_id not in self.memories:
+                self.memories[project_id] = [
+                    self._synthetic_memory(project_id, i) for i in range(self.options.memories)
+                ]
+            return self.memories[project_id]
+
+    def _synthetic_memory(self, project_id: str, i: int) -> dict:
+        """Make memory i of a project. Call with self.lock held."""
+        self.sequence += 1
+        topic = TOPICS[i % len(TOPICS)]
+        text = f"[{project_id}] Decision {i}: {topic}. "
+        filler = f"Notes on {topic} from an earlier session. "
+        while len(text) < self.options.payload_bytes:
+            text += filler
+        return {
+            "id": f"{project_id}-{i}",
+            "content": text[:self.options.payload_bytes],
+            "words": words(topic),
+            "seq": self.sequence,
+            "updated_at": time.time(),
+        }
+
+    def stored_memory(self, project_id: str, content: str) -> dict:
+        """A memory curated from a transcript. Call with self.lock held."""
+        self.sequence += 1
+        return {
+            "id": f"{project_id}-s{self.sequence}",
+            "content": content,
+            "words": words(content),
+            "seq": self.sequence,
+            "updated_at": time.time(),
+        }
+
+    def count(self, endpoint: str):
+        with self.lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+
+# --- Endpoint handlers: payload dict -> (status, body dict) ----------------
+
+def memory_context(state: StandinState, payload: dict) -> tuple:
+    project_id = payload.get("project_id", "default")
+    session_key = (project_id, payload.get("session_id", "unknown"))
+    max_memories = int(payload.get("max_memories", 5))
+    with state.lock:
+        messages = state.message_counts.get(session_key, 0)
+
+    if messages == 0 or max_memories == 0:
+        text = (
+            f"## Session Primer\n\nProject {project_id}: "
+            f"{len(state.project_memories(project_id))} memories on record. "
+            "Last session worked on hook latency."
+        )
+        return 200, {"context_text": text, "memories": [], "is_primer": True}
+
+    query = words(payload.get("current_message", ""))
+    scored = sorted(
+        state.project_memories(project_id),
+        key=lambda memory: len(query & memory["words"]),
+        reverse=True,
+    )
+    chosen = [memory for memory in scored[:max_memories] if query & memory["words"]] or scored[:1]
+    lines = [f"- {memory['content']}" for memory in chosen]
+    return 200, {
+        "context_text": "## Relevant Memories\n\n" + "\n".join(lines),
+        "memories": [memory["id"] for memory in chosen],
+        "is_primer": False,
+    }
+
+
+def memory_process(state: StandinState, payload: dict) -> tuple:
+    session_key = (payload.get("project_id", "default"), payload.get("session_id", "unknown"))
+    increment = int(payload.get("message_count", 1))
+    with state.lock:
+        state.message_counts[session_key] = state.message_counts.get(session_key, 0) + increment
+        total = state.message_counts[session_key]
+    return 200, {"success": True, "message_count": total}
+
+
+def memory_checkpoint(state: StandinState, payload: dict) -> tuple:
+    with state.lock:
+        state.checkpoints.append(payload)
+    return 200, {"success": True, "message": "Curation started", "trigger": payload.get("trigger")}
+
+
+def count_lines(path: str, start=None, end=None) -> int:
+    """Lines of a transcript, or of its byte range [start, end) when given."""
+    with open(path, 'rb') as f:
+        start = int(start or 0)
+        if end is None:
+            end = os.fstat(f.fileno()).st_size
+        end = int(end)
+        if not 0 <= start <= end:
+            raise ValueError("bad range")
+        f.seek(start)
+        lines = 0
+        remaining = end - start
+        while remaining > 0:
+            chunk = f.read(min(remaining, 1 << 16))
+            if not chunk:
+                break
+            lines += chunk.count(b"\n")
+            remaining -= len(chunk)
+        return lines
+
+
+def candidate_memories(path: str, project_id: str, start=None, end=None) -> list:
+    """Memories a transcript range would yield: about one per 20 lines, chosen by line hash."""
+    candidates = []
+    with open(path, 'rb') as f:
+        f.seek(int(start or 0))
+        end = os.fstat(f.fileno()).st_size if end is None else int(end)
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            digest = hashlib.sha1(line).hexdigest()
+            if int(digest[:8], 16) % 20 == 0:
+                topic = TOPICS[int(digest[8:12], 16) % len(TOPICS)]
+                candidates.append({"content": f"[{project_id}] Noted in a transcript ({digest[:10]}): {topic}."})
+    return candidates
+
+
+def _curate(state: StandinState, payload: dict, lines: int, size: int) -> dict:
+    """Turn a transcript of lines lines into memories (one per 20 lines)."""
+    time.sleep((state.options.curate_latency + state.options.curate_ms_per_kb * size / 1024) / 1000)
+    project_id = payload.get("project_id", "default")
+    if payload.get("commit") is False:
+        return {
+            "success": True,
+            "memories": candidate_memories(payload["transcript_path"], project_id,
+                                           payload.get("start_offset"), payload.get("end_offset")),
+            "session_summary": f"Stand-in summary of {lines} transcript lines.",
+        }
+    memories = state.project_memories(project_id)
+    curated = lines // 20
+    with state.lock:
+        first = len(memories)
+        memories.extend(state._synthetic_memory(project_id, first + i) for i in range(curated))
+    return {
+        "success": True,
+        "memories_curated": curated,
+        "session_summary": f"Stand-in summary of {lines} transcript lines.",
+    }
+
+
+def _run_job(state: StandinState, job: dict, payload: dict, lines: int, size: int):
+    with state.lock:
+        job["status"] = "running"
+        job["started_at"] = time.time()
+    try:
+        result = _curate(state, payload, lines, size)
+        update = {"status": "done", **result}
+    except Exception as e:
+        update = {"status": "failed", "error": str(e)}
+    with state.lock:
+        job.update(update, finished_at=time.time())
+
+
+def memory_curate_transcript(state: StandinState, payload: dict) -> tuple:
+    path = payload.get("transcript_path", "")
+    try:
+        lines = count_lines(path, payload.get("start_offset"), payload.get("end_offset"))
+        size = int(payload.get("end_offset") or os.path.getsize(path)) - int(payload.get("start_offset") or 0)
+    except OSError:
+        return 404, {"detail": f"Transcript not found: {path}"}
+    except ValueError:
+        return 400, {"detail": "Invalid transcript range"}
+
+    if not payload.get("async") or payload.get("commit") is False:
+        return 200, _curate(state, payload, lines, size)
+
+    # Job mode: answer right away, curate on a worker thread
+    with state.lock:
+        state.job_sequence += 1
+        job_id = f"job-{state.job_sequence}"
+        job = {"job_id": job_id, "status": "queued", "project_id": payload.get("project_id", "default"),
+               "submitted_at": time.time()}
+        state.jobs[job_id] = job
+    threading.Thread(target=_run_job, args=(state, job, payload, lines, size), daemon=True).start()
+    return 202, {"job_id": job_id, "status": "queued"}
+
+
+def memory_curation_job(state: StandinState, payload: dict) -> tuple:
+    """Status (and once finished, the result) of a curation job."""
+    with state.lock:
+        job = state.jobs.get(payload.get("job_id", ""))
+        if job is None:
+            return 404, {"detail": "Unknown job"}
+        return 200, dict(job)
+
+
+def memory_store(state: StandinState, payload: dict) -> tuple:
+    """Store curated memories; a repeated curation_id stores nothing again."""
+    project_id = payload.get("project_id") or "default"
+    contents = [m.get("content", "") for m in payload.get("memories", []) if isinstance(m, dict)]
+    memories = state.project_memories(project_id)
+    with state.lock:
+        curation_id = payload.get("curation_id")
+        if curation_id and curation_id in state.stored:
+            return 200, {"success": True, "memories_stored": state.stored[curation_id]}
+        known = {memory["content"] for memory in memories}
+        new = [content for content in dict.fromkeys(contents) if content and content not in known]
+        memories.extend(state.stored_memory(project_id, content) for content in new)
+        if curation_id:
+            state.stored[curation_id] = len(new)
+    return 200, {"success": True, "memories_stored": len(new)}
+
+
+def memory_changes(state: StandinState, payload: dict) -> tuple:
+    """Memories changed after the client's cursor, oldest first, one page at a time."""
+    try:
+        cursor = int(payload.get("cursor") or 0)
+    except (TypeError, ValueError):
+        return 400, {"detail": "Invalid cursor"}
+    limit = max(1, min(int(payload.get("limit", 500)), 5000))
+    memories = state.project_memories(payload.get("project_id", "default"))
+    with state.lock:
+        newer = [memory for memory in memories if memory["seq"] > cursor]
+    newer.sort(key=lambda memory: memory["seq"])
+    page = newer[:limit]
+    return 200, {
+        "changes": [
+            {"id": m["id"], "content": m["content"], "updated_at": m["updated_at"], "deleted": False}
+            for m in page
+        ],
+        "cursor": str(page[-1]["seq"] if page else cursor),
+        "has_more": len(newer) > limit,
+    }
+
+
+OPERATIONS = {
+    "context": memory_context,
+    "process": memory_process,
+    "checkpoint": memory_checkpoint,
+}
+
+
+def memory_batch(state: StandinState, payload: dict) -> tuple:
+    results = []
+    for operation in payload.get("operations", []):
+        handler = OPERATIONS.get(operation.get("op"))
+        if handler is None:
+            results.append({"status": 400, "body": {"detail": "Unknown operation"}})
+            continue
+        status, body = handler(state, operation.get("payload", {}))
+        results.append({"status": status, "body": body})
+    return 200, {"results": results}
+
+
+# Routes answering with an ETag and honouring If-None-Match
+CONDITIONAL_ROUTES = {"/memory/context"}
+
+ROUTES = {
+    "/memory/context": memory_context,
+    "/memory/process": memory_process,
+    "/memory/checkpoint": memory_checkpoint,
+    "/memory/curate-transcript": memory_curate_transcript,
+    "/memory/curation-job": memory_curation_job,
+    "/memory/store": memory_store,
+    "/memory/batch": memory_batch,
+    "/memory/changes": memory_changes,
+}
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MemoryStandin/1.0"
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        if self.server.state.options.verbose:
+            super().log_message(format, *args)
+
+    def send_json(self, status: int, body: dict, headers: dict = None):
+        """Write status line, headers and body in one send (no body when body is None)."""
+        payload = json.dumps(body).encode('utf-8') if body is not None else b""
+        head = [
+            f"HTTP/1.1 {status} {self.responses.get(status, ('',))[0]}",
+            f"Server: {self.server_version}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(payload)}",
+        ]
+        for name, value in (headers or {}).items():
+            head.append(f"{name}: {value}")
+        self.wfile.write(("\r\n".join(head) + "\r\n\r\n").encode('latin-1') + payload)
+        self.log_request(status)
+
+    def read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length) if length else b""
+        return json.loads(raw.decode('utf-8')) if raw else {}
+
+    def do_GET(self):
+        state = self.server.state
+        if self.path == "/health":
+            self.send_json(200, {"status": "ok", "standin": True})
+        elif self.path == "/stats":
+            with state.lock:
+                stats = {
+                    "requests": dict(state.requests),
+                    "errors_injected": state.errors,
+                    "not_modified": state.not_modified,
+                    "sessions": len(state.message_counts),
+                    "messages": sum(state.message_counts.values()),
+                    "checkpoints": len(state.checkpoints),
+                    "curation_jobs": len(state.jobs),
+                }
+            self.send_json(200, stats)
+        else:
+            self.send_json(404, {"detail": "Not Found"})
+
+    def do_POST(self):
+        state = self.server.state
+        options = state.options
+        path = self.path.split("?", 1)[0]
+        try:
+            payload = self.read_json()
+        except ValueError:
+            self.send_json(400, {"detail": "Invalid JSON"})
+            return
+
+        handler = ROUTES.get(path)
+        if handler is None:
+            self.send_json(404, {"detail": "Not Found"})
+            return
+        state.count(path)
+
+        delay = options.latency + (state.random.uniform(0, options.jitter) if options.jitter else 0)
+        if delay:
+            time.sleep(delay / 1000)
+        if options.error_rate and state.random.random() < options.error_rate:
+            with state.lock:
+                state.errors += 1
+            self.send_json(503, {"detail": "Injected error"})
+            return
+
+        status, body = handler(state, payload)
+        if status == 200 and path in CONDITIONAL_ROUTES:
+            # Validator for conditional requests (If-None-Match -> 304)
+            etag = '"' + hashlib.sha1(json.dumps(body, sort_keys=True).encode('utf-8')).hexdigest()[:16] + '"'
+            if self.headers.get("If-None-Match") == etag:
+                with state.lock:
+                    state.not_modified += 1
+                self.send_json(304, None, {"ETag": etag})
+            else:
+                self.send_json(status, body, {"ETag": etag})
+            return
+        self.send_json(status, body)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Stand-in memory server for hook benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0, help="Added latency per request (ms)")
+    parser.add_argument("--jitter", type=float, default=0, help="Extra random latency, 0..MS")
+    parser.add_argument("--curate-latency", type=float, default=500,
+                        help="Extra latency for /memory/curate-transcript (ms)")
+    parser.add_argument("--curate-ms-per-kb", type=float, default=0,
+                        help="More curation latency per KB of transcript curated (ms)")
+    parser.add_argument("--error-rate", type=float, default=0, help="Fraction of requests failing with 503")
+    parser.add_argument("--payload-bytes", type=int, default=300, help="Size of each memory's text")
+    parser.add_argument("--memories", type=int, default=50, help="Synthetic memories per project")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for jitter/errors")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    return parser.parse_args(argv)
+
+
+def main():
+    options = parse_args()
+    server = ThreadingHTTPServer((options.host, options.port), StandinHandler)
+    server.daemon_threads = True
+    server.state = StandinState(options)
+    print(f"Stand-in memory server on http://{options.host}:{options.port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Session-scoped dedup of injected memories
+
+memory_inject.py asks for context on every prompt, and in a long session
+the same memories come back again and again - each time costing tokens for
+context the model already has. Per session we remember a hash of every
+memory injected so far:
+
+    ~/.claude/memory-hooks/sessions/<session_id>.json
+
+Memories already injected are dropped from later context, or reduced to a
+one-line reference (MEMORY_DEDUP_MODE=reference, the default) so the model
+knows they are still relevant. When nothing new is left the hook injects
+nothing.
+
+Compaction replaces the conversation with a summary, so the record is
+reset on PreCompact and when a session restarts from compact or clear.
+Files of sessions idle for SESSION_MAX_AGE are swept away.
+
+NOTE: Uses only Python standard library (no external dependencies)
+"""
+
+import hashlib
+import os
+import re
+import time
+
+from hook_state import state_path, read_json, write_json_atomic
+from token_budget import join_items, split_items
+
+# Configuration
+DEDUP_ENABLED = os.getenv("MEMORY_DEDUP", "1") != "0"
+DEDUP_MODE = os.getenv("MEMORY_DEDUP_MODE", "reference")  # or "suppress"
+SESSION_MAX_AGE = 7 * 86400
+REFERENCE_CHARS = 80
+REFERENCE_MARK = "↺"
+
+SESSIONS_DIR = state_path("sessions")
+
+_WHITESPACE = re.compile(r"\s+")
+_SAFE_ID = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def _session_file(session_id: str):
+    return SESSIONS_DIR / f"{_SAFE_ID.sub('_', session_id)}.json"
+
+
+def item_hash(item: str) -> str:
+    """Hash of a memory's text, ignoring case and whitespace."""
+    normalized = _WHITESPACE.sub(" ", item).strip().lower()
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:16]
+
+
+def _reference(item: str) -> str:
+    """One-line stand-in for a memory injected earlier."""
+    first_line = item.strip().split("\n", 1)[0].lstrip("-*• ").strip()
+    if len(first_line) > REFERENCE_CHARS:
+        first_line = first_line[:REFERENCE_CHARS].rstrip() + "…"
+    return f"- {REFERENCE_MARK} (shown earlier) {first_line}"
+
+
+def _tracked(session_id: str) -> bool:
+    return DEDUP_ENABLED and bool(session_id) and session_id != "unknown"
+
+
+def filter_seen(session_id: str, context_text: str) -> str:
+    """
+    Remove memories this session has already been given.
+    Returns "" when every memory was injected before.
+    """
+    if not _tracked(session_id) or not context_text:
+        return context_text
+    seen = read_json(_session_file(session_id), {}).get("injected", {})
+    if not seen:
+        return context_text
+
+    header, items = split_items(context_text)
+    new_items = [item for item in items if item_hash(item) not in seen]
+    if not new_items:
+        return ""
+    if len(new_items) == len(items):
+        return context_text
+
+    if DEDUP_MODE == "reference":
+        kept = [item if item_hash(item) not in seen else _reference(item) for item in items]
+    else:
+        kept = new_items
+    return join_items(header, kept)
+
+
+def remember(session_id: str, offered: str, shown: str):
+    """
+    Record as injected the memories of offered (context after filter_seen)
+    that appear whole in shown (what the hook printed after trimming).
+    """
+    if not _tracked(session_id) or not shown:
+        return
+    _, items = split_items(offered)
+    hashes = [item_hash(item) for item in items if REFERENCE_MARK not in item and item in shown]
+    if not hashes:
+        return
+
+    path = _session_file(session_id)
+    state = read_json(path)
+    if state is None:
+        sweep()
+        state = {"injected": {}}
+    now = round(time.time())
+    injected = state.setdefault("injected", {})
+    for digest in hashes:
+        injected.setdefault(digest, now)
+    state["updated_at"] = now
+    write_json_atomic(path, state)
+
+
+def reset(session_id: str):
+    """Forget what was injected (the context was compacted or cleared)."""
+    if not session_id:
+        return
+    try:
+        os.unlink(_session_file(session_id))
+    except OSError:
+        pass
+
+
+def sweep(max_age: float = SESSION_MAX_AGE):
+    """Delete state files of sessions idle for longer than max_age."""
+    cutoff = time.time() - max_age
+    try:
+        entries = list(os.scandir(SESSIONS_DIR))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.name.endswith(".json") and entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+        except OSError:
+            pass
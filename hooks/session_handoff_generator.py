@@ -25,7 +25,8 @@ import os
 import subprocess
 from pathlib import Path
 from datetime import datetime
-from typing import Optional
+
+from project_resolver import find_project_root
 
 
 def run_command(cmd: list, cwd: str, timeout: int = 10) -> str:
@@ -43,24 +44,6 @@ def run_command(cmd: list, cwd: str, timeout: int = 10) -> str:
         return ""
 
 
-def find_project_root(cwd: str) -> Optional[Path]:
-    """
-    Find project root by looking for CLAUDE.md or .git directory.
-    Returns None if not in a project.
-    """
-    path = Path(cwd)
-
-    for parent in [path] + list(path.parents):
-        # Stop at home directory
-        if parent == Path.home():
-            return None
-        # Look for project markers
-        if (parent / "CLAUDE.md").exists() or (parent / ".git").exists():
-            return parent
-
-    return None
-
-
 def get_git_branch(cwd: str) -> str:
     """Get current git branch name."""
     return run_command(["git", "rev-parse", "--abbrev-ref", "HEAD"], cwd)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Token budget for memories injected into each prompt
+
+Whatever context memory_inject.py prints is prepended to the prompt and
+paid for on every model call, so it is held to MEMORY_INJECT_TOKEN_BUDGET
+tokens (0 disables the budget):
+
+- estimate_tokens() is a fast local estimate (no tokenizer): about four
+  characters per token for ASCII text, more for non-ASCII characters.
+- fit() keeps the header and as many of the returned memories as fit, in
+  the server's ranking order, and notes how many were left out.
+- memories_for_budget() asks the server for just enough memories to fill
+  the budget, using the average memory size seen for the project so far
+  (kept in ~/.claude/memory-hooks/token_budget.json).
+
+NOTE: Uses only Python standard library (no external dependencies)
+"""
+
+import math
+import os
+import re
+
+from hook_state import state_path, read_json, write_json_atomic
+
+# Configuration
+TOKEN_BUDGET = int(os.getenv("MEMORY_INJECT_TOKEN_BUDGET", "1200"))
+TOKENS_PER_MEMORY = int(os.getenv("MEMORY_TOKENS_PER_MEMORY", "150"))  # Until measured
+MAX_MEMORIES = int(os.getenv("MEMORY_MAX_MEMORIES", "10"))
+UNBUDGETED_MEMORIES = 5  # What memory_inject asked for before the budget
+AVERAGE_WEIGHT = 0.3     # Weight of the newest response in the running average
+
+STATS_FILE = state_path("token_budget.json")
+
+# A memory starts at a bullet, a numbered item or a level 3+ heading
+_ITEM_START = re.compile(r"^\s*(?:[-*•]\s|\d+[.)]\s|#{3,6}\s)")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count: ~4 ASCII chars per token, ~2 UTF-8 bytes per non-ASCII token."""
+    if not text:
+        return 0
+    extra_bytes = len(text.encode('utf-8')) - len(text)
+    return math.ceil(len(text) / 4 + extra_bytes / 2)
+
+
+def split_items(context_text: str) -> tuple:
+    """
+    Split rendered context into (header, [memory, ...]).
+    Falls back to blank-line separated paragraphs when there are no list items.
+    """
+    lines = context_text.split("\n")
+    starts = [i for i, line in enumerate(lines) if _ITEM_START.match(line)]
+    if not starts:
+        return "", [p.strip("\n") for p in context_text.split("\n\n") if p.strip()]
+
+    header = "\n".join(lines[:starts[0]]).rstrip()
+    items = []
+    for start, end in zip(starts, starts[1:] + [len(lines)]):
+        items.append("\n".join(lines[start:end]).rstrip())
+    return header, items
+
+
+def is_memory_list(context_text: str) -> bool:
+    """Whether context is a list of memories (not a primer or free text)."""
+    return any(_ITEM_START.match(line) for line in context_text.split("\n"))
+
+
+def join_items(header: str, items: list) -> str:
+    """Inverse of split_items() for a subset of the items."""
+    separator = "\n" if items and _ITEM_START.match(items[0]) else "\n\n"  # List items or paragraphs
+    return "\n\n".join(([header] if header else []) + [separator.join(items)])
+
+
+def fit(context_text: str, budget: int = None) -> str:
+    """Trim context to the token budget, keeping whole memories in ranking order."""
+    budget = TOKEN_BUDGET if budget is None else budget
+    if budget <= 0 or estimate_tokens(context_text) <= budget:
+        return context_text
+
+    header, items = split_items(context_text)
+    used = estimate_tokens(header)
+    if used >= budget:
+        return _truncate(context_text, budget)
+    kept = []
+    for item in items:
+        cost = estimate_tokens(item) + 1
+        if used + cost <= budget:
+            kept.append(item)
+            used += cost
+
+    if not kept:
+        # Nothing fits whole - keep the start of the best memory
+        kept = [_truncate(items[0], budget - used)]
+
+    text = join_items(header, kept)
+    omitted = len(items) - len(kept)
+    if omitted > 0:
+        noun = "memory" if omitted == 1 else "memories"
+        text += f"\n\n_({omitted} more {noun} omitted to fit the token budget)_"
+    return text
+
+
+def _truncate(text: str, budget: int) -> str:
+    """Cut text to roughly budget tokens."""
+    return text[:max(0, budget * 4 - 1)].rstrip() + "…"
+
+
+def memories_for_budget(project_id: str, budget: int = None) -> int:
+    """How many memories to request so they roughly fill the budget."""
+    budget = TOKEN_BUDGET if budget is None else budget
+    if budget <= 0:
+        return UNBUDGETED_MEMORIES
+    average = read_json(STATS_FILE, {}).get(project_id) or TOKENS_PER_MEMORY
+    return max(1, min(MAX_MEMORIES, math.ceil(budget / average)))
+
+
+def observe(project_id: str, context_text: str):
+    """Update the project's average tokens per memory from a server response."""
+    if TOKEN_BUDGET <= 0 or not context_text:
+        return
+    if not is_memory_list(context_text):
+        return  # A primer or free text
+    _, items = split_items(context_text)
+    measured = sum(estimate_tokens(item) for item in items) / len(items)
+
+    stats = read_json(STATS_FILE, {})
+    previous = stats.get(project_id)
+    average = measured if previous is None else previous + AVERAGE_WEIGHT * (measured - previous)
+    # Skip the write unless the request size would actually change
+    if previous is not None and abs(average - previous) < previous * 0.1:
+        return
+    stats[project_id] = round(average, 1)
+    write_json_atomic(STATS_FILE, stats)
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Streaming pre-digest of transcripts for curation
+
+Most of a Claude Code transcript is tool output: file dumps, command
+output, the same file read five times, base64 screenshots. None of it is
+what memories are made of, yet the curation server had to read it all.
+digest() streams the transcript (or a byte range of it) one line at a time
+and writes a compact JSONL sidecar next to it:
+
+    <transcript>.<start offset>.digest
+
+(not ending in .jsonl, so it is never mistaken for a session transcript).
+
+- Only user, assistant, system and summary entries are kept; attachments
+  and other bookkeeping entries are dropped, as are bulky metadata fields
+  such as toolUseResult (a second copy of the tool result).
+- Tool results, and long tool arguments such as the contents of a file
+  being written, are cut to MEMORY_TOOL_RESULT_CHARS characters.
+- A file read again with the same content becomes a one-line reference.
+- Images and other base64 blobs become a placeholder.
+- Thinking blocks lose their signatures.
+
+Memory use is bounded by the longest line plus the small maps used to
+dedupe reads. Sidecars are deleted after SIDECAR_MAX_AGE.
+
+Usage:
+    python3 ~/.claude/hooks/transcript_digest.py <transcript.jsonl> [...]   # Stats only
+
+NOTE: Uses only Python standard library (no external dependencies)
+"""
+
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+# Configuration
+DIGEST_ENABLED = os.getenv("MEMORY_TRANSCRIPT_DIGEST", "1") != "0"
+TOOL_RESULT_CHARS = int(os.getenv("MEMORY_TOOL_RESULT_CHARS", "2000"))
+SIDECAR_MAX_AGE = 86400
+MAX_TRACKED = 2000  # Tool calls / file reads remembered for dedupe
+
+KEEP_TYPES = {"user", "assistant", "system", "summary"}
+DROP_FIELDS = {"toolUseResult", "requestId", "apiBlockIndex", "effort", "perTurnEffort",
+               "userType", "entrypoint", "version", "slug", "sourceToolAssistantUUID"}
+READ_TOOLS = {"Read", "read_file"}
+
+_BLOB = re.compile(r"[A-Za-z0-9+/]{1000,}={0,2}")  # base64, line breaks removed
+
+
+class _Digester:
+    """State carried from line to line: tool calls and file reads seen."""
+
+    def __init__(self):
+        self.tool_reads = {}   # tool_use_id -> file path of a read
+        self.read_hashes = {}  # file path -> hash of the last content read
+        self.stats = {"lines_in": 0, "lines_out": 0, "bytes_in": 0, "bytes_out": 0,
+                      "dropped_entries": 0, "invalid_lines": 0, "truncated_results": 0,
+                      "truncated_inputs": 0, "deduped_reads": 0, "dropped_blobs": 0}
+
+    @staticmethod
+    def _remember(mapping: dict, key, value):
+        mapping.pop(key, None)
+        mapping[key] = value
+        if len(mapping) > MAX_TRACKED:
+            del mapping[next(iter(mapping))]
+
+    def line(self, raw: bytes):
+        """Digest of one transcript line, or None to drop it."""
+        try:
+            entry = json.loads(raw)
+        except ValueError:
+            self.stats["invalid_lines"] += 1
+            return None
+        if not isinstance(entry, dict) or entry.get("type") not in KEEP_TYPES:
+            self.stats["dropped_entries"] += 1
+            return None
+        for field in DROP_FIELDS.intersection(entry):
+            del entry[field]
+        message = entry.get("message")
+        if isinstance(message, dict) and isinstance(message.get("content"), list):
+            message["content"] = [self.block(block) for block in message["content"]]
+        return entry
+
+    def block(self, block):
+        if not isinstance(block, dict):
+            return block
+        kind = block.get("type")
+        if kind == "tool_use":
+            tool_input = block.get("input")
+            if block.get("name") in READ_TOOLS and isinstance(tool_input, dict) and tool_input.get("file_path"):
+                self._remember(self.tool_reads, block.get("id"), tool_input["file_path"])
+            if isinstance(tool_input, dict):
+                block["input"] = {key: self.tool_input(value) for key, value in tool_input.items()}
+        elif kind == "tool_result":
+            block["content"] = self.tool_result(block.get("tool_use_id"), block.get("content"))
+        elif kind in ("image", "document"):
+            self.stats["dropped_blobs"] += 1
+            return {"type": "text", "text": f"[{kind} omitted]"}
+        elif kind == "thinking":
+            block.pop("signature", None)
+        return block
+
+    def tool_input(self, value):
+        """Cut long tool arguments (file contents being written, big edits)."""
+        if isinstance(value, str) and len(value) > TOOL_RESULT_CHARS:
+            self.stats["truncated_inputs"] += 1
+            return value[:TOOL_RESULT_CHARS] + f"\n… [{len(value) - TOOL_RESULT_CHARS} more chars truncated]"
+        return value
+
+    def tool_result(self, tool_use_id, content):
+        if isinstance(content, list):
+            parts = []
+            for part in content:
+                if isinstance(part, dict) and part.get("type") == "text":
+                    parts.append(part.get("text", ""))
+                elif isinstance(part, dict) and part.get("type") in ("image", "document"):
+                    self.stats["dropped_blobs"] += 1
+                    parts.append(f"[{part['type']} omitted]")
+            content = "\n".join(parts)
+        if not isinstance(content, str):
+            return content
+
+        path = self.tool_reads.get(tool_use_id)
+        if path:
+            digest = hashlib.sha1(content.encode('utf-8', 'replace')).hexdigest()
+            if self.read_hashes.get(path) == digest:
+                self.stats["deduped_reads"] += 1
+                return f"[{path} read again - unchanged since the earlier read]"
+            self._remember(self.read_hashes, path, digest)
+
+        if len(content) >= 1000 and _BLOB.fullmatch(content.replace("\n", "").replace("\r", "")):
+            self.stats["dropped_blobs"] += 1
+            return f"[binary data omitted, {len(content)} chars]"
+        if len(content) > TOOL_RESULT_CHARS:
+            self.stats["truncated_results"] += 1
+            return content[:TOOL_RESULT_CHARS] + f"\n… [{len(content) - TOOL_RESULT_CHARS} more chars truncated]"
+        return content
+
+
+def sidecar_path(transcript_path: str, start: int = 0) -> str:
+    return f"{transcript_path}.{start}.digest"
+
+
+def digest(transcript_path: str, start: int = 0, end: int = None, out_path: str = None) -> dict:
+    """
+    Write the digest of transcript bytes [start, end) to out_path (None:
+    count only). Returns the stats, with "seconds" and "reduction".
+    """
+    started = time.perf_counter()
+    digester = _Digester()
+    stats = digester.stats
+    out = None
+    if out_path:
+        # Private like the transcript itself
+        fd = os.open(out_path + ".tmp", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        out = os.fdopen(fd, 'w', encoding='utf-8')
+    try:
+        with open(transcript_path, 'rb') as f:
+            f.seek(start)
+            while end is None or f.tell() < end:
+                raw = f.readline()
+                if not raw:
+                    break
+                stats["lines_in"] += 1
+                stats["bytes_in"] += len(raw)
+                entry = digester.line(raw)
+                if entry is None:
+                    continue
+                text = json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + "\n"
+                stats["lines_out"] += 1
+                stats["bytes_out"] += len(text.encode('utf-8'))
+                if out:
+                    out.write(text)
+        if out:
+            out.close()
+            os.replace(out_path + ".tmp", out_path)
+    finally:
+        if out and not out.closed:
+            out.close()
+            os.unlink(out_path + ".tmp")
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    stats["reduction"] = round(1 - stats["bytes_out"] / stats["bytes_in"], 3) if stats["bytes_in"] else 0.0
+    return stats
+
+
+def sweep_sidecars(transcript_path: str, max_age: float = SIDECAR_MAX_AGE):
+    """Delete this transcript's sidecars older than max_age (curated long ago)."""
+    cutoff = time.time() - max_age
+    for path in glob.glob(glob.escape(transcript_path) + ".*.digest"):
+        try:
+            if os.stat(path).st_mtime < cutoff:
+                os.unlink(path)
+        except OSError:
+            pass
+
+
+def _size(n: int) -> str:
+    return f"{n / 1048576:.2f} MB" if n >= 1048576 else f"{n / 1024:.1f} KB"
+
+
+def summary(stats: dict) -> str:
+    """One line for the hook output."""
+    return (f"{_size(stats['bytes_in'])} → {_size(stats['bytes_out'])} "
+            f"({stats['reduction']:.0%} smaller) in {stats['seconds']:.2f}s")
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__.split("Usage:")[1].split("NOTE:")[0].rstrip())
+        sys.exit(1)
+    total_in = total_out = 0
+    total_seconds = 0.0
+    for path in sys.argv[1:]:
+        try:
+            stats = digest(path)
+        except OSError as e:
+            print(f"{path}: {e}", file=sys.stderr)
+            continue
+        total_in += stats["bytes_in"]
+        total_out += stats["bytes_out"]
+        total_seconds += stats["seconds"]
+        print(f"{path}: {summary(stats)}")
+        print("    " + ", ".join(f"{key} {stats[key]}" for key in (
+            "lines_in", "lines_out", "dropped_entries", "truncated_results",
+            "truncated_inputs", "deduped_reads", "dropped_blobs", "invalid_lines")))
+    if len(sys.argv) > 2 and total_in:
+        print(f"total: {_size(total_in)} → {_size(total_out)} "
+              f"({1 - total_out / total_in:.0%} smaller) in {total_seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Per-transcript watermarks for incremental curation
+
+A session's transcript only grows, yet every PreCompact used to send all of
+it to /memory/curate-transcript. After a successful curation we remember
+how far it got:
+
+    ~/.claude/memory-hooks/transcript_watermarks/<sha1 of path>.json
+    {"path", "offset", "last_line_hash", "last_line_length", "updated_at"}
+
+offset is the byte just past the last curated line. The next curation
+sends only [offset, end of the last complete line) as "start_offset" /
+"end_offset". Before trusting a watermark the line ending at offset is
+hashed again; if the transcript was rewritten or truncated the whole file
+is curated from the start.
+
+NOTE: Uses only Python standard library (no external dependencies)
+"""
+
+import hashlib
+import os
+import time
+
+from hook_state import state_path, read_json, write_json_atomic
+
+# Configuration
+INCREMENTAL_ENABLED = os.getenv("MEMORY_INCREMENTAL_CURATION", "1") != "0"
+TAIL_CHUNK_BYTES = 1 << 16
+
+WATERMARK_DIR = state_path("transcript_watermarks")
+
+
+def _watermark_file(path: str):
+    digest = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()
+    return WATERMARK_DIR / f"{digest}.json"
+
+
+def complete_end(f, size: int) -> int:
+    """Offset just past the last newline of an open binary file (0 if none)."""
+    position = size
+    while position > 0:
+        start = max(0, position - TAIL_CHUNK_BYTES)
+        f.seek(start)
+        chunk = f.read(position - start)
+        newline = chunk.rfind(b"\n")
+        if newline >= 0:
+            return start + newline + 1
+        position = start
+    return 0
+
+
+def _last_line(f, offset: int, length: int) -> bytes:
+    f.seek(offset - length)
+    return f.read(length)
+
+
+def _line_before(f, offset: int) -> bytes:
+    """The complete line ending at offset (including its newline)."""
+    start = max(0, offset - TAIL_CHUNK_BYTES)
+    while True:
+        f.seek(start)
+        chunk = f.read(offset - start)
+        newline = chunk.rfind(b"\n", 0, len(chunk) - 1)
+        if newline >= 0 or start == 0:
+            return chunk[newline + 1:]
+        start = max(0, start - TAIL_CHUNK_BYTES)
+
+
+def pending_range(path: str) -> tuple:
+    """
+    (start, end) byte range of the transcript not curated yet; start == end
+    when there is nothing new. Only complete lines are included.
+    """
+    with open(path, 'rb') as f:
+        end = complete_end(f, os.fstat(f.fileno()).st_size)
+        if not INCREMENTAL_ENABLED:
+            return 0, end
+        mark = read_json(_watermark_file(path))
+        if not mark:
+            return 0, end
+        offset = mark.get("offset", 0)
+        length = mark.get("last_line_length", 0)
+        if not 0 < offset <= end or length > offset:
+            return 0, end
+        line = _last_line(f, offset, length)
+        if hashlib.sha1(line).hexdigest() != mark.get("last_line_hash"):
+            return 0, end  # Rewritten or truncated since
+        return offset, end
+
+
+def advance(path: str, offset: int):
+    """Record that the transcript has been curated up to offset."""
+    if not INCREMENTAL_ENABLED or offset <= 0:
+        return
+    try:
+        with open(path, 'rb') as f:
+            line = _line_before(f, offset)
+    except OSError:
+        return
+    write_json_atomic(_watermark_file(path), {
+        "path": os.path.abspath(path),
+        "offset": offset,
+        "last_line_hash": hashlib.sha1(line).hexdigest(),
+        "last_line_length": len(line),
+        "updated_at": time.time(),
+    })
+
+
+def rewind(path: str, start: int, end: int):
+    """Undo advance(path, end) for a curation that failed after all."""
+    mark = read_json(_watermark_file(path))
+    if not mark or mark.get("offset") != end:
+        return  # Moved on since - leave it
+    if start <= 0:
+        try:
+            os.unlink(_watermark_file(path))
+        except OSError:
+            pass
+    else:
+        advance(path, start)